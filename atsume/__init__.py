@@ -5,20 +5,24 @@
 
 from .component import (
     with_listener,
+    with_batch_listener,
     Component,
     ComponentConfig,
     Context,
     on_close,
     on_open,
     as_time_schedule,
+    serialized,
 )
 
 __all__ = [
     "with_listener",
+    "with_batch_listener",
     "Component",
     "ComponentConfig",
     "Context",
     "on_open",
     "on_close",
     "as_time_schedule",
+    "serialized",
 ]
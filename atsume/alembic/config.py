@@ -6,8 +6,8 @@ import sqlalchemy
 from alembic.config import Config as AlembicConfig
 from alembic.script import ScriptDirectory
 
-from atsume.settings import settings
 from atsume.component.manager import manager
+from atsume.db.manager import get_database_settings
 
 if typing.TYPE_CHECKING:
     from atsume.component.component_config import ComponentConfig
@@ -31,9 +31,12 @@ class Config(AlembicConfig):
     rename_models: dict[str, str] = {}
 
 
-def get_all_tables() -> typing.List[str]:
+def get_all_tables(database: typing.Optional[str] = None) -> typing.List[str]:
     tables = []
     for app in manager.component_configs:
+        # Tables in another database can't conflict with this one
+        if database is not None and app.database != database:
+            continue
         tables.append(get_alembic_table_name(app.name))
         tables.extend(app._model_metadata.tables.keys())
     return tables
@@ -55,11 +58,16 @@ def get_alembic_config(
         cfg.set_main_option("sqlalchemy.url", "sqlite://")
         cfg.engine = sqlalchemy.create_engine("sqlite://")
     else:
-        cfg.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
-        cfg.engine = settings.DATABASE_URL
+        # Each component is migrated in the database its models are stored in
+        url = get_database_settings(component_config.database)["URL"]
+        cfg.set_main_option("sqlalchemy.url", url)
+        cfg.engine = url
     # This is where this component's migration files will end up
-    # Migration path needs to be a path relative to cwd
-    migrations_path = component_config.db_migration_path.relative_to(Path(os.getcwd()))
+    # Migration path needs to be a path relative to cwd, unless the component lives outside
+    # of the project (like the components bundled with Atsume)
+    migrations_path = component_config.db_migration_path
+    if migrations_path.is_relative_to(Path(os.getcwd())):
+        migrations_path = migrations_path.relative_to(Path(os.getcwd()))
     cfg.set_section_option(
         component_config.name, "version_locations", str(migrations_path)
     )
@@ -70,7 +78,7 @@ def get_alembic_config(
     cfg.app_metadata = component_config._model_metadata
     # TODO: May not be needed anymore now that make migrations simulates the database and for each component
     # Migrations also needs awareness for all tables used by the bot
-    cfg.all_tables = get_all_tables()
+    cfg.all_tables = get_all_tables(component_config.database)
 
     # Get the previous migration's revision number
     # The ID of the next migration is the incremented previous migration
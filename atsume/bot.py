@@ -29,6 +29,7 @@ from atsume.cli.base import cli
 from atsume.db.manager import database
 from atsume.component.manager import manager as component_manager
 from atsume.component import Component, ComponentConfig
+from atsume.component.listener_queue import ListenerQueue
 from atsume.extensions.loader import attach_extensions, load_module_class
 from atsume.utils import module_to_path
 
@@ -160,6 +161,8 @@ def load_component(
 
     # Create the component and load the commands into it
     component = Component(name=component_config.name)
+    if settings.COMPONENT_METRICS:
+        component.set_hooks(component.metrics.hooks())
     module = importlib.import_module(component_config.commands_path)
     module_attrs = vars(module)
     component.load_from_scope(scope=module_attrs)
@@ -172,9 +175,16 @@ def load_component(
     for value in module_attrs.values():
         if isinstance(value, BaseCallback):
             value._component = component
+            if settings.COMPONENT_METRICS and value.metrics_kind is not None:
+                value.latency = component.metrics.callback(
+                    value.metrics_kind, value.callback
+                )
             if isinstance(value, AtsumeEventListener):
                 if component_config.permissions:
                     value.permissions = component_config.permissions
+                _attach_listener_queue(component, component_config, value)
+                if value.queue is not None or value.coalescer is not None:
+                    component.add_on_close(value.close)
                 component.add_listener(value.event_type, value)
             elif isinstance(value, AtsumeComponentOpen):
                 component.add_on_open(value)
@@ -184,4 +194,36 @@ def load_component(
                 component.add_schedule(value.as_time_schedule())
             elif isinstance(value, AtsumeIntervalSchedule):
                 component.add_schedule(value.as_interval())
+            # Everything the callback needs is set now, so build its invocation plan
+            value.build_plan()
     client.add_component(component)
+
+
+def _attach_listener_queue(
+    component: Component,
+    component_config: ComponentConfig,
+    listener: AtsumeEventListener,
+) -> None:
+    """Give a listener a queue if it or its component config asks for one."""
+    size = (
+        listener.queue_size
+        if listener.queue_size is not None
+        else component_config.listener_queue_size
+    )
+    if not size:
+        return
+    listener.queue = ListenerQueue(
+        f"{component_config.name}.{listener.callback.__name__}",
+        size,
+        workers=(
+            listener.queue_workers
+            if listener.queue_workers is not None
+            else component_config.listener_queue_workers
+        ),
+        overflow=(
+            listener.queue_overflow
+            if listener.queue_overflow is not None
+            else component_config.listener_queue_overflow
+        ),
+    )
+    component.listener_queues.append(listener.queue)
@@ -10,16 +10,29 @@
 
 
 from .component_config import ComponentConfig
-from .decorators import with_listener, on_open, on_close, as_time_schedule
+from .decorators import (
+    with_listener,
+    with_batch_listener,
+    on_open,
+    on_close,
+    as_time_schedule,
+)
 from .component import Component
 from .context import Context
+from .listener_queue import ListenerQueue, OverflowPolicy
+from .keyed_executor import KeyedExecutor, serialized
 
 __all__ = [
     "with_listener",
+    "with_batch_listener",
     "ComponentConfig",
     "Component",
     "Context",
     "on_close",
     "on_open",
     "as_time_schedule",
+    "ListenerQueue",
+    "OverflowPolicy",
+    "KeyedExecutor",
+    "serialized",
 ]
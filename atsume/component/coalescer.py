@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import typing
+
+from atsume.component.keyed_executor import KEY_FUNCTIONS, KeyFunction, KeySpec
+
+logger = logging.getLogger(__name__)
+
+_Deliver = typing.Callable[[typing.Any, dict[str, typing.Any]], typing.Awaitable[None]]
+
+
+class _Group:
+    __slots__ = ("events", "latest", "kwargs", "count", "handle")
+
+    def __init__(self) -> None:
+        self.events: list[typing.Any] = []
+        self.latest: typing.Any = None
+        self.kwargs: dict[str, typing.Any] = {}
+        self.count = 0
+        self.handle: typing.Optional[asyncio.TimerHandle] = None
+
+
+class EventCoalescer:
+    """
+    Collects a listener's events into groups by key and delivers each group once, either
+    as its latest event or as a list of all of them. A group is delivered `window` seconds
+    after its first event, once it has `max_events` events, or when the coalescer closes,
+    whichever comes first.
+
+    :param name: A name for the coalescer, used in logs.
+    :param deliver: Called with the latest event (or the list of events) and the keyword
+        arguments the listener was last called with.
+    :param window: How many seconds to collect a group for, or None to only deliver by size.
+    :param max_events: How many events a group can collect, or None to only deliver by time.
+    :param key: `"guild"`, `"channel"`, `"user"`, or a function that takes the event and
+        returns its key. Events without a key are delivered right away. If None, all events
+        go into one group.
+    :param batch: Deliver a list of the group's events instead of only the latest one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deliver: _Deliver,
+        window: typing.Optional[float] = None,
+        max_events: typing.Optional[int] = None,
+        key: typing.Optional[KeySpec] = None,
+        batch: bool = False,
+    ) -> None:
+        if window is None and max_events is None:
+            raise ValueError(
+                "Coalescing needs a window, a max number of events, or both."
+            )
+        if window is not None and window <= 0:
+            raise ValueError("The coalescing window needs to be greater than 0.")
+        if max_events is not None and max_events < 1:
+            raise ValueError("The max number of events needs to be at least 1.")
+        self.name = name
+        self.deliver = deliver
+        self.window = window
+        self.max_events = max_events
+        self.batch = batch
+        self.key_function: typing.Optional[KeyFunction]
+        if isinstance(key, str):
+            try:
+                self.key_function = KEY_FUNCTIONS[key]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown key {key!r}, expected one of {', '.join(KEY_FUNCTIONS)} or a function."
+                )
+        else:
+            self.key_function = key
+        self.received = 0
+        self.delivered = 0
+        self._groups: dict[typing.Hashable, _Group] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def put(self, event: typing.Any, kwargs: dict[str, typing.Any]) -> None:
+        """Add an event to its group, delivering the group if it's full."""
+        self.received += 1
+        if self.key_function is None:
+            key: typing.Optional[typing.Hashable] = None
+        else:
+            key = self.key_function(event)
+            if key is None:
+                self._deliver([event] if self.batch else event, kwargs)
+                return
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group()
+            if self.window is not None:
+                group.handle = asyncio.get_running_loop().call_later(
+                    self.window, self._flush, key
+                )
+        if self.batch:
+            group.events.append(event)
+        group.latest = event
+        group.kwargs = kwargs
+        group.count += 1
+        if self.max_events is not None and group.count >= self.max_events:
+            self._flush(key)
+
+    def _flush(self, key: typing.Optional[typing.Hashable]) -> None:
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        if group.handle is not None:
+            group.handle.cancel()
+        self._deliver(group.events if self.batch else group.latest, group.kwargs)
+
+    def _deliver(self, payload: typing.Any, kwargs: dict[str, typing.Any]) -> None:
+        self.delivered += 1
+        task = asyncio.create_task(self._run(payload, kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, payload: typing.Any, kwargs: dict[str, typing.Any]) -> None:
+        try:
+            await self.deliver(payload, kwargs)
+        except Exception:
+            logger.exception(f"Listener {self.name} raised an exception.")
+
+    async def close(self) -> None:
+        """Deliver every group that's still collecting and wait for the deliveries to finish."""
+        for key in list(self._groups):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def pending(self) -> int:
+        """The number of groups still collecting events."""
+        return len(self._groups)
+
+    def __repr__(self) -> str:
+        return f"EventCoalescer({self.name}, {self.pending} pending)"
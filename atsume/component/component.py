@@ -3,7 +3,15 @@ import typing
 import hikari
 import tanjun
 
-from atsume.permissions import AbstractComponentPermissions, permission_check
+from atsume.permissions import (
+    ComponentPermissions,
+    add_change_listener,
+    permission_check,
+    remove_change_listener,
+)
+from atsume.component.guilds import GuildsView
+from atsume.component.listener_queue import ListenerQueue
+from atsume.component.metrics import ComponentMetrics
 
 
 class Component(tanjun.Component):
@@ -12,35 +20,47 @@ class Component(tanjun.Component):
     with some features for per-guild permissions.
     """
 
-    permissions: typing.Optional[AbstractComponentPermissions]
+    permissions: typing.Optional[ComponentPermissions]
 
-    def set_permissions(self, permissions: AbstractComponentPermissions) -> None:
+    def __init__(self, *, name: typing.Optional[str] = None, strict: bool = False):
+        super().__init__(name=name, strict=strict)
+        self.permissions = None
+        self._guilds = GuildsView(self)
+        self.listener_queues: list[ListenerQueue] = []
+        """The queues of this component's queued listeners, see :py:func:`atsume.with_listener`."""
+        self.metrics = ComponentMetrics(self.name)
+        """The latency of this component's callbacks, if `COMPONENT_METRICS` is on."""
+        for event_type in GuildsView.EVENT_TYPES:
+            self.add_listener(event_type, self._guilds._on_guild_visibility)
+
+    def set_permissions(self, permissions: ComponentPermissions) -> None:
         """
         Sets the permissions object to be used by this component and adds the check for it.
         """
         self.permissions = permissions
         self.add_check(permission_check(permissions))
+        self._guilds._reset()
 
     @property
-    def guilds(self) -> list[hikari.snowflakes.Snowflake]:
+    def guilds(self) -> GuildsView:
         """
-        A shortcut to `Client.cache.get_guilds_view()`. It's recommended to use this instead of
-        directly using the cache to filter to only the guilds this component is permitted to
-        run in.
+        The guilds from `Client.cache.get_guilds_view()` that this component is permitted to
+        run in. It's recommended to use this instead of directly using the cache. The view is
+        kept up to date as guilds and permissions change, see
+        :py:class:`atsume.component.guilds.GuildsView`.
         """
-        if not self.client:
-            return []
-        if not self.client.cache:
-            return []
-        # Todo: Make this an iterator so it can be computed lazily
-        if self.permissions:
-            return [
-                g
-                for g in self.client.cache.get_guilds_view()
-                if self.permissions.allow_in_guild(g)
-            ]
-        else:
-            return [g for g in self.client.cache.get_guilds_view()]
+        return self._guilds
+
+    def bind_client(self, client: tanjun.abc.Client, /) -> "Component":
+        super().bind_client(client)
+        add_change_listener(self._guilds._on_permissions_changed)
+        return self
+
+    def unbind_client(self, client: tanjun.abc.Client, /) -> "Component":
+        super().unbind_client(client)
+        remove_change_listener(self._guilds._on_permissions_changed)
+        self._guilds._reset()
+        return self
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.name=}, {self.checks=}, {self.hooks=}, {self.slash_hooks=}, {self.message_hooks=})"
@@ -3,13 +3,14 @@ from pathlib import Path
 
 import sqlalchemy
 
+from atsume.component.listener_queue import OverflowPolicy
 from atsume.permissions import import_permission_class
 from atsume.settings import settings
 from atsume.utils import module_to_path
 
 if typing.TYPE_CHECKING:
     from ormar.models.metaclass import ModelMetaclass
-    from atsume.permissions.base import AbstractComponentPermissions
+    from atsume.permissions.base import ComponentPermissions
 
 
 class ComponentConfig:
@@ -17,11 +18,26 @@ class ComponentConfig:
     A dataclass for configuring an Atsume Component. Includes the component name, its permissions,
     and the file and module paths for its commands and models.
     """
+
     name: str
     verbose_name: str
     commands_module_name = "commands"
     models_module_name = "models"
-    permissions: typing.Optional["AbstractComponentPermissions"]
+    permissions: typing.Optional["ComponentPermissions"]
+    database = "default"
+    """
+    The alias of the database this component's models are stored in, from the `DATABASES`
+    setting. The default database is the one set by `DATABASE_URL`.
+    """
+    listener_queue_size = 0
+    """
+    The most events each of this component's listeners can hold in a queue, or 0 to not
+    queue events. Can be overridden per listener with :py:func:`atsume.with_listener`.
+    """
+    listener_queue_workers = 1
+    """The number of events each listener queue handles at the same time."""
+    listener_queue_overflow = OverflowPolicy.DROP_OLDEST
+    """What a listener queue does with new events when it's full."""
 
     def __init__(self, module_path: str) -> None:
         assert self.name is not None
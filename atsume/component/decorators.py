@@ -1,5 +1,8 @@
 import collections
+import collections.abc
+import functools
 import inspect
+import time
 import typing
 from datetime import datetime, timezone, timedelta
 from typing import Callable, Any, Coroutine
@@ -8,10 +11,45 @@ import hikari
 import tanjun
 from tanjun.schedules import TimeSchedule, _CallbackSigT, IntervalSchedule
 
-from atsume.permissions import AbstractComponentPermissions
+from atsume.permissions import (
+    AbstractComponentPermissions,
+    AbstractAsyncComponentPermissions,
+    ComponentPermissions,
+    check_guild,
+    check_dm,
+)
 from atsume.component.component import Component
 from atsume.utils import copy_kwargs
 from atsume.component.context import Context
+from atsume.component.listener_queue import ListenerQueue, OverflowPolicy
+from atsume.component.keyed_executor import KeyedExecutor, KeySpec
+from atsume.component.coalescer import EventCoalescer
+from atsume.component.metrics import CallbackKind, CallbackLatency
+
+
+_ListenerCallbackT = typing.Callable[
+    [hikari.events.base_events.Event], typing.Coroutine[None, None, None]
+]
+
+
+def _timed(
+    invoke: typing.Callable[..., Coroutine[Any, Any, None]], latency: CallbackLatency
+) -> typing.Callable[..., Coroutine[Any, Any, None]]:
+    """Wrap a callback to record how long each call takes in `latency`."""
+    perf_counter = time.perf_counter
+    observe = latency.duration.observe
+
+    async def timed(*args: typing.Any, **kwargs: typing.Any) -> None:
+        start = perf_counter()
+        try:
+            await invoke(*args, **kwargs)
+        except Exception:
+            latency.errors += 1
+            raise
+        finally:
+            observe(perf_counter() - start)
+
+    return timed
 
 
 class BaseCallback:
@@ -19,8 +57,14 @@ class BaseCallback:
     A class wrapper for a Tanjun command or event listener. It forwards the callback's signature
     so Tanjun can parse it, and adds the Component reference if the command has a argument with
     a matching type hint.
+
+    Calls go through an invocation plan, built by :py:meth:`build_plan` once the callback is
+    registered, so each call only does the work that this callback needs.
     """
 
+    metrics_kind: typing.ClassVar[typing.Optional[CallbackKind]] = None
+    """The kind of callback this is in the component's metrics."""
+
     def __init__(
         self,
         callback: _CallbackSigT,
@@ -34,6 +78,10 @@ class BaseCallback:
         ] = None  # The component is set during listener registration
         self._component_parameter_name: typing.Optional[str] = None
         self._should_insert_component()
+        self.latency: typing.Optional[CallbackLatency] = None
+        self._invoke: typing.Callable[..., Coroutine[Any, Any, None]] = self.callback
+        self._plan: typing.Callable[..., Coroutine[Any, Any, None]] = self.callback
+        self.build_plan()
 
     def _should_insert_component(self) -> None:
         """Check the callback signature to see if it wants the component"""
@@ -48,67 +96,233 @@ class BaseCallback:
                 else:
                     self._component_parameter_name = name
 
+    def build_plan(self) -> None:
+        """
+        Build the invocation plan from the callback's current settings. This is called
+        again after the callback's component, permissions, or queue are set.
+        """
+        if self._component_parameter_name:
+            self._invoke = functools.partial(
+                self.callback, **{self._component_parameter_name: self._component}
+            )
+        else:
+            self._invoke = self.callback
+        if self.latency is not None:
+            self._invoke = _timed(self._invoke, self.latency)
+        self._plan = self._invoke
+
     def __call__(
         self, *args: typing.Any, **kwargs: typing.Any
     ) -> Coroutine[Any, Any, None]:
-        if self._component_parameter_name:
-            kwargs[self._component_parameter_name] = self._component
-        return self.callback(*args, **kwargs)
+        return self._plan(*args, **kwargs)
+
+
+async def _skip() -> None:
+    pass
+
+
+# How a type of event or context is checked against the component's permissions
+_CHECK_GUILD = 0
+_CHECK_DM = 1
+_CHECK_NONE = 2
 
 
 class PermissionsCallback(BaseCallback):
     """
     Does a permissions check before the callback is allowed through. This is done since Tanjun's
     Component checks aren't performed on event listeners.
+
+    How an event or context is checked is worked out once for each type and remembered.
     """
 
     def __init__(self, callback: _CallbackSigT):
+        self.permissions: typing.Optional[ComponentPermissions] = None
+        self._check_kinds: dict[type, int] = {}
+        # Set by build_plan when the permissions don't need to await anything
+        self._sync_permissions: AbstractComponentPermissions
         super().__init__(callback)
-        self.permissions: typing.Optional[AbstractComponentPermissions] = None
 
-    def has_permission(self, hikari_obj: typing.Union[hikari.Event, "Context"]) -> bool:
-        if self.permissions:
+    def _check_kind(self, hikari_obj: typing.Any) -> int:
+        kind = self._check_kinds.get(type(hikari_obj))
+        if kind is None:
             if hasattr(hikari_obj, "guild_id"):
-                if hikari_obj.guild_id:
-                    if not self.permissions.allow_in_guild(hikari_obj.guild_id):
-                        return False
+                kind = _CHECK_GUILD
             # IDK if this is correct but if it has these it's still probably a DM event right?
             elif hasattr(hikari_obj, "channel_id"):
-                if not self.permissions.allow_in_dm():
-                    return False
+                kind = _CHECK_DM
+            else:
+                kind = _CHECK_NONE
+            self._check_kinds[type(hikari_obj)] = kind
+        return kind
+
+    async def has_permission(
+        self, hikari_obj: typing.Union[hikari.Event, "Context"]
+    ) -> bool:
+        if self.permissions:
+            kind = self._check_kind(hikari_obj)
+            if kind == _CHECK_GUILD:
+                guild_id = hikari_obj.guild_id  # type: ignore[union-attr]
+                if guild_id:
+                    return await check_guild(self.permissions, guild_id)
+            elif kind == _CHECK_DM:
+                return await check_dm(self.permissions)
         return True
 
-    def __call__(
+    def build_plan(self) -> None:
+        super().build_plan()
+        if not self.permissions:
+            return
+        if isinstance(self.permissions, AbstractAsyncComponentPermissions):
+            self._plan = self._call_checked
+        else:
+            self._sync_permissions = self.permissions
+            self._plan = self._call_checked_sync
+
+    async def _call_checked(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        if await self.has_permission(args[0]):
+            await self._invoke(*args, **kwargs)
+
+    def _call_checked_sync(
         self, *args: typing.Any, **kwargs: typing.Any
     ) -> Coroutine[Any, Any, None]:
-        assert len(args) > 0
-        first = args[0]
-        assert isinstance(first, hikari.Event) or isinstance(first, Context)
-        if not self.has_permission(first):
-            return noop()
-        return super().__call__(*args, **kwargs)
+        # Not a coroutine itself, so an allowed call doesn't pay for an extra one
+        hikari_obj = args[0]
+        kind = self._check_kinds.get(type(hikari_obj))
+        if kind is None:
+            kind = self._check_kind(hikari_obj)
+        if kind == _CHECK_GUILD:
+            guild_id = hikari_obj.guild_id
+            allowed = not guild_id or self._sync_permissions.allow_in_guild(guild_id)
+        elif kind == _CHECK_DM:
+            allowed = self._sync_permissions.allow_in_dm()
+        else:
+            allowed = True
+        if allowed:
+            return self._invoke(*args, **kwargs)
+        return _skip()
 
 
 class AtsumeEventListener(PermissionsCallback):
     """
     A wrapper for an event listener callback that retrieves the desired event type
-    from the function type hints.
+    from the function type hints. If the hint is a list of events, the listener is
+    delivered batches of events instead, which needs coalescing.
+
+    If the listener has a queue, events that pass the permissions check are handed to the
+    queue instead of being handled right away. The queue options left as None are filled
+    in from the component's config when it's loaded.
+
+    If the listener is serialized, events with the same key are handled one at a time. With
+    a queue, the queue does this so the other keys keep its workers busy in the meantime.
+
+    If the listener coalesces, events that pass the permissions check are collected by
+    the coalescer, which hands the latest event (or a batch) on to the queue or callback.
     """
 
-    def __init__(self, callback: _CallbackSigT):
+    metrics_kind = "listener"
+
+    def __init__(
+        self,
+        callback: _CallbackSigT,
+        queue_size: typing.Optional[int] = None,
+        queue_workers: typing.Optional[int] = None,
+        queue_overflow: typing.Optional[OverflowPolicy] = None,
+        serialize_by: typing.Optional[KeySpec] = None,
+        coalesce_window: typing.Optional[float] = None,
+        coalesce_max: typing.Optional[int] = None,
+        coalesce_by: typing.Optional[KeySpec] = None,
+    ):
+        self.queue: typing.Optional[ListenerQueue] = None
+        self.executor: typing.Optional[KeyedExecutor] = None
+        self.coalescer: typing.Optional[EventCoalescer] = None
         super().__init__(callback)
         key = list(self.callable_types.keys())[0]
         self.event_type = self.callable_types[key]
-        if not issubclass(self.event_type, hikari.Event):
+        self.batch = typing.get_origin(self.event_type) in (
+            list,
+            collections.abc.Sequence,
+        )
+        if self.batch:
+            self.event_type = typing.get_args(self.event_type)[0]
+        if not inspect.isclass(self.event_type) or not issubclass(
+            self.event_type, hikari.Event
+        ):
             raise Exception("Event listener argument does not specify an Event type")
+        self.queue_size = queue_size
+        self.queue_workers = queue_workers
+        self.queue_overflow = queue_overflow
+        if serialize_by is not None:
+            self.executor = KeyedExecutor(serialize_by)
+        if coalesce_window is not None or coalesce_max is not None:
+            self.coalescer = EventCoalescer(
+                f"{callback.__module__}.{callback.__qualname__}",
+                self._dispatch,
+                window=coalesce_window,
+                max_events=coalesce_max,
+                key=coalesce_by,
+                batch=self.batch,
+            )
+        elif self.batch:
+            raise Exception(
+                "Event listeners that take a list of events need a coalescing window or max"
+            )
+        self.build_plan()
+
+    def build_plan(self) -> None:
+        super().build_plan()
+        if (
+            self.queue is not None
+            or self.executor is not None
+            or self.coalescer is not None
+        ):
+            self._plan = self._call_staged
+
+    async def _call_staged(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        if not await self.has_permission(args[0]):
+            return
+        if self.coalescer is not None:
+            self.coalescer.put(args[0], kwargs)
+            return
+        await self._dispatch(args[0], kwargs)
+
+    async def _dispatch(
+        self, payload: typing.Any, kwargs: dict[str, typing.Any]
+    ) -> None:
+        """Hand the event (or batch of events) to the executor, queue, or callback."""
+        call = functools.partial(self._invoke, payload, **kwargs)
+        key_event = payload[-1] if self.batch else payload
+        if self.queue is not None:
+            # The queue serializes by key itself, so a worker never waits on a busy key
+            key = (
+                self.executor.key_function(key_event)
+                if self.executor is not None
+                else None
+            )
+            await self.queue.put(call, key)
+        elif self.executor is not None:
+            await self.executor.run(key_event, call)
+        else:
+            await call()
+
+    async def close(self) -> None:
+        """
+        Deliver anything the coalescer is still collecting and wait for the queue to handle
+        it, then stop the queue.
+        """
+        if self.coalescer is not None:
+            await self.coalescer.close()
+            if self.queue is not None:
+                await self.queue.join()
+        if self.queue is not None:
+            await self.queue.close()
 
 
 class AtsumeComponentOpen(BaseCallback):
-    pass
+    metrics_kind = "on_open"
 
 
 class AtsumeComponentClose(BaseCallback):
-    pass
+    metrics_kind = "on_close"
 
 
 class AtsumeTimeSchedule(BaseCallback):
@@ -117,6 +331,8 @@ class AtsumeTimeSchedule(BaseCallback):
     calls the wrapper, which then calls the callback.
     """
 
+    metrics_kind = "schedule"
+
     def __init__(self, callback: _CallbackSigT, schedule_kwargs: typing.Any) -> None:
         super().__init__(callback)
         self.schedule_kwargs = schedule_kwargs
@@ -131,6 +347,8 @@ class AtsumeIntervalSchedule(BaseCallback):
     :py:class:`tanjun.IntervalSchedule` object calls the wrapper, which then calls the callback.
     """
 
+    metrics_kind = "schedule"
+
     def __init__(
         self,
         callback: _CallbackSigT,
@@ -147,20 +365,148 @@ class AtsumeIntervalSchedule(BaseCallback):
         return IntervalSchedule(self, self.interval, **self.schedule_kwargs)
 
 
-async def noop() -> None:
-    pass
+@typing.overload
+def with_listener(callback: _ListenerCallbackT) -> AtsumeEventListener:
+    ...
 
 
+@typing.overload
 def with_listener(
-    callback: typing.Callable[
-        [hikari.events.base_events.Event], typing.Coroutine[None, None, None]
-    ]
-) -> AtsumeEventListener:
+    *,
+    queue_size: typing.Optional[int] = None,
+    queue_workers: typing.Optional[int] = None,
+    queue_overflow: typing.Optional[OverflowPolicy] = None,
+    serialize_by: typing.Optional[KeySpec] = None,
+    coalesce_window: typing.Optional[float] = None,
+    coalesce_max: typing.Optional[int] = None,
+    coalesce_by: typing.Optional[KeySpec] = None,
+) -> typing.Callable[[_ListenerCallbackT], AtsumeEventListener]:
+    ...
+
+
+def with_listener(
+    callback: typing.Optional[_ListenerCallbackT] = None,
+    *,
+    queue_size: typing.Optional[int] = None,
+    queue_workers: typing.Optional[int] = None,
+    queue_overflow: typing.Optional[OverflowPolicy] = None,
+    serialize_by: typing.Optional[KeySpec] = None,
+    coalesce_window: typing.Optional[float] = None,
+    coalesce_max: typing.Optional[int] = None,
+    coalesce_by: typing.Optional[KeySpec] = None,
+) -> typing.Union[
+    AtsumeEventListener, typing.Callable[[_ListenerCallbackT], AtsumeEventListener]
+]:
     """
     Decorator to register a function as an event listener. Callback must
     type hint the first position argument as the desired event type.
+
+    Can be called with options to put the listener behind a bounded queue, which keeps a
+    flood of events from starting an unbounded number of tasks. Options that aren't given
+    default to the component config's `listener_queue_*` attributes.
+
+    It can also be serialized by a key, so events for the same guild (or user, or anything
+    else) are handled one at a time while events for different keys still run in parallel.
+
+    Bursty events can be coalesced, collecting events by key over a window (or up to a max
+    number of events) and only calling the listener with the latest one. If the listener's
+    argument is hinted as a list of events, it's called with all of them instead.
+
+    .. code-block:: python
+
+        @atsume.with_listener(coalesce_window=5, coalesce_by="user")
+        async def on_presence(event: hikari.PresenceUpdateEvent) -> None:
+            ...
+
+    .. code-block:: python
+
+        @atsume.with_listener(queue_size=1000, queue_workers=4, queue_overflow="drop_oldest")
+        async def on_message(event: hikari.MessageCreateEvent) -> None:
+            ...
+
+    :param queue_size: The most events to hold in the queue, 0 to not use a queue.
+    :param queue_workers: The number of events to handle at the same time.
+    :param queue_overflow: What to do with events that arrive when the queue is full.
+    :param serialize_by: `"guild"`, `"channel"`, `"user"`, or a function that takes the
+        event and returns the key to serialize on.
+    :param coalesce_window: How many seconds to collect events for before calling the listener.
+    :param coalesce_max: The most events to collect before calling the listener.
+    :param coalesce_by: `"guild"`, `"channel"`, `"user"`, or a function that takes the
+        event and returns the key to collect it under. Defaults to collecting all events
+        together.
     """
-    return AtsumeEventListener(callback)
+
+    def wrapper(callback: _ListenerCallbackT) -> AtsumeEventListener:
+        return AtsumeEventListener(
+            callback,
+            queue_size=queue_size,
+            queue_workers=queue_workers,
+            queue_overflow=(
+                OverflowPolicy(queue_overflow) if queue_overflow is not None else None
+            ),
+            serialize_by=serialize_by,
+            coalesce_window=coalesce_window,
+            coalesce_max=coalesce_max,
+            coalesce_by=coalesce_by,
+        )
+
+    if callback is not None:
+        return wrapper(callback)
+    return wrapper
+
+
+def with_batch_listener(
+    *,
+    max_size: int = 100,
+    max_wait: typing.Optional[float] = 1.0,
+    batch_by: typing.Optional[KeySpec] = None,
+    queue_size: typing.Optional[int] = None,
+    queue_workers: typing.Optional[int] = None,
+    queue_overflow: typing.Optional[OverflowPolicy] = None,
+) -> typing.Callable[[_ListenerCallbackT], AtsumeEventListener]:
+    """
+    Decorator to register a function as an event listener that gets events in batches.
+    Callback must type hint the first position argument as a list of the desired event type.
+
+    A batch is delivered once it has `max_size` events, `max_wait` seconds after its first
+    event, or when the component closes. Events are filtered by the component's permissions
+    before they're added to a batch.
+
+    .. code-block:: python
+
+        @atsume.with_batch_listener(max_size=500, max_wait=5)
+        async def log_messages(events: list[hikari.MessageCreateEvent]) -> None:
+            await MessageLog.objects.bulk_create([...])
+
+    :param max_size: The most events in a batch.
+    :param max_wait: The most seconds to wait for a batch to fill, or None to only deliver
+        full batches (and whatever is left on close).
+    :param batch_by: `"guild"`, `"channel"`, `"user"`, or a function that takes the event
+        and returns a key, to keep a separate batch per key.
+    :param queue_size: The most batches to hold in the queue, 0 to not use a queue.
+    :param queue_workers: The number of batches to handle at the same time.
+    :param queue_overflow: What to do with batches that arrive when the queue is full.
+    """
+
+    def wrapper(callback: _ListenerCallbackT) -> AtsumeEventListener:
+        listener = AtsumeEventListener(
+            callback,
+            queue_size=queue_size,
+            queue_workers=queue_workers,
+            queue_overflow=(
+                OverflowPolicy(queue_overflow) if queue_overflow is not None else None
+            ),
+            coalesce_window=max_wait,
+            coalesce_max=max_size,
+            coalesce_by=batch_by,
+        )
+        if not listener.batch:
+            raise Exception(
+                "Batch listener argument needs to be a list of an Event type"
+            )
+        return listener
+
+    return wrapper
 
 
 def on_open(callback: _CallbackSigT) -> AtsumeComponentOpen:
@@ -0,0 +1,137 @@
+import asyncio
+import collections.abc
+import typing
+
+import hikari
+
+from atsume.permissions import AbstractAsyncComponentPermissions
+
+if typing.TYPE_CHECKING:
+    from atsume.component.component import Component
+
+
+class GuildsView(collections.abc.Set[hikari.Snowflake]):
+    """
+    The IDs of the guilds a component is allowed to run in, out of the guilds the bot is in.
+
+    The view is built from the client's cache the first time it's used, and then kept up to
+    date as the bot joins and leaves guilds and as permissions change, so checking a guild
+    or getting the count doesn't copy anything or check permissions again. Iterating
+    directly over the view while the bot joins or leaves a guild will raise an error, so
+    take a copy with `list()` if the loop awaits anything.
+
+    Without a cache, the view only knows the guilds the bot joins or sees become available
+    after it was first used.
+
+    With asynchronous permissions, guilds are checked in the background and appear in the
+    view once their check finishes.
+    """
+
+    EVENT_TYPES: typing.Final = (
+        hikari.GuildAvailableEvent,
+        hikari.GuildJoinEvent,
+        hikari.GuildLeaveEvent,
+    )
+    """The events the view is updated from."""
+
+    def __init__(self, component: "Component") -> None:
+        self._component = component
+        # Every guild the bot is in, and the ones the component is allowed in
+        self._known: set[hikari.Snowflake] = set()
+        self._allowed: set[hikari.Snowflake] = set()
+        self._built = False
+        self._background_tasks: set[asyncio.Task[None]] = set()
+
+    def _ensure_built(self) -> None:
+        if self._built:
+            return
+        client = self._component.client
+        if not client:
+            return
+        self._built = True
+        if client.cache:
+            self._known.update(client.cache.get_guilds_view())
+        self._recheck_all()
+
+    def _recheck_all(self) -> None:
+        permissions = self._component.permissions
+        if permissions is None:
+            self._allowed = set(self._known)
+        elif isinstance(permissions, AbstractAsyncComponentPermissions):
+            self._spawn(self._recheck_all_async(permissions))
+        else:
+            self._allowed = {g for g in self._known if permissions.allow_in_guild(g)}
+
+    async def _recheck_all_async(
+        self, permissions: AbstractAsyncComponentPermissions
+    ) -> None:
+        for guild_id in list(self._known):
+            await self._recheck_async(permissions, guild_id)
+
+    def _recheck(self, guild_id: hikari.Snowflake) -> None:
+        permissions = self._component.permissions
+        if guild_id not in self._known:
+            self._allowed.discard(guild_id)
+        elif permissions is None:
+            self._allowed.add(guild_id)
+        elif isinstance(permissions, AbstractAsyncComponentPermissions):
+            self._spawn(self._recheck_async(permissions, guild_id))
+        elif permissions.allow_in_guild(guild_id):
+            self._allowed.add(guild_id)
+        else:
+            self._allowed.discard(guild_id)
+
+    async def _recheck_async(
+        self, permissions: AbstractAsyncComponentPermissions, guild_id: hikari.Snowflake
+    ) -> None:
+        allowed = await permissions.allow_in_guild(guild_id)
+        # The bot may have left the guild while the check ran
+        if allowed and guild_id in self._known:
+            self._allowed.add(guild_id)
+        else:
+            self._allowed.discard(guild_id)
+
+    def _spawn(self, coro: typing.Coroutine[typing.Any, typing.Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _reset(self) -> None:
+        """Forget everything, the view is rebuilt from the cache the next time it's used."""
+        self._built = False
+        self._known.clear()
+        self._allowed.clear()
+
+    def _on_permissions_changed(self, guild_id: typing.Optional[int]) -> None:
+        if not self._built:
+            return
+        if guild_id is None:
+            self._recheck_all()
+        else:
+            self._recheck(hikari.Snowflake(guild_id))
+
+    async def _on_guild_visibility(self, event: hikari.GuildVisibilityEvent, /) -> None:
+        # Views that haven't been used yet get every guild from the cache once they are
+        if not self._built:
+            return
+        if isinstance(event, hikari.GuildLeaveEvent):
+            self._known.discard(event.guild_id)
+            self._allowed.discard(event.guild_id)
+        elif event.guild_id not in self._known:
+            self._known.add(event.guild_id)
+            self._recheck(event.guild_id)
+
+    def __contains__(self, guild_id: object) -> bool:
+        self._ensure_built()
+        return guild_id in self._allowed
+
+    def __iter__(self) -> typing.Iterator[hikari.Snowflake]:
+        self._ensure_built()
+        return iter(self._allowed)
+
+    def __len__(self) -> int:
+        self._ensure_built()
+        return len(self._allowed)
+
+    def __repr__(self) -> str:
+        return f"GuildsView({len(self)} guilds)"
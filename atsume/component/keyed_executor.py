@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import typing
+
+T = typing.TypeVar("T")
+_CallbackT = typing.TypeVar(
+    "_CallbackT",
+    bound=typing.Callable[..., typing.Coroutine[typing.Any, typing.Any, typing.Any]],
+)
+
+KeyFunction = typing.Callable[[typing.Any], typing.Optional[typing.Hashable]]
+"""Gets the key to serialize on from an event or command context."""
+KeySpec = typing.Union[str, KeyFunction]
+"""Either the name of a built-in key function or a key function."""
+
+
+def _guild_key(obj: typing.Any) -> typing.Optional[typing.Hashable]:
+    return typing.cast(typing.Optional[typing.Hashable], getattr(obj, "guild_id", None))
+
+
+def _channel_key(obj: typing.Any) -> typing.Optional[typing.Hashable]:
+    return typing.cast(
+        typing.Optional[typing.Hashable], getattr(obj, "channel_id", None)
+    )
+
+
+def _user_key(obj: typing.Any) -> typing.Optional[typing.Hashable]:
+    for attribute in ("user_id", "author_id"):
+        user_id = getattr(obj, attribute, None)
+        if user_id is not None:
+            return typing.cast(typing.Hashable, user_id)
+    for attribute in ("author", "user"):
+        user = getattr(obj, attribute, None)
+        if user is not None:
+            return typing.cast(typing.Hashable, user.id)
+    return None
+
+
+KEY_FUNCTIONS: dict[str, KeyFunction] = {
+    "guild": _guild_key,
+    "channel": _channel_key,
+    "user": _user_key,
+}
+"""The built-in key functions, by name."""
+
+
+class _KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        # The number of calls holding or waiting on the lock
+        self.users = 0
+
+
+class KeyedExecutor:
+    """
+    Runs calls one at a time for each key, while calls for different keys run in parallel.
+    The key comes from the call's event or command context, like its guild or user. A key's
+    lock only exists while a call for it is running or waiting, so memory only grows with
+    the number of keys that are busy at once. Calls without a key aren't serialized.
+
+    :param key: `"guild"`, `"channel"`, `"user"`, or a function that takes the event or
+        context and returns the key.
+    """
+
+    def __init__(self, key: KeySpec) -> None:
+        if isinstance(key, str):
+            try:
+                key = KEY_FUNCTIONS[key]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown key {key!r}, expected one of {', '.join(KEY_FUNCTIONS)} or a function."
+                )
+        self.key_function: KeyFunction = key
+        self._locks: dict[typing.Hashable, _KeyLock] = {}
+
+    async def run(
+        self,
+        obj: typing.Any,
+        call: typing.Callable[[], typing.Awaitable[T]],
+    ) -> T:
+        """
+        Run a call once no other call with the same key is running.
+
+        :param obj: The event or context to get the key from.
+        :param call: The function to call.
+        """
+        key = self.key_function(obj)
+        if key is None:
+            return await call()
+        key_lock = self._locks.get(key)
+        if key_lock is None:
+            key_lock = self._locks[key] = _KeyLock()
+        key_lock.users += 1
+        try:
+            async with key_lock.lock:
+                return await call()
+        finally:
+            key_lock.users -= 1
+            if not key_lock.users:
+                del self._locks[key]
+
+    def __len__(self) -> int:
+        """The number of keys with a call running or waiting."""
+        return len(self._locks)
+
+
+def serialized(key: KeySpec) -> typing.Callable[[_CallbackT], _CallbackT]:
+    """
+    Decorator to run a command (or any callback that takes an event or context first) one
+    call at a time per key. Put it under Tanjun's command decorators.
+
+    .. code-block:: python
+
+        @tanjun.as_slash_command("hi", "The bot says hi.")
+        @atsume.serialized("user")
+        async def hello(ctx: atsume.Context) -> None:
+            ...
+
+    :param key: `"guild"`, `"channel"`, `"user"`, or a function that takes the event or
+        context and returns the key.
+    """
+    executor = KeyedExecutor(key)
+
+    def decorator(callback: _CallbackT) -> _CallbackT:
+        @functools.wraps(callback)
+        async def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            return await executor.run(
+                args[0] if args else None, functools.partial(callback, *args, **kwargs)
+            )
+
+        wrapper.executor = executor  # type: ignore[attr-defined]
+        return typing.cast(_CallbackT, wrapper)
+
+    return decorator
@@ -0,0 +1,222 @@
+import asyncio
+import collections
+import enum
+import logging
+import time
+import typing
+
+from atsume.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, enum.Enum):
+    """What a listener queue does with a new event when it's full."""
+
+    DROP_OLDEST = "drop_oldest"
+    """Drop the event that has been waiting the longest to make room."""
+    DROP_NEWEST = "drop_newest"
+    """Drop the new event."""
+    BLOCK = "block"
+    """Wait for room in the queue. The waiting events are held outside of the queue."""
+
+
+class ListenerQueueMetrics:
+    """
+    Metrics about a :py:class:`ListenerQueue`. Wait time is how many seconds an event spent in
+    the queue, and duration is how many seconds the listener took to handle it.
+    """
+
+    def __init__(self, queue: "ListenerQueue") -> None:
+        self._queue = queue
+        self.enqueued = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.wait_time = Histogram()
+        self.duration = Histogram()
+
+    @property
+    def depth(self) -> int:
+        """The number of events waiting in the queue."""
+        return len(self._queue._pending)
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "errors": self.errors,
+            "wait_time": self.wait_time.snapshot(),
+            "duration": self.duration.snapshot(),
+        }
+
+
+_QueuedCall = tuple[typing.Hashable, float, typing.Callable[[], typing.Awaitable[None]]]
+
+
+class ListenerQueue:
+    """
+    Puts an event listener behind a bounded queue, handled by a fixed number of workers.
+    Instead of every event starting its own task as soon as it arrives, at most `max_size`
+    events wait in the queue and at most `workers` of them are handled at once.
+
+    Events can be given a key, like their guild, to handle the events with the same key one
+    at a time and in order. Workers take turns between the keys with events waiting, so a
+    busy key doesn't hold up the others, and an event never takes up a worker while it waits
+    for the one before it.
+
+    :param name: A name for the queue, used in logs.
+    :param max_size: The most events to hold in the queue.
+    :param workers: The number of events to handle at the same time.
+    :param overflow: What to do with events that arrive when the queue is full.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        workers: int = 1,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("Listener queues need to hold at least one event.")
+        if workers < 1:
+            raise ValueError("Listener queues need at least one worker.")
+        self.name = name
+        self.max_size = max_size
+        self.workers = workers
+        self.overflow = OverflowPolicy(overflow)
+        self.metrics = ListenerQueueMetrics(self)
+        # Every waiting event by its sequence number, oldest first
+        self._pending: collections.OrderedDict[
+            int, _QueuedCall
+        ] = collections.OrderedDict()
+        # The waiting events of each key that is waiting for a worker or being handled
+        self._keys: dict[typing.Hashable, collections.deque[int]] = {}
+        # The keys waiting for a worker, None until the first event
+        self._ready: typing.Optional[asyncio.Queue[typing.Hashable]] = None
+        self._room: typing.Optional[asyncio.Semaphore] = None
+        self._sequence = 0
+        self._worker_tasks: list[asyncio.Task[None]] = []
+
+    def _start(self) -> tuple["asyncio.Queue[typing.Hashable]", asyncio.Semaphore]:
+        # Started on the first event, so the queue belongs to the running event loop
+        ready: asyncio.Queue[typing.Hashable] = asyncio.Queue()
+        room = asyncio.Semaphore(self.max_size)
+        self._ready = ready
+        self._room = room
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(ready)) for _ in range(self.workers)
+        ]
+        return ready, room
+
+    async def put(
+        self,
+        call: typing.Callable[[], typing.Awaitable[None]],
+        key: typing.Optional[typing.Hashable] = None,
+    ) -> None:
+        """
+        Queue a call to the listener, following the overflow policy if the queue is full.
+
+        :param call: The call to make.
+        :param key: Calls with the same key are made one at a time, in the order they were
+            queued. None to make the call whenever a worker is free.
+        """
+        if self._ready is None or self._room is None:
+            ready, room = self._start()
+        else:
+            ready, room = self._ready, self._room
+        if room.locked():
+            if self.overflow == OverflowPolicy.DROP_NEWEST:
+                self._dropped()
+                return
+            if self.overflow == OverflowPolicy.DROP_OLDEST:
+                self._take(next(iter(self._pending)))
+                self._dropped()
+        await room.acquire()
+        if key is None:
+            # A key of its own, so it doesn't wait on any other call
+            key = object()
+        sequence = self._sequence
+        self._sequence += 1
+        self._pending[sequence] = (key, time.perf_counter(), call)
+        waiting = self._keys.get(key)
+        if waiting is None:
+            self._keys[key] = collections.deque((sequence,))
+            ready.put_nowait(key)
+        else:
+            # The key is already waiting for a worker or being handled
+            waiting.append(sequence)
+        metrics = self.metrics
+        metrics.enqueued += 1
+        depth = len(self._pending)
+        if depth > metrics.max_depth:
+            metrics.max_depth = depth
+
+    def _take(self, sequence: int) -> _QueuedCall:
+        """Remove a waiting event, which is always the oldest one for its key."""
+        item = self._pending.pop(sequence)
+        self._keys[item[0]].popleft()
+        if self._room is not None:
+            self._room.release()
+        return item
+
+    def _dropped(self) -> None:
+        self.metrics.dropped += 1
+        # Only log the first drop of every hundred so a storm doesn't flood the logs too
+        if self.metrics.dropped % 100 == 1:
+            logger.warning(
+                f"Listener queue {self.name} is full, {self.metrics.dropped} events dropped so far."
+            )
+
+    async def _worker(self, ready: "asyncio.Queue[typing.Hashable]") -> None:
+        metrics = self.metrics
+        while True:
+            key = await ready.get()
+            waiting = self._keys[key]
+            if not waiting:
+                # Its events were dropped while it waited
+                del self._keys[key]
+                ready.task_done()
+                continue
+            _, enqueued_at, call = self._take(waiting[0])
+            start = time.perf_counter()
+            metrics.wait_time.observe(start - enqueued_at)
+            try:
+                await call()
+            except Exception:
+                metrics.errors += 1
+                logger.exception(f"Listener {self.name} raised an exception.")
+            finally:
+                metrics.processed += 1
+                metrics.duration.observe(time.perf_counter() - start)
+                if waiting:
+                    # Back of the line, so the other keys get a turn
+                    ready.put_nowait(key)
+                else:
+                    del self._keys[key]
+                ready.task_done()
+
+    async def join(self) -> None:
+        """Wait until every event in the queue has been handled."""
+        if self._ready is not None:
+            await self._ready.join()
+
+    async def close(self) -> None:
+        """Stop the workers, dropping any events still in the queue."""
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._worker_tasks:
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._ready = None
+        self._room = None
+        self._pending.clear()
+        self._keys.clear()
+
+    def __repr__(self) -> str:
+        return f"ListenerQueue({self.name}, {self.metrics.depth}/{self.max_size})"
@@ -0,0 +1,127 @@
+import time
+import typing
+
+import tanjun
+
+from atsume.metrics import Histogram, PrometheusWriter
+
+CallbackKind = typing.Literal["command", "listener", "schedule", "on_open", "on_close"]
+
+
+class CallbackLatency:
+    """How many times a callback ran, how many of those failed, and how long they took."""
+
+    __slots__ = ("errors", "duration")
+
+    def __init__(self) -> None:
+        self.errors = 0
+        self.duration = Histogram()
+
+    @property
+    def calls(self) -> int:
+        return self.duration.count
+
+    def observe(self, duration: float, error: bool = False) -> None:
+        if error:
+            self.errors += 1
+        self.duration.observe(duration)
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "duration": self.duration.snapshot(),
+        }
+
+
+def _callback_name(callback: typing.Any) -> str:
+    # Atsume's callback wrappers keep the function as `callback`
+    while not hasattr(callback, "__qualname__") and hasattr(callback, "callback"):
+        callback = callback.callback
+    return typing.cast(str, getattr(callback, "__qualname__", repr(callback)))
+
+
+class ComponentMetrics:
+    """
+    The latency of every command, listener, schedule, and open and close callback in a
+    component, keyed by the kind of callback and its name.
+
+    :param component_name: The name of the component, used as a label when exported.
+    """
+
+    def __init__(self, component_name: str) -> None:
+        self.component_name = component_name
+        self.callbacks: dict[tuple[CallbackKind, str], CallbackLatency] = {}
+        # Commands that have started, by context
+        self._command_starts: dict[int, float] = {}
+
+    def callback(self, kind: CallbackKind, callback: typing.Any) -> CallbackLatency:
+        """Get the latency of a callback, creating it if this is the first time it's seen."""
+        key = (kind, _callback_name(callback))
+        latency = self.callbacks.get(key)
+        if latency is None:
+            latency = self.callbacks[key] = CallbackLatency()
+        return latency
+
+    def hooks(self) -> tanjun.AnyHooks:
+        """Tanjun hooks that record the latency of the component's commands."""
+        hooks = tanjun.AnyHooks()
+        hooks.add_pre_execution(self._on_command_start)
+        hooks.add_on_error(self._on_command_error)
+        hooks.add_post_execution(self._on_command_end)
+        return hooks
+
+    async def _on_command_start(self, ctx: tanjun.abc.Context) -> None:
+        self._command_starts[id(ctx)] = time.perf_counter()
+
+    async def _on_command_error(
+        self, ctx: tanjun.abc.Context, error: Exception
+    ) -> typing.Optional[bool]:
+        # Post execution hooks don't run when the error is raised, so this is recorded here
+        self._command_finished(ctx, error=True)
+        return None
+
+    async def _on_command_end(self, ctx: tanjun.abc.Context) -> None:
+        self._command_finished(ctx)
+
+    def _command_finished(self, ctx: tanjun.abc.Context, error: bool = False) -> None:
+        start = self._command_starts.pop(id(ctx), None)
+        if start is None or ctx.command is None:
+            return
+        callback = getattr(ctx.command, "callback", ctx.command)
+        self.callback("command", callback).observe(time.perf_counter() - start, error)
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            f"{kind}:{name}": latency.snapshot()
+            for (kind, name), latency in self.callbacks.items()
+        }
+
+
+def write_component_metrics(
+    writer: PrometheusWriter, metrics: typing.Iterable[ComponentMetrics]
+) -> None:
+    """Write the latency of every callback in the given components."""
+    samples = [
+        (
+            {"component": component.component_name, "kind": kind, "callback": name},
+            latency,
+        )
+        for component in metrics
+        for (kind, name), latency in component.callbacks.items()
+    ]
+    writer.counter(
+        "atsume_callback_calls_total",
+        "Times a component callback has run.",
+        ((labels, latency.calls) for labels, latency in samples),
+    )
+    writer.counter(
+        "atsume_callback_errors_total",
+        "Times a component callback has raised an error.",
+        ((labels, latency.errors) for labels, latency in samples),
+    )
+    writer.histogram(
+        "atsume_callback_duration_seconds",
+        "How long component callbacks take to run.",
+        ((labels, latency.duration) for labels, latency in samples),
+    )
@@ -1,3 +1,4 @@
 from atsume.db.models import Model
+from atsume.db.routing import use_primary
 
-__all__ = ["Model"]
+__all__ = ["Model", "use_primary"]
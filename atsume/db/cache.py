@@ -0,0 +1,271 @@
+"""
+An opt-in cache of model rows by primary key, so looking up a model by its primary key
+doesn't need a trip to the database when it hasn't changed.
+"""
+
+import collections
+import time
+import typing
+import weakref
+
+from ormar.queryset import QuerySet
+
+from atsume.db.routing import ReplicatedDatabase
+from atsume.metrics import PrometheusWriter
+
+if typing.TYPE_CHECKING:
+    from atsume.db.models import Model
+
+T = typing.TypeVar("T", bound="Model")
+
+Row = dict[str, typing.Any]
+
+_caches: "weakref.WeakSet[ModelCache]" = weakref.WeakSet()
+
+
+class ModelCacheMetrics:
+    """How well a :py:class:`ModelCache` is doing."""
+
+    __slots__ = ("hits", "misses", "evictions", "expirations", "invalidations")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class ModelCache:
+    """
+    A cache of a model's rows by primary key, declared on the model's
+    :py:class:`atsume.db.models.AtsumeConfig`.
+
+    `Model.objects.get(pk=...)` (or with the primary key's field name, which also covers
+    `get_or_none` and `get_or_create`) is answered from the cache when it can be, and the
+    result is stored when it can't. Saving, updating, upserting and deleting through the
+    model keeps the cache up to date. Updates made some other way, like raw queries or
+    another process, aren't seen until the entry expires.
+
+    Every lookup builds a new model instance, so changing a model doesn't change what's
+    cached until it's saved.
+
+    :param max_size: The most rows to keep. The least recently used row is dropped to make
+        room for a new one, so this also caps the memory the cache uses.
+    :param ttl: Seconds a row is kept before it's looked up again, or `None` to keep rows
+        until they're dropped.
+    """
+
+    def __init__(
+        self, max_size: int = 1024, ttl: typing.Optional[float] = None
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("A model cache needs to hold at least 1 row.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = ""
+        self.metrics = ModelCacheMetrics()
+        self._rows: collections.OrderedDict[
+            typing.Any, tuple[float, Row]
+        ] = collections.OrderedDict()
+        # Changes whenever a row is written, so a lookup that raced a write doesn't
+        # store what it read
+        self.epoch = 0
+
+    def bind(self, name: str) -> None:
+        self.name = name
+        _caches.add(self)
+
+    def get(self, pk: typing.Any) -> typing.Optional[Row]:
+        """Get a row by its primary key, counting a hit or a miss."""
+        entry = self._rows.get(pk)
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+        expires, row = entry
+        if expires and expires < time.monotonic():
+            del self._rows[pk]
+            self.metrics.expirations += 1
+            self.metrics.misses += 1
+            return None
+        self._rows.move_to_end(pk)
+        self.metrics.hits += 1
+        return row
+
+    def put(self, pk: typing.Any, row: Row, epoch: typing.Optional[int] = None) -> None:
+        """
+        Store a row. If `epoch` is given, the row is only stored if nothing has been
+        written since the epoch was read.
+        """
+        if epoch is not None and epoch != self.epoch:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._rows[pk] = (expires, row)
+        self._rows.move_to_end(pk)
+        while len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+            self.metrics.evictions += 1
+
+    def write(self, pk: typing.Any, row: Row) -> None:
+        """Store a row that was just written to the database."""
+        self.epoch += 1
+        self.put(pk, row)
+
+    def invalidate(self, pk: typing.Any) -> None:
+        """Drop a row."""
+        self.epoch += 1
+        if self._rows.pop(pk, None) is not None:
+            self.metrics.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every row."""
+        self.epoch += 1
+        self.metrics.invalidations += len(self._rows)
+        self._rows.clear()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+def _usable_cache(
+    model: typing.Union["Model", type["Model"]]
+) -> typing.Optional[ModelCache]:
+    cache = getattr(model, "atsume_config").cache
+    if cache is None:
+        return None
+    database = model.ormar_config.database
+    # Uncommitted rows can't be shared, so transactions skip the cache
+    if isinstance(database, ReplicatedDatabase) and database.in_transaction():
+        return None
+    return typing.cast(ModelCache, cache)
+
+
+def model_row(model: "Model") -> Row:
+    """The row a model is stored as, in the same shape as it's read from the database."""
+    return model.translate_columns_to_aliases(model._extract_model_db_fields())
+
+
+def model_written(model: "Model") -> None:
+    """Update the cache with a model that was just saved."""
+    cache = getattr(model, "atsume_config").cache
+    if cache is None:
+        return
+    if _usable_cache(model) is None:
+        cache.invalidate(model.pk)
+    else:
+        cache.write(model.pk, model_row(model))
+
+
+def model_invalidated(model: "Model") -> None:
+    """Drop a model from the cache, like after it's deleted."""
+    cache = getattr(model, "atsume_config").cache
+    if cache is not None:
+        cache.invalidate(model.pk)
+
+
+class CachedQuerySet(QuerySet[T]):
+    """
+    The queryset used by models with a :py:class:`ModelCache`. Lookups by primary key go
+    through the cache, and updates and deletes through the queryset clear it.
+    """
+
+    def _cached_pk(
+        self, args: tuple[typing.Any, ...], kwargs: dict[str, typing.Any]
+    ) -> typing.Any:
+        if args or len(kwargs) != 1:
+            return None
+        if (
+            self.filter_clauses
+            or self.exclude_clauses
+            or self._select_related
+            or self._prefetch_related
+            or self.proxy_source_model is not None
+            or self._excludable.items
+        ):
+            return None
+        key, value = next(iter(kwargs.items()))
+        if key != "pk" and key != self.model_config.pkname:
+            return None
+        return value
+
+    async def get(self, *args: typing.Any, **kwargs: typing.Any) -> T:
+        pk = self._cached_pk(args, kwargs)
+        cache = _usable_cache(self.model) if pk is not None else None
+        if cache is None:
+            return await super().get(*args, **kwargs)
+        row = cache.get(pk)
+        if row is not None:
+            model = self.model.from_row(
+                row=typing.cast(typing.Any, row), source_model=self.model
+            )
+            return typing.cast(T, model)
+        epoch = cache.epoch
+        model = await super().get(*args, **kwargs)
+        cache.put(pk, model_row(model), epoch)
+        return model
+
+    async def update(self, each: bool = False, **kwargs: typing.Any) -> int:
+        try:
+            return await super().update(each, **kwargs)
+        finally:
+            self._clear_cache()
+
+    async def delete(
+        self, *args: typing.Any, each: bool = False, **kwargs: typing.Any
+    ) -> int:
+        try:
+            return await super().delete(*args, each=each, **kwargs)
+        finally:
+            self._clear_cache()
+
+    async def bulk_update(
+        self, objects: list[T], columns: typing.Optional[list[str]] = None
+    ) -> None:
+        try:
+            await super().bulk_update(objects, columns)
+        finally:
+            self._clear_cache()
+
+    def _clear_cache(self) -> None:
+        cache = getattr(self.model, "atsume_config").cache
+        if cache is not None:
+            cache.clear()
+
+
+def write_cache_metrics(writer: PrometheusWriter) -> None:
+    """Write the metrics of every model cache."""
+    caches = [({"model": cache.name}, cache) for cache in _caches]
+    writer.counter(
+        "atsume_model_cache_hits_total",
+        "Primary key lookups answered from a model cache.",
+        ((labels, cache.metrics.hits) for labels, cache in caches),
+    )
+    writer.counter(
+        "atsume_model_cache_misses_total",
+        "Primary key lookups that went to the database.",
+        ((labels, cache.metrics.misses) for labels, cache in caches),
+    )
+    writer.counter(
+        "atsume_model_cache_evictions_total",
+        "Rows dropped from a model cache to make room.",
+        ((labels, cache.metrics.evictions) for labels, cache in caches),
+    )
+    writer.gauge(
+        "atsume_model_cache_size",
+        "Rows in a model cache.",
+        ((labels, len(cache)) for labels, cache in caches),
+    )
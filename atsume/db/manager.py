@@ -3,21 +3,121 @@ import typing
 
 import alluka
 import tanjun
-import databases
 import sqlalchemy
+from atsume.db.cache import write_cache_metrics
+from atsume.db.pool import PooledDatabase, pool_options, write_pool_metrics
+from atsume.db.routing import ReplicatedDatabase
+from atsume.db.write_behind import flush_write_behind
+from atsume.metrics import PrometheusWriter, add_collector, remove_collector
 from atsume.settings import settings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DATABASE = "default"
+"""The alias of the database configured by the `DATABASE_` settings."""
+
+
+def get_database_settings(alias: str = DEFAULT_DATABASE) -> dict[str, typing.Any]:
+    """
+    Get the settings of a database alias from the `DATABASES` setting, as a dictionary of
+    the `DATABASE_` settings without their prefix. Settings an alias doesn't give fall back
+    to the `DATABASE_` settings, except for replicas. A `"default"` entry changes the
+    default database's `DATABASE_` settings.
+    """
+    defaults = {
+        "URL": settings.DATABASE_URL,
+        "REPLICA_URLS": settings.DATABASE_REPLICA_URLS,
+        "POOL_MIN_SIZE": settings.DATABASE_POOL_MIN_SIZE,
+        "POOL_MAX_SIZE": settings.DATABASE_POOL_MAX_SIZE,
+        "POOL_ACQUIRE_TIMEOUT": settings.DATABASE_POOL_ACQUIRE_TIMEOUT,
+        "POOL_MAX_LIFETIME": settings.DATABASE_POOL_MAX_LIFETIME,
+        "POOL_MAX_IDLE": settings.DATABASE_POOL_MAX_IDLE,
+    }
+    configured = settings.DATABASES.get(alias)
+    if configured is None:
+        if alias == DEFAULT_DATABASE:
+            return defaults
+        raise ValueError(
+            f"There is no database named {alias} in the DATABASES setting."
+        )
+    if isinstance(configured, str):
+        configured = {"URL": configured}
+    if alias == DEFAULT_DATABASE:
+        return {**defaults, **configured}
+    if "URL" not in configured:
+        raise ValueError(f"The {alias} database in the DATABASES setting needs a URL.")
+    # Replicas belong to one database, so they aren't shared with the default
+    return {**defaults, "REPLICA_URLS": [], **configured}
+
+
+def _pool_settings(url: str, config: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    return {
+        "acquire_timeout": config["POOL_ACQUIRE_TIMEOUT"],
+        "max_lifetime": config["POOL_MAX_LIFETIME"],
+        **pool_options(
+            url,
+            min_size=config["POOL_MIN_SIZE"],
+            max_size=config["POOL_MAX_SIZE"],
+            max_idle=config["POOL_MAX_IDLE"],
+        ),
+    }
+
 
 class DatabaseManager:
-    """A singleton to manage the database connection."""
+    """A singleton to manage the database connections."""
+
     def __init__(self) -> None:
-        self.database: typing.Optional[databases.Database] = None
-        self.engine: typing.Optional[sqlalchemy.engine.Engine] = None
+        self.databases: dict[str, ReplicatedDatabase] = {}
+        self._engines: dict[str, sqlalchemy.engine.Engine] = {}
+
+    @property
+    def database(self) -> typing.Optional[ReplicatedDatabase]:
+        """The default database."""
+        return self.databases.get(DEFAULT_DATABASE)
 
     def _create_database(self) -> None:
-        self.database = databases.Database(settings.DATABASE_URL)
+        for alias in dict.fromkeys([DEFAULT_DATABASE, *settings.DATABASES.keys()]):
+            config = get_database_settings(alias)
+            replicas = [
+                PooledDatabase(url, **_pool_settings(url, config))
+                for url in config["REPLICA_URLS"]
+            ]
+            self.databases[alias] = ReplicatedDatabase(
+                config["URL"],
+                replicas=replicas,
+                **_pool_settings(config["URL"], config),
+            )
+
+    def get_database(self, alias: str = DEFAULT_DATABASE) -> ReplicatedDatabase:
+        """Get a database by its alias in the `DATABASES` setting."""
+        if alias not in self.databases:
+            raise ValueError(
+                f"There is no database named {alias} in the DATABASES setting."
+            )
+        return self.databases[alias]
+
+    def get_engine(self, alias: str = DEFAULT_DATABASE) -> sqlalchemy.engine.Engine:
+        """
+        A synchronous SQLAlchemy engine for a database. It's only created the first
+        time it's used, since Atsume itself only talks to the database asynchronously.
+        """
+        engine = self._engines.get(alias)
+        if engine is None:
+            url = get_database_settings(alias)["URL"]
+            engine = self._engines[alias] = sqlalchemy.create_engine(url)
+        return engine
+
+    @property
+    def engine(self) -> sqlalchemy.engine.Engine:
+        """A synchronous SQLAlchemy engine for the default database."""
+        return self.get_engine()
+
+    def collect_metrics(self, writer: PrometheusWriter) -> None:
+        write_pool_metrics(
+            writer,
+            [pool for db in self.databases.values() for pool in (db, *db.replicas)],
+        )
+        write_cache_metrics(writer)
 
 
 database = DatabaseManager()
@@ -28,16 +128,25 @@ def hook_database(client: alluka.Injected[tanjun.abc.Client]) -> None:
     Tanjun lifecycle hooks to create and destroy the database connection when
     Tanjun is starting or finishing closing.
     """
+
     @client.with_client_callback(tanjun.ClientCallbackNames.STARTING)
     async def on_starting(client: alluka.Injected[tanjun.abc.Client]) -> None:
         logger.info("Connecting to database...")
-        if not database.engine and database.database:
-            await database.database.connect()
-            database.engine = sqlalchemy.create_engine(settings.DATABASE_URL)
+        for db in database.databases.values():
+            if not db.is_connected:
+                await db.connect()
+        add_collector(database.collect_metrics)
 
     @client.with_client_callback(tanjun.ClientCallbackNames.CLOSED)
     async def on_closed(client: alluka.Injected[tanjun.abc.Client]) -> None:
-        if database.database:
+        # Buffered writes need the database, so they go before disconnecting
+        await flush_write_behind()
+        if database.databases:
             logger.info("Disconnecting from the database...")
-            await database.database.disconnect()
-            database.database = None
+            for db in database.databases.values():
+                await db.disconnect()
+            remove_collector(database.collect_metrics)
+            database.databases = {}
+        for engine in database._engines.values():
+            engine.dispose()
+        database._engines = {}
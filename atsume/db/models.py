@@ -3,24 +3,34 @@ import dataclasses
 import ormar
 import typing
 
-from ormar import OrmarConfig
+from ormar import OrmarConfig, QuerySet
 from ormar.models.helpers import merge_or_generate_pydantic_config
 from ormar.models.metaclass import ModelMetaclass as OrmarModelMetaclass
 from pydantic._internal._generics import PydanticGenericMetadata
 
 from atsume.component.manager import manager
+from atsume.db.cache import (
+    CachedQuerySet,
+    ModelCache,
+    model_invalidated,
+    model_written,
+)
 from atsume.db.manager import database
 
 if typing.TYPE_CHECKING:
     from atsume.component.component_config import ComponentConfig
 
+T = typing.TypeVar("T", bound="Model")
+
 
 @dataclasses.dataclass
 class AtsumeConfig:
-    qual_name: str
-    component_config: "ComponentConfig"
+    qual_name: str = dataclasses.field(init=False)
+    component_config: "ComponentConfig" = dataclasses.field(init=False)
     name: typing.Optional[str] = None
     plural_name: typing.Optional[str] = None
+    cache: typing.Optional[ModelCache] = None
+    """Cache this model's rows by primary key, see :py:class:`atsume.db.cache.ModelCache`."""
 
     def get_name(self) -> str:
         return self.name if self.name else self.qual_name
@@ -81,7 +91,7 @@ class ModelMetaclass(OrmarModelMetaclass):
 
         # If this model doesn't have a Meta class property, create it
         if "atsume_config" not in attrs:
-            atsume_config = AtsumeConfig(qual_name, config)
+            atsume_config = AtsumeConfig()
             attrs["atsume_config"] = atsume_config
         else:
             atsume_config = attrs["atsume_config"]
@@ -102,11 +112,17 @@ class ModelMetaclass(OrmarModelMetaclass):
         if ormar_config.tablename is None:
             ormar_config.tablename = atsume_config.get_default_table_name()
 
-        if database.database:
-            ormar_config.database = database.database
+        if database.databases:
+            ormar_config.database = database.get_database(config.database)
 
         ormar_config.metadata = config._model_metadata
 
+        if atsume_config.cache is not None:
+            atsume_config.cache.bind(f"{config.name}.{atsume_config.qual_name}")
+            # A custom queryset class should subclass CachedQuerySet to use the cache
+            if ormar_config.queryset_class is QuerySet:
+                ormar_config.queryset_class = CachedQuerySet
+
         # Since we are blocking Ormar from touching the model_config,
         # we need to perform some operations for it
         merge_or_generate_pydantic_config(attrs, name)
@@ -135,4 +151,25 @@ class ModelMetaclass(OrmarModelMetaclass):
 class Model(ormar.Model, metaclass=ModelMetaclass):
     """Class to compose the Ormar Model class with Atsume's custom ModelMetaclass"""
 
-    pass
+    # These keep the model's cache, if it has one, up to date. upsert goes through save or update.
+
+    async def save(self: T) -> T:
+        result = await super().save()
+        model_written(self)
+        return result
+
+    async def update(
+        self: T, _columns: typing.Optional[list[str]] = None, **kwargs: typing.Any
+    ) -> T:
+        result = await super().update(_columns, **kwargs)
+        if _columns:
+            # The columns that weren't saved may have unsaved changes
+            model_invalidated(self)
+        else:
+            model_written(self)
+        return result
+
+    async def delete(self) -> int:
+        result = await super().delete()
+        model_invalidated(self)
+        return result
@@ -0,0 +1,274 @@
+"""
+Connection pool configuration and metrics for Atsume's database.
+
+The `databases` library hands pool options straight to the driver, and each driver names them
+differently. The options here are translated for the driver in use, and the parts no driver
+handles consistently (acquire timeouts, connection lifetimes and metrics) are handled by
+wrapping the driver's connections.
+"""
+
+import asyncio
+import logging
+import time
+import typing
+
+import databases
+from databases.core import DatabaseURL
+
+from atsume.metrics import Histogram, PrometheusWriter
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """
+    How busy the database's connection pool is. `in_use` and `waiting` are the connections
+    currently held and the tasks currently waiting for one, and `acquire_time` is how long
+    tasks waited to get a connection.
+    """
+
+    def __init__(self) -> None:
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self.acquire_time = Histogram()
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "recycles": self.recycles,
+            "acquire_time": self.acquire_time.snapshot(),
+        }
+
+
+def _backend_path(url: DatabaseURL) -> str:
+    backends = databases.Database.SUPPORTED_BACKENDS
+    return backends.get(url.scheme, backends.get(url.dialect, ""))
+
+
+def pool_options(
+    url: typing.Union[str, DatabaseURL],
+    min_size: typing.Optional[int] = None,
+    max_size: typing.Optional[int] = None,
+    max_idle: typing.Optional[float] = None,
+) -> dict[str, typing.Any]:
+    """
+    Translate pool settings into the options the driver for a database URL expects. Settings
+    left as `None` use the driver's default.
+
+    :param url: The database URL.
+    :param min_size: The number of connections to keep open.
+    :param max_size: The most connections to open at once.
+    :param max_idle: Close connections that have been unused for this many seconds.
+    """
+    url = DatabaseURL(url)
+    backend = _backend_path(url)
+    options: dict[str, typing.Any] = {}
+    # SQLite opens a connection each time one is needed and passes its options to that
+    # connection, so there's no pool to configure
+    if backend.endswith(":SQLiteBackend"):
+        return options
+    if min_size is not None:
+        options["min_size"] = min_size
+    if max_size is not None:
+        options["max_size"] = max_size
+    if max_idle is not None:
+        if backend.endswith(":PostgresBackend"):
+            options["max_inactive_connection_lifetime"] = max_idle
+        else:
+            # aiomysql, aiopg and asyncmy recycle connections by how long since they were last used
+            options["pool_recycle"] = int(max_idle)
+    return options
+
+
+class _MeasuredConnection:
+    """Wraps a driver's connection to time acquiring it and count it while it's held."""
+
+    def __init__(
+        self,
+        connection: typing.Any,
+        metrics: PoolMetrics,
+        acquire_timeout: typing.Optional[float],
+    ) -> None:
+        self._connection = connection
+        self._metrics = metrics
+        self._acquire_timeout = acquire_timeout
+
+    async def acquire(self) -> None:
+        metrics = self._metrics
+        metrics.waiting += 1
+        start = time.perf_counter()
+        try:
+            if self._acquire_timeout is None:
+                await self._connection.acquire()
+            else:
+                await asyncio.wait_for(
+                    self._connection.acquire(), self._acquire_timeout
+                )
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.waiting -= 1
+        metrics.acquire_time.observe(time.perf_counter() - start)
+        metrics.acquired += 1
+        metrics.in_use += 1
+        if metrics.in_use > metrics.max_in_use:
+            metrics.max_in_use = metrics.in_use
+
+    async def release(self) -> None:
+        try:
+            await self._connection.release()
+        finally:
+            self._metrics.in_use -= 1
+
+    def __getattr__(self, item: str) -> typing.Any:
+        return getattr(self._connection, item)
+
+
+class _MeasuredBackend:
+    """Wraps a `databases` backend so every connection it hands out is measured."""
+
+    def __init__(
+        self,
+        backend: typing.Any,
+        metrics: PoolMetrics,
+        acquire_timeout: typing.Optional[float],
+    ) -> None:
+        self.backend = backend
+        self._metrics = metrics
+        self._acquire_timeout = acquire_timeout
+
+    def connection(self) -> _MeasuredConnection:
+        return _MeasuredConnection(
+            self.backend.connection(), self._metrics, self._acquire_timeout
+        )
+
+    def __getattr__(self, item: str) -> typing.Any:
+        return getattr(self.backend, item)
+
+
+class PooledDatabase(databases.Database):
+    """
+    A :py:class:`databases.Database` that records :py:class:`PoolMetrics` and can limit how
+    long connections are waited for and how long they live.
+
+    :param url: The database URL.
+    :param acquire_timeout: Raise :py:class:`asyncio.TimeoutError` if a connection isn't
+        available after this many seconds.
+    :param max_lifetime: Replace the pool's connections every this many seconds. Connections
+        in use are replaced once they are returned.
+    :param options: Options passed on to the driver, see :py:func:`pool_options`.
+    """
+
+    def __init__(
+        self,
+        url: typing.Union[str, DatabaseURL],
+        *,
+        acquire_timeout: typing.Optional[float] = None,
+        max_lifetime: typing.Optional[float] = None,
+        **options: typing.Any,
+    ) -> None:
+        super().__init__(url, **options)
+        self.pool_metrics = PoolMetrics()
+        self.max_lifetime = max_lifetime
+        self._recycle_task: typing.Optional[asyncio.Task[None]] = None
+        self._backend = typing.cast(
+            typing.Any,
+            _MeasuredBackend(self._backend, self.pool_metrics, acquire_timeout),
+        )
+
+    @property
+    def _pool(self) -> typing.Any:
+        return getattr(
+            typing.cast(_MeasuredBackend, self._backend).backend, "_pool", None
+        )
+
+    @property
+    def pool_size(self) -> typing.Optional[int]:
+        """The number of connections the pool has open, if the driver keeps a pool."""
+        pool = self._pool
+        if pool is None:
+            return None
+        if hasattr(pool, "get_size"):
+            # asyncpg
+            return typing.cast(int, pool.get_size())
+        size = getattr(pool, "size", None)
+        return size if isinstance(size, int) else None
+
+    async def connect(self) -> None:
+        await super().connect()
+        if self.max_lifetime and self._recycle_task is None:
+            self._recycle_task = asyncio.create_task(self._recycle(self.max_lifetime))
+
+    async def disconnect(self) -> None:
+        if self._recycle_task is not None:
+            self._recycle_task.cancel()
+            self._recycle_task = None
+        await super().disconnect()
+
+    async def _recycle(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            pool = self._pool
+            try:
+                if hasattr(pool, "expire_connections"):
+                    # asyncpg replaces connections on their next acquire
+                    await pool.expire_connections()
+                elif hasattr(pool, "clear"):
+                    # aiomysql, aiopg and asyncmy close their free connections
+                    await pool.clear()
+                else:
+                    continue
+            except Exception:
+                logger.exception("Failed to recycle the database connection pool.")
+                continue
+            self.pool_metrics.recycles += 1
+
+
+def write_pool_metrics(
+    writer: PrometheusWriter, databases: typing.Iterable[PooledDatabase]
+) -> None:
+    """Write the metrics of each database's connection pool."""
+    samples = [
+        ({"database": database.url.obscure_password}, database)
+        for database in databases
+    ]
+    writer.gauge(
+        "atsume_database_pool_in_use",
+        "Database connections currently in use.",
+        ((labels, database.pool_metrics.in_use) for labels, database in samples),
+    )
+    writer.gauge(
+        "atsume_database_pool_waiting",
+        "Tasks currently waiting for a database connection.",
+        ((labels, database.pool_metrics.waiting) for labels, database in samples),
+    )
+    sizes = [(labels, database.pool_size) for labels, database in samples]
+    writer.gauge(
+        "atsume_database_pool_size",
+        "Database connections the pool has open.",
+        ((labels, size) for labels, size in sizes if size is not None),
+    )
+    writer.counter(
+        "atsume_database_pool_acquires_total",
+        "Database connections taken from the pool.",
+        ((labels, database.pool_metrics.acquired) for labels, database in samples),
+    )
+    writer.counter(
+        "atsume_database_pool_timeouts_total",
+        "Times a database connection wasn't available in time.",
+        ((labels, database.pool_metrics.timeouts) for labels, database in samples),
+    )
+    writer.histogram(
+        "atsume_database_pool_acquire_seconds",
+        "How long tasks wait for a database connection.",
+        ((labels, database.pool_metrics.acquire_time) for labels, database in samples),
+    )
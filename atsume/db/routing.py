@@ -0,0 +1,143 @@
+"""
+Routes reads from Atsume's models to read replicas of the database.
+"""
+
+import contextlib
+import contextvars
+import itertools
+import logging
+import typing
+
+from databases.core import DatabaseURL
+from sqlalchemy.sql import ClauseElement
+
+from atsume.db.pool import PooledDatabase
+
+logger = logging.getLogger(__name__)
+
+Query = typing.Union[ClauseElement, str]
+
+_pinned: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "atsume_database_pinned", default=False
+)
+
+
+@contextlib.contextmanager
+def use_primary() -> typing.Iterator[None]:
+    """
+    Send every query made inside this block to the primary database, including reads. Use it
+    to read back something that was just written, before the replicas have caught up.
+
+    .. code-block:: python
+
+        await counter.update(count=counter.count + 1)
+        with use_primary():
+            counter = await HiCounter.objects.get(user=user_id)
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicatedDatabase(PooledDatabase):
+    """
+    The primary database, which also sends reads to its read replicas. Writes, reads in a
+    transaction or on a connection the task is already holding, and reads inside
+    :py:func:`use_primary` go to the primary. Other reads go to the connected replicas
+    in turn, or to the primary if there are none.
+
+    :param url: The URL of the primary database.
+    :param replicas: The read replicas.
+    :param options: Options for the primary, see :py:class:`atsume.db.pool.PooledDatabase`.
+    """
+
+    def __init__(
+        self,
+        url: typing.Union[str, DatabaseURL],
+        *,
+        replicas: typing.Sequence[PooledDatabase] = (),
+        **options: typing.Any,
+    ) -> None:
+        super().__init__(url, **options)
+        self.replicas = list(replicas)
+        self._next_replica = itertools.cycle(self.replicas)
+
+    async def connect(self) -> None:
+        await super().connect()
+        for replica in self.replicas:
+            try:
+                await replica.connect()
+            except Exception:
+                # Reads fall back to the primary and the other replicas
+                logger.exception(
+                    f"Failed to connect to the read replica {replica.url.obscure_password}."
+                )
+
+    async def disconnect(self) -> None:
+        for replica in self.replicas:
+            await replica.disconnect()
+        await super().disconnect()
+
+    def in_transaction(self) -> bool:
+        """Whether the current task is in a transaction on this database."""
+        if self._global_connection is not None:
+            return True
+        connection = self._connection_context.get(None)
+        return connection is not None and bool(connection._transaction_stack)
+
+    def _uses_primary(self) -> bool:
+        if _pinned.get() or self._global_connection is not None:
+            return True
+        connection = self._connection_context.get(None)
+        return connection is not None and connection._connection_counter > 0
+
+    def reader(self) -> PooledDatabase:
+        """The database the next read should go to."""
+        if not self.replicas or self._uses_primary():
+            return self
+        for _ in range(len(self.replicas)):
+            replica = next(self._next_replica)
+            if replica.is_connected:
+                return replica
+        return self
+
+    async def fetch_all(
+        self, query: Query, values: typing.Optional[dict[str, typing.Any]] = None
+    ) -> typing.Any:
+        reader = self.reader()
+        if reader is self:
+            return await super().fetch_all(query, values)
+        return await reader.fetch_all(query, values)
+
+    async def fetch_one(
+        self, query: Query, values: typing.Optional[dict[str, typing.Any]] = None
+    ) -> typing.Any:
+        reader = self.reader()
+        if reader is self:
+            return await super().fetch_one(query, values)
+        return await reader.fetch_one(query, values)
+
+    async def fetch_val(
+        self,
+        query: Query,
+        values: typing.Optional[dict[str, typing.Any]] = None,
+        column: typing.Any = 0,
+    ) -> typing.Any:
+        reader = self.reader()
+        if reader is self:
+            return await super().fetch_val(query, values, column)
+        return await reader.fetch_val(query, values, column)
+
+    async def iterate(
+        self, query: Query, values: typing.Optional[dict[str, typing.Any]] = None
+    ) -> typing.AsyncGenerator[typing.Mapping[typing.Any, typing.Any], None]:
+        reader = self.reader()
+        iterator = (
+            super().iterate(query, values)
+            if reader is self
+            else reader.iterate(query, values)
+        )
+        async for record in iterator:
+            yield record
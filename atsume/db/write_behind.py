@@ -0,0 +1,374 @@
+"""
+Buffers writes to counter-style models in memory and writes them to the database in batches.
+"""
+
+import asyncio
+import contextvars
+import logging
+import typing
+import weakref
+
+from databases.core import Connection
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.sql import ClauseElement
+
+if typing.TYPE_CHECKING:
+    from atsume.db.models import Model
+
+logger = logging.getLogger(__name__)
+
+_buffers: "weakref.WeakSet[WriteBehind]" = weakref.WeakSet()
+
+# Keep statements under SQLite's default limit of 999 parameters
+_MAX_PARAMETERS = 900
+
+
+class PendingWrite:
+    """The changes waiting to be written to one row."""
+
+    __slots__ = ("increments", "values")
+
+    def __init__(self) -> None:
+        self.increments: dict[str, typing.Any] = {}
+        self.values: dict[str, typing.Any] = {}
+
+    def increment(self, fields: dict[str, typing.Any]) -> None:
+        for field, amount in fields.items():
+            if field in self.values:
+                self.values[field] += amount
+            else:
+                self.increments[field] = self.increments.get(field, 0) + amount
+
+    def set(self, fields: dict[str, typing.Any]) -> None:
+        for field, value in fields.items():
+            self.increments.pop(field, None)
+            self.values[field] = value
+
+    def then(self, newer: "PendingWrite") -> None:
+        """Apply changes that were made after these ones."""
+        self.set(newer.values)
+        self.increment(newer.increments)
+
+
+class WriteBehindMetrics:
+    """What a :py:class:`WriteBehind` buffer has written."""
+
+    __slots__ = (
+        "flushes",
+        "forced_flushes",
+        "rows",
+        "statements",
+        "errors",
+        "dropped",
+    )
+
+    def __init__(self) -> None:
+        self.flushes = 0
+        self.forced_flushes = 0
+        self.rows = 0
+        self.statements = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "flushes": self.flushes,
+            "forced_flushes": self.forced_flushes,
+            "rows": self.rows,
+            "statements": self.statements,
+            "errors": self.errors,
+            "dropped": self.dropped,
+        }
+
+
+class WriteBehind:
+    """
+    Collects increments and field changes to a model's rows in memory and writes them
+    every `flush_interval` seconds. Changes to the same row are combined, and rows with the
+    same kind of change are written with one statement, all in one transaction.
+
+    With `upsert` on, rows that don't exist yet are created using the model's defaults, and
+    increments are added to the field's default. With it off, changes to rows that don't
+    exist are dropped, but the updates are cheaper and rows with the same change, like
+    everyone whose count goes up by 1, share a single `UPDATE`.
+
+    Changes aren't in the database until they're flushed, so reads from the database can be
+    behind by up to `flush_interval` seconds. :py:meth:`pending` shows what hasn't been
+    written yet. Everything is flushed when the bot closes.
+
+    :param model: The model to write to.
+    :param flush_interval: Seconds between writes.
+    :param max_pending: The most rows to hold changes for. Once there are this many, the
+        change that filled the buffer waits for it to be flushed.
+    :param upsert: Create rows that don't exist.
+    """
+
+    def __init__(
+        self,
+        model: type["Model"],
+        flush_interval: float = 1.0,
+        max_pending: int = 10_000,
+        upsert: bool = True,
+    ) -> None:
+        if flush_interval <= 0 or max_pending < 1:
+            raise ValueError(
+                "The flush interval and the maximum pending rows need to be greater than 0."
+            )
+        self.model = model
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.upsert = upsert
+        self.metrics = WriteBehindMetrics()
+        self._pending: dict[typing.Any, PendingWrite] = {}
+        self._lock = asyncio.Lock()
+        self._task: typing.Optional[asyncio.Task[None]] = None
+        _buffers.add(self)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def pending(self, pk: typing.Any) -> typing.Optional[PendingWrite]:
+        """The changes to a row that haven't been written yet, if any."""
+        return self._pending.get(pk)
+
+    async def increment(self, pk: typing.Any, **fields: typing.Any) -> None:
+        """Add to the fields of a row, like `increment(user_id, count=1)`."""
+        self._entry(pk).increment(fields)
+        await self._added()
+
+    async def set(self, pk: typing.Any, **fields: typing.Any) -> None:
+        """Set the fields of a row, like `set(user_id, last_seen=now)`."""
+        self._entry(pk).set(fields)
+        await self._added()
+
+    def _entry(self, pk: typing.Any) -> PendingWrite:
+        entry = self._pending.get(pk)
+        if entry is None:
+            entry = self._pending[pk] = PendingWrite()
+        return entry
+
+    async def _added(self) -> None:
+        if self._task is None:
+            # Started in an empty context so it doesn't share a connection the caller holds
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+        if len(self._pending) >= self.max_pending:
+            self.metrics.forced_flushes += 1
+            await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # Closing cancels this task, which shouldn't interrupt a write halfway
+                await asyncio.shield(self.flush())
+            except Exception:
+                logger.exception(
+                    f"Failed to write {self.model.__name__} changes, retrying in "
+                    f"{self.flush_interval} seconds."
+                )
+
+    async def flush(self) -> None:
+        """
+        Write every pending change now. If writing fails and the changes were rolled back,
+        they're kept to be written by the next flush and the error is raised. If it isn't
+        known whether they were written, like when committing fails, they're dropped so
+        they can't be written twice.
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            rolled_back = True
+            try:
+                statements = self._statements(batch)
+                # A connection of its own, so this transaction can't overlap with one
+                # that the task calling flush already has open
+                connection = Connection(self.model.ormar_config.database._backend)
+                async with connection:
+                    transaction = await connection.transaction().start()
+                    try:
+                        for statement in statements:
+                            await connection.execute(statement)
+                    except BaseException:
+                        rolled_back = False
+                        await transaction.rollback()
+                        rolled_back = True
+                        raise
+                    rolled_back = False
+                    await transaction.commit()
+            except BaseException:
+                self.metrics.errors += 1
+                if rolled_back:
+                    self._restore(batch)
+                else:
+                    self.metrics.dropped += len(batch)
+                    logger.error(
+                        f"Dropped changes to {len(batch)} {self.model.__name__} rows, "
+                        f"they may not have been written."
+                    )
+                raise
+            self.metrics.flushes += 1
+            self.metrics.rows += len(batch)
+            self.metrics.statements += len(statements)
+            cache = getattr(self.model, "atsume_config").cache
+            if cache is not None:
+                for pk in batch:
+                    cache.invalidate(pk)
+
+    async def close(self) -> None:
+        """Stop flushing periodically and write everything that's pending."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def _restore(self, batch: dict[typing.Any, PendingWrite]) -> None:
+        # Changes made during the failed flush happened after the ones in the batch
+        for pk, newer in self._pending.items():
+            older = batch.get(pk)
+            if older is None:
+                batch[pk] = newer
+            else:
+                older.then(newer)
+        self._pending = batch
+
+    def _column(self, field: str) -> str:
+        return self.model.get_column_alias(field)
+
+    def _statements(self, batch: dict[typing.Any, PendingWrite]) -> list[ClauseElement]:
+        if self.upsert:
+            return self._upserts(batch)
+        return self._updates(batch)
+
+    def _updates(self, batch: dict[typing.Any, PendingWrite]) -> list[ClauseElement]:
+        table = self.model.ormar_config.table
+        pk_column = table.c[self._column(self.model.ormar_config.pkname)]
+        # Rows getting exactly the same change are updated together
+        groups: dict[typing.Any, tuple[PendingWrite, list[typing.Any]]] = {}
+        for pk, write in batch.items():
+            key: typing.Hashable
+            try:
+                key = (
+                    frozenset(write.increments.items()),
+                    frozenset(write.values.items()),
+                )
+                hash(key)
+            except TypeError:
+                key = ("row", pk)
+            if key in groups:
+                groups[key][1].append(pk)
+            else:
+                groups[key] = (write, [pk])
+        statements: list[ClauseElement] = []
+        for write, pks in groups.values():
+            values: dict[str, typing.Any] = {
+                self._column(field): value for field, value in write.values.items()
+            }
+            for field, amount in write.increments.items():
+                column = self._column(field)
+                values[column] = table.c[column] + amount
+            for start in range(0, len(pks), _MAX_PARAMETERS):
+                chunk = pks[start : start + _MAX_PARAMETERS]
+                statements.append(
+                    table.update().where(pk_column.in_(chunk)).values(values)
+                )
+        return statements
+
+    def _defaults(self) -> dict[str, typing.Any]:
+        columns = self.model.ormar_config.table.c
+        defaults = {}
+        for name, field in self.model.ormar_config.model_fields.items():
+            if (
+                name == self.model.ormar_config.pkname
+                or self._column(name) not in columns
+            ):
+                continue
+            if field.has_default(use_server=False):
+                defaults[name] = field.get_default()
+        return defaults
+
+    def _start(self, field: str) -> typing.Any:
+        """The value an incremented field starts at in a new row."""
+        default = self.model.ormar_config.model_fields[field].ormar_default
+        return default if isinstance(default, (int, float)) else 0
+
+    def _upserts(self, batch: dict[typing.Any, PendingWrite]) -> list[ClauseElement]:
+        pkname = self.model.ormar_config.pkname
+        # Rows with the same fields changed are inserted together
+        groups: dict[
+            tuple[frozenset[str], frozenset[str]], list[dict[str, typing.Any]]
+        ] = {}
+        for pk, write in batch.items():
+            row = self._defaults()
+            for field, amount in write.increments.items():
+                row[field] = self._start(field) + amount
+            row.update(write.values)
+            row[pkname] = pk
+            key = (frozenset(write.increments), frozenset(write.values))
+            groups.setdefault(key, []).append(
+                {self._column(field): value for field, value in row.items()}
+            )
+        statements: list[ClauseElement] = []
+        for (increments, values), rows in groups.items():
+            size = max(1, _MAX_PARAMETERS // len(rows[0]))
+            for start in range(0, len(rows), size):
+                statements.append(
+                    self._upsert(rows[start : start + size], increments, values)
+                )
+        return statements
+
+    def _upsert(
+        self,
+        rows: list[dict[str, typing.Any]],
+        increments: typing.Iterable[str],
+        values: typing.Iterable[str],
+    ) -> ClauseElement:
+        table = self.model.ormar_config.table
+        dialect = self.model.db_backend_name()
+        if dialect == "mysql":
+            mysql_insert = mysql.insert(table).values(rows)
+            inserted = mysql_insert.inserted
+            mysql_updates: dict[str, typing.Any] = {
+                self._column(field): inserted[self._column(field)] for field in values
+            }
+            for field in increments:
+                column = self._column(field)
+                # The inserted value includes the default the row would have started at
+                mysql_updates[column] = table.c[column] + (
+                    inserted[column] - self._start(field)
+                )
+            return typing.cast(
+                ClauseElement, mysql_insert.on_duplicate_key_update(mysql_updates)
+            )
+        if dialect == "postgresql":
+            insert: typing.Any = postgresql.insert(table).values(rows)
+        elif dialect == "sqlite":
+            insert = sqlite.insert(table).values(rows)
+        else:
+            raise ValueError(
+                f"Write-behind upserts aren't supported for {dialect} databases, "
+                f"use upsert=False."
+            )
+        excluded = insert.excluded
+        updates: dict[str, typing.Any] = {
+            self._column(field): excluded[self._column(field)] for field in values
+        }
+        for field in increments:
+            column = self._column(field)
+            updates[column] = table.c[column] + (excluded[column] - self._start(field))
+        pk_column = self._column(self.model.ormar_config.pkname)
+        return typing.cast(
+            ClauseElement,
+            insert.on_conflict_do_update(index_elements=[pk_column], set_=updates),
+        )
+
+
+async def flush_write_behind() -> None:
+    """Stop every :py:class:`WriteBehind` buffer and write what they have pending."""
+    for buffer in list(_buffers):
+        try:
+            await buffer.close()
+        except Exception:
+            logger.exception(
+                f"Failed to write {buffer.model.__name__} changes while closing."
+            )
@@ -0,0 +1,275 @@
+"""
+Thread and process pools for running blocking or CPU heavy work off of the event loop. Add
+`atsume.extensions.executor.hook_executor` to your `EXTENSIONS` to use it.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import importlib
+import logging
+import os
+import time
+import typing
+
+import alluka
+import tanjun
+
+from atsume.metrics import Histogram
+from atsume.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+P = typing.ParamSpec("P")
+
+PoolKind = typing.Literal["thread", "process"]
+
+
+class ExecutorMetrics:
+    """
+    Metrics about one of the pools in :py:class:`Executors`. Duration is how many seconds
+    a call took from being submitted to finishing, including time spent waiting for a worker.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.duration = Histogram()
+
+    @property
+    def queued(self) -> int:
+        """The number of calls waiting for a free worker."""
+        return max(0, self.in_flight - self.workers)
+
+    @property
+    def saturation(self) -> float:
+        """How busy the pool is, 1.0 when every worker is busy and higher when calls are waiting."""
+        return self.in_flight / self.workers
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "saturation": self.saturation,
+            "duration": self.duration.snapshot(),
+        }
+
+
+class ExecutorClosed(Exception):
+    def __init__(self) -> None:
+        super().__init__("The executors have been shut down.")
+
+
+class Executors:
+    """
+    A thread pool and a process pool for running blocking functions without blocking the
+    event loop. Each pool is only started the first time it's used.
+
+    Functions run in the process pool, and their arguments and results, need to be picklable.
+
+    :param thread_workers: The number of threads, or None for Python's default.
+    :param process_workers: The number of processes, or None for the number of CPUs.
+    """
+
+    def __init__(
+        self,
+        thread_workers: typing.Optional[int] = None,
+        process_workers: typing.Optional[int] = None,
+    ) -> None:
+        cpus = os.cpu_count() or 1
+        self.thread_workers = (
+            thread_workers if thread_workers is not None else min(32, cpus + 4)
+        )
+        self.process_workers = process_workers if process_workers is not None else cpus
+        self.metrics: dict[PoolKind, ExecutorMetrics] = {
+            "thread": ExecutorMetrics(self.thread_workers),
+            "process": ExecutorMetrics(self.process_workers),
+        }
+        self._pools: dict[PoolKind, concurrent.futures.Executor] = {}
+        self._closed = False
+
+    def _pool(self, kind: PoolKind) -> concurrent.futures.Executor:
+        pool = self._pools.get(kind)
+        if pool is None:
+            if self._closed:
+                raise ExecutorClosed()
+            if kind == "thread":
+                pool = concurrent.futures.ThreadPoolExecutor(
+                    self.thread_workers, thread_name_prefix="atsume-executor"
+                )
+            else:
+                pool = concurrent.futures.ProcessPoolExecutor(self.process_workers)
+            self._pools[kind] = pool
+        return pool
+
+    async def run(
+        self,
+        kind: PoolKind,
+        func: typing.Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """
+        Run a function in one of the pools and wait for its result.
+
+        :param kind: `"thread"` or `"process"`.
+        :param func: The function to run.
+        """
+        if self._closed:
+            raise ExecutorClosed()
+        pool = self._pool(kind)
+        metrics = self.metrics[kind]
+        metrics.submitted += 1
+        metrics.in_flight += 1
+        if metrics.in_flight > metrics.max_in_flight:
+            metrics.max_in_flight = metrics.in_flight
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, functools.partial(func, *args, **kwargs)
+            )
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.completed += 1
+            metrics.duration.observe(time.perf_counter() - start)
+
+    async def run_in_thread(
+        self, func: typing.Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """Run a function in the thread pool and wait for its result."""
+        return await self.run("thread", func, *args, **kwargs)
+
+    async def run_in_process(
+        self, func: typing.Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """Run a function in the process pool and wait for its result."""
+        return await self.run("process", func, *args, **kwargs)
+
+    async def shutdown(self, timeout: typing.Optional[float] = None) -> None:
+        """
+        Stop accepting new work and wait for the pools to finish what they're running.
+        After `timeout` seconds, work that hasn't started yet is cancelled.
+        """
+        self._closed = True
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            try:
+                await asyncio.wait_for(
+                    asyncio.to_thread(pool.shutdown, wait=True), timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Executor pool didn't finish within {timeout} seconds, cancelling queued work."
+                )
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: typing.Optional[Executors] = None
+
+
+def get_executors() -> Executors:
+    """Get the bot's :py:class:`Executors`, for code that can't have it injected."""
+    if _executors is None:
+        raise RuntimeError(
+            "The executor extension isn't running, add "
+            "atsume.extensions.executor.hook_executor to your EXTENSIONS."
+        )
+    return _executors
+
+
+def _call_original(
+    module: str, qualname: str, *args: typing.Any, **kwargs: typing.Any
+) -> typing.Any:
+    # The module attribute is the off_loop wrapper, so look up the function it wraps
+    obj: typing.Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj.__wrapped__(*args, **kwargs)
+
+
+def off_loop(
+    kind: PoolKind = "thread",
+) -> typing.Callable[
+    [typing.Callable[P, T]],
+    typing.Callable[P, typing.Coroutine[typing.Any, typing.Any, T]],
+]:
+    """
+    Decorator to make a blocking function run in the bot's thread or process pool. The
+    function becomes a coroutine function that commands and listeners can await.
+
+    .. code-block:: python
+
+        @off_loop("process")
+        def render_card(name: str, avatar: bytes) -> bytes:
+            ...
+
+        @tanjun.as_slash_command("card", "Make a profile card.")
+        async def card(ctx: atsume.Context) -> None:
+            image = await render_card(ctx.author.username, await ctx.author.display_avatar_url.read())
+            await ctx.respond(attachment=hikari.Bytes(image, "card.png"))
+
+    Functions run in the process pool need to be defined at the top level of a module, and
+    their arguments and results need to be picklable.
+
+    :param kind: `"thread"` (default) or `"process"`.
+    """
+
+    def decorator(
+        func: typing.Callable[P, T]
+    ) -> typing.Callable[P, typing.Coroutine[typing.Any, typing.Any, T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            executors = get_executors()
+            if kind == "process":
+                # The function has to be sent by reference and can't be the wrapper
+                return typing.cast(
+                    T,
+                    await executors.run(
+                        kind,
+                        functools.partial(
+                            _call_original, func.__module__, func.__qualname__
+                        ),
+                        *args,
+                        **kwargs,
+                    ),
+                )
+            return await executors.run(kind, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def hook_executor(c: alluka.Injected[tanjun.abc.Client]) -> None:
+    """
+    Create an :py:class:`Executors` instance for an Atsume bot to use.
+    """
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.STARTING)
+    async def on_starting(client: alluka.Injected[tanjun.abc.Client]) -> None:
+        global _executors
+        _executors = Executors(
+            thread_workers=settings.EXECUTOR_THREAD_WORKERS,
+            process_workers=settings.EXECUTOR_PROCESS_WORKERS,
+        )
+        client.set_type_dependency(Executors, _executors)
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.CLOSING)
+    async def on_closing(executors: alluka.Injected[Executors]) -> None:
+        global _executors
+        await executors.shutdown(settings.EXECUTOR_SHUTDOWN_TIMEOUT)
+        _executors = None
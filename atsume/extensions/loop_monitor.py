@@ -0,0 +1,245 @@
+"""
+Measures how long the event loop takes to respond and reports the callbacks that block it. Add
+`atsume.extensions.loop_monitor.hook_loop_monitor` to your `EXTENSIONS` to use it.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import types
+import typing
+
+import alluka
+import tanjun
+
+from atsume.component.manager import manager as component_manager
+from atsume.metrics import Histogram
+from atsume.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _code_name(code: types.CodeType) -> str:
+    # co_qualname is only available from Python 3.11
+    return typing.cast(str, getattr(code, "co_qualname", code.co_name))
+
+
+class StallSample(typing.NamedTuple):
+    """What the event loop was running while it was blocked."""
+
+    component: typing.Optional[str]
+    """The name of the component the blocking code belongs to, if any."""
+    callback: str
+    """The outermost function of the component that was running, or the innermost function if none."""
+    location: str
+    """The file and line the loop was at."""
+    stack: typing.Optional[str]
+    """The formatted stack, if stack sampling is on."""
+
+    @property
+    def label(self) -> str:
+        if self.component is None:
+            return self.callback
+        return f"{self.component}.{self.callback}"
+
+
+class SlowCallbackStats:
+    """How often and for how long a callback has blocked the event loop."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {"count": self.count, "total": self.total, "max": self.max}
+
+
+class LoopMonitorMetrics:
+    """
+    Metrics from a :py:class:`LoopMonitor`. Lag is how many seconds the event loop took to
+    run a callback scheduled from another thread, which is how late a new event would be
+    handled. Slow callbacks are keyed by `component.callback`.
+    """
+
+    def __init__(self) -> None:
+        self.lag = Histogram()
+        self.stalls = 0
+        self.slow_callbacks: dict[str, SlowCallbackStats] = {}
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "lag": self.lag.snapshot(),
+            "stalls": self.stalls,
+            "slow_callbacks": {
+                label: stats.snapshot() for label, stats in self.slow_callbacks.items()
+            },
+        }
+
+
+class LoopMonitor:
+    """
+    Watches the event loop from a background thread. Every `interval` seconds the thread
+    schedules a callback on the loop and measures how long it takes to run. If it hasn't run
+    after `threshold` seconds, the thread looks at what the loop is running, and once the
+    loop catches up the stall is logged and counted against that component and callback.
+
+    Stalls are found by sampling, so blocks shorter than `interval` can be missed, but a
+    callback that blocks repeatedly will show up. While idle, the monitor only wakes up
+    once per interval.
+
+    :param interval: Seconds between measurements.
+    :param threshold: Report stalls longer than this many seconds.
+    :param sample_stacks: Include the full stack of the blocking code in reports.
+    """
+
+    def __init__(
+        self, interval: float = 0.5, threshold: float = 0.1, sample_stacks: bool = False
+    ) -> None:
+        if interval <= 0 or threshold <= 0:
+            raise ValueError(
+                "The loop monitor interval and threshold need to be greater than 0."
+            )
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_stacks = sample_stacks
+        self.metrics = LoopMonitorMetrics()
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._thread: typing.Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        # When the pending measurement was scheduled and what the loop was running after the threshold
+        self._pending: typing.Optional[float] = None
+        self._sample: typing.Optional[StallSample] = None
+        self._component_paths: list[tuple[str, str]] = []
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._component_paths = [
+            (config.module_path, config.name)
+            for config in component_manager.component_configs
+        ]
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="atsume-loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the event loop."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        loop = self._loop
+        assert loop is not None
+        next_measurement = time.monotonic() + self.interval
+        wait = self.interval
+        while not self._stopped.wait(wait):
+            now = time.monotonic()
+            with self._lock:
+                pending = self._pending
+                sampled = self._sample is not None
+            if pending is None:
+                if now < next_measurement:
+                    wait = next_measurement - now
+                    continue
+                with self._lock:
+                    self._pending = now
+                try:
+                    loop.call_soon_threadsafe(self._measured, now)
+                except RuntimeError:
+                    # The loop has closed
+                    return
+                next_measurement = now + self.interval
+            elif not sampled and now - pending >= self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    sample = self._take_sample(frame)
+                    with self._lock:
+                        if self._pending == pending:
+                            self._sample = sample
+            wait = self.threshold
+
+    def _measured(self, scheduled: float) -> None:
+        lag = time.monotonic() - scheduled
+        with self._lock:
+            sample = self._sample
+            self._pending = None
+            self._sample = None
+        self.metrics.lag.observe(lag)
+        if lag < self.threshold:
+            return
+        self.metrics.stalls += 1
+        label = sample.label if sample is not None else "unknown"
+        stats = self.metrics.slow_callbacks.get(label)
+        if stats is None:
+            stats = self.metrics.slow_callbacks[label] = SlowCallbackStats()
+        stats.count += 1
+        stats.total += lag
+        if lag > stats.max:
+            stats.max = lag
+        if sample is None:
+            logger.warning(f"Event loop was blocked for {lag:.3f} seconds.")
+        elif sample.stack is not None:
+            logger.warning(
+                f"Event loop was blocked for {lag:.3f} seconds by {label} at "
+                f"{sample.location}.\n{sample.stack}"
+            )
+        else:
+            logger.warning(
+                f"Event loop was blocked for {lag:.3f} seconds by {label} at {sample.location}."
+            )
+
+    def _component_of(self, frame: types.FrameType) -> typing.Optional[str]:
+        module = frame.f_globals.get("__name__", "")
+        for path, name in self._component_paths:
+            if module == path or module.startswith(f"{path}."):
+                return name
+        return None
+
+    def _take_sample(self, frame: types.FrameType) -> StallSample:
+        location = f"{frame.f_code.co_filename}:{frame.f_lineno}"
+        component: typing.Optional[str] = None
+        callback = _code_name(frame.f_code)
+        # The outermost frame in a component is the callback that the loop called into
+        current: typing.Optional[types.FrameType] = frame
+        while current is not None:
+            current_component = self._component_of(current)
+            if current_component is not None:
+                component = current_component
+                callback = _code_name(current.f_code)
+            current = current.f_back
+        stack = "".join(traceback.format_stack(frame)) if self.sample_stacks else None
+        return StallSample(component, callback, location, stack)
+
+
+def hook_loop_monitor(c: alluka.Injected[tanjun.abc.Client]) -> None:
+    """
+    Create a :py:class:`LoopMonitor` for an Atsume bot and start it once the bot has started.
+    """
+    monitor = LoopMonitor(
+        interval=settings.LOOP_MONITOR_INTERVAL,
+        threshold=settings.LOOP_MONITOR_THRESHOLD,
+        sample_stacks=settings.LOOP_MONITOR_SAMPLE_STACKS,
+    )
+    c.set_type_dependency(LoopMonitor, monitor)
+    c.set_type_dependency(LoopMonitorMetrics, monitor.metrics)
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.STARTED)
+    async def on_started(monitor: alluka.Injected[LoopMonitor]) -> None:
+        monitor.start()
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.CLOSING)
+    async def on_closing(monitor: alluka.Injected[LoopMonitor]) -> None:
+        monitor.stop()
@@ -0,0 +1,111 @@
+"""
+Serves the bot's metrics in the Prometheus text format from a local HTTP endpoint. Add
+`atsume.extensions.metrics_server.hook_metrics_server` to your `EXTENSIONS` to use it.
+"""
+
+import logging
+import typing
+
+import alluka
+import tanjun
+from aiohttp import web
+
+from atsume.component import Component
+from atsume.component.metrics import write_component_metrics
+from atsume.metrics import (
+    PrometheusWriter,
+    add_collector,
+    remove_collector,
+    render_prometheus,
+)
+from atsume.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsServer:
+    """
+    An HTTP server with a single `/metrics` page, rendered from the collectors added with
+    :py:func:`atsume.metrics.add_collector`. It also adds a collector for the latency and
+    listener queues of the client's components.
+
+    :param client: The Tanjun client whose components to report on.
+    :param host: The address to listen on.
+    :param port: The port to listen on.
+    """
+
+    def __init__(self, client: tanjun.abc.Client, host: str, port: int) -> None:
+        self.client = client
+        self.host = host
+        self.port = port
+        self._runner: typing.Optional[web.AppRunner] = None
+
+    def _components(self) -> list[Component]:
+        return [
+            component
+            for component in self.client.components
+            if isinstance(component, Component)
+        ]
+
+    def collect_components(self, writer: PrometheusWriter) -> None:
+        components = self._components()
+        write_component_metrics(writer, (component.metrics for component in components))
+        queues = [
+            ({"component": component.name, "queue": queue.name}, queue.metrics)
+            for component in components
+            for queue in component.listener_queues
+        ]
+        writer.gauge(
+            "atsume_listener_queue_depth",
+            "Events waiting in a listener queue.",
+            ((labels, metrics.depth) for labels, metrics in queues),
+        )
+        writer.counter(
+            "atsume_listener_queue_dropped_total",
+            "Events a listener queue has dropped because it was full.",
+            ((labels, metrics.dropped) for labels, metrics in queues),
+        )
+        writer.histogram(
+            "atsume_listener_queue_wait_seconds",
+            "How long events wait in a listener queue.",
+            ((labels, metrics.wait_time) for labels, metrics in queues),
+        )
+
+    async def _metrics_page(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=render_prometheus(),
+            content_type="text/plain",
+            headers={"X-Content-Type-Options": "nosniff"},
+        )
+
+    async def start(self) -> None:
+        add_collector(self.collect_components)
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics_page)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        remove_collector(self.collect_components)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def hook_metrics_server(c: alluka.Injected[tanjun.abc.Client]) -> None:
+    """
+    Serve the bot's metrics at `http://METRICS_HOST:METRICS_PORT/metrics` while it's running.
+    """
+    server = MetricsServer(c, settings.METRICS_HOST, settings.METRICS_PORT)
+    c.set_type_dependency(MetricsServer, server)
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.STARTED)
+    async def on_started(server: alluka.Injected[MetricsServer]) -> None:
+        await server.start()
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.CLOSING)
+    async def on_closing(server: alluka.Injected[MetricsServer]) -> None:
+        await server.stop()
@@ -0,0 +1,30 @@
+"""
+A scheduler for running async functions at a given time. Add
+`atsume.extensions.timer.hook_extension` to your `EXTENSIONS` to use it, and
+`atsume.extensions.timer` to your `COMPONENTS` to store tasks in the database.
+"""
+
+from .engine import AbstractTimerEngine, HeapEngine, TimingWheelEngine
+from .metrics import TimerMetrics, CallbackMetrics
+from .timer import (
+    Timer,
+    TimerTask,
+    TimerTaskSpec,
+    CatchUpPolicy,
+    PersistenceNotEnabled,
+    hook_extension,
+)
+
+__all__ = [
+    "AbstractTimerEngine",
+    "CallbackMetrics",
+    "CatchUpPolicy",
+    "HeapEngine",
+    "PersistenceNotEnabled",
+    "Timer",
+    "TimerTask",
+    "TimerMetrics",
+    "TimerTaskSpec",
+    "TimingWheelEngine",
+    "hook_extension",
+]
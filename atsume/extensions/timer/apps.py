@@ -0,0 +1,11 @@
+from atsume.component import ComponentConfig
+
+
+class TimerConfig(ComponentConfig):
+    """
+    Add `atsume.extensions.timer` to your `COMPONENTS` to store persistent timer tasks
+    in the database.
+    """
+
+    name = "atsume_timer"
+    verbose_name = "Timer"
@@ -0,0 +1,2 @@
+# The timer component only provides the models for persistent tasks, the Timer itself
+# is attached by `atsume.extensions.timer.hook_extension`.
@@ -0,0 +1,361 @@
+"""
+Scheduling engines used by the :py:class:`atsume.extensions.timer.Timer` to keep track of
+its pending tasks and to find the ones that are due to run.
+"""
+
+import abc
+import heapq
+import importlib
+import itertools
+import math
+import operator
+import typing
+
+from atsume.settings import settings
+
+if typing.TYPE_CHECKING:
+    from .timer import TimerTask, Timer
+
+
+class AbstractTimerEngine(abc.ABC):
+    """
+    Abstract class for the data structure that holds a Timer's pending tasks. Tasks are
+    ordered by their `_deadline`, and an engine may store whatever bookkeeping it needs
+    to find a task again in the task's `_handle`.
+    """
+
+    def attach(self, timer: "Timer") -> None:
+        """Called when the engine is given to a Timer."""
+        pass
+
+    @abc.abstractmethod
+    def push(self, task: "TimerTask") -> None:
+        """Add a task to the engine."""
+        ...
+
+    def push_many(self, tasks: list["TimerTask"]) -> None:
+        """Add a batch of tasks to the engine."""
+        for task in tasks:
+            self.push(task)
+
+    @abc.abstractmethod
+    def remove(self, task: "TimerTask") -> None:
+        """Remove a pending task. Does nothing if the task isn't pending."""
+        ...
+
+    @abc.abstractmethod
+    def next_deadline(self) -> typing.Optional[float]:
+        """
+        When the Timer should next wake up, no later than the earliest pending deadline.
+        None if there are no tasks.
+        """
+        ...
+
+    @abc.abstractmethod
+    def pop_due(self, now: float) -> list["TimerTask"]:
+        """Remove and return every task whose deadline is at or before `now`, in order."""
+        ...
+
+    @abc.abstractmethod
+    def clear(self) -> list["TimerTask"]:
+        """Remove and return all pending tasks."""
+        ...
+
+    @abc.abstractmethod
+    def tasks(self) -> list["TimerTask"]:
+        """A snapshot of the pending tasks, ordered by deadline."""
+        ...
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+def import_engine_class(module_path: str) -> typing.Type[AbstractTimerEngine]:
+    """
+    Import a timer engine class from a given module path. Used to load the engine
+    configured in the `TIMER_ENGINE_CLASS` setting.
+
+    :param module_path: The module path to import.
+    :return: The class object of the given module path.
+    """
+    parts = module_path.split(".")
+    module = importlib.import_module(".".join(parts[:-1]))
+    engine: typing.Type[AbstractTimerEngine] = getattr(module, parts[-1])
+    if issubclass(engine, AbstractTimerEngine):
+        return engine
+    raise ValueError(
+        f"Timer engine class {module_path} does not implement {AbstractTimerEngine.__name__}"
+    )
+
+
+class HeapEngine(AbstractTimerEngine):
+    """
+    Keeps tasks in a binary heap ordered by deadline. Cancelled tasks are left in the heap
+    as tombstones and skipped once they reach the top, so removing a task is O(1) while
+    pushing and popping are O(log n). The heap is compacted whenever tombstones make up
+    more than half of it.
+    """
+
+    _COMPACT_MIN_SIZE = 64
+
+    def __init__(self) -> None:
+        # Entries are [deadline, sequence, task], the task is set to None once removed.
+        # The sequence number keeps tasks with the same deadline in insertion order.
+        self._heap: list[list[typing.Any]] = []
+        self._counter = itertools.count()
+        self._size = 0
+
+    def push(self, task: "TimerTask") -> None:
+        entry = [task._deadline, next(self._counter), task]
+        task._handle = entry
+        heapq.heappush(self._heap, entry)
+        self._size += 1
+
+    def push_many(self, tasks: list["TimerTask"]) -> None:
+        # Rebuilding the heap is O(n + k) against O(k log n) for pushing each task, so it
+        # wins once the batch is a decent fraction of the heap.
+        if len(tasks) * 4 < len(self._heap):
+            return super().push_many(tasks)
+        for task in tasks:
+            entry = [task._deadline, next(self._counter), task]
+            task._handle = entry
+            self._heap.append(entry)
+        heapq.heapify(self._heap)
+        self._size += len(tasks)
+
+    def remove(self, task: "TimerTask") -> None:
+        entry = task._handle
+        if entry is None:
+            return
+        entry[2] = None
+        task._handle = None
+        self._size -= 1
+        if (
+            len(self._heap) > self._COMPACT_MIN_SIZE
+            and self._size < len(self._heap) // 2
+        ):
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+
+    def next_deadline(self) -> typing.Optional[float]:
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return typing.cast(float, heap[0][0])
+
+    def pop_due(self, now: float) -> list["TimerTask"]:
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            task = heapq.heappop(heap)[2]
+            if task is None:
+                continue
+            task._handle = None
+            self._size -= 1
+            due.append(task)
+        return due
+
+    def clear(self) -> list["TimerTask"]:
+        tasks = self.tasks()
+        for task in tasks:
+            task._handle = None
+        self._heap = []
+        self._size = 0
+        return tasks
+
+    def tasks(self) -> list["TimerTask"]:
+        return [entry[2] for entry in sorted(self._heap) if entry[2] is not None]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+_WHEEL_BITS = 8
+_WHEEL_SIZE = 1 << _WHEEL_BITS
+_WHEEL_MASK = _WHEEL_SIZE - 1
+_WHEEL_LEVELS = 4
+# Slots past the wheels for tasks too far away to fit and tasks that are already due
+_OVERFLOW_SLOT = _WHEEL_LEVELS * _WHEEL_SIZE
+_READY_SLOT = _OVERFLOW_SLOT + 1
+
+
+class TimingWheelEngine(AbstractTimerEngine):
+    """
+    A hierarchical timing wheel, suited to large numbers of short timers. Time is split
+    into ticks of `resolution` seconds, and each of the four wheels has 256 slots covering
+    256 times the span of a slot in the wheel below it. Tasks are dropped into the slot for
+    their tick, and move down a wheel each time the wheel below wraps around, so pushing
+    and removing a task are O(1).
+
+    Tasks run at the end of their tick, so up to `resolution` seconds late.
+    Set `TIMER_ENGINE_CLASS` to `"atsume.extensions.timer.engine.TimingWheelEngine"` to use it.
+
+    :param resolution: The length of a tick in seconds. Defaults to `TIMER_WHEEL_RESOLUTION`.
+    """
+
+    def __init__(self, resolution: typing.Optional[float] = None) -> None:
+        self.resolution = (
+            resolution if resolution is not None else settings.TIMER_WHEEL_RESOLUTION
+        )
+        self._clock: typing.Optional[typing.Callable[[], float]] = None
+        self._tick = 0
+        # Every slot of every wheel, followed by the overflow and ready slots. A task's handle
+        # is the index of its slot. Slots are dicts to keep tasks in the order they were added.
+        self._slots: list[dict["TimerTask", None]] = [
+            {} for _ in range(_READY_SLOT + 1)
+        ]
+        # Number of tasks in each wheel, followed by the overflow and ready slots
+        self._counts = [0] * (_WHEEL_LEVELS + 2)
+        self._size = 0
+
+    def attach(self, timer: "Timer") -> None:
+        self._clock = timer._now
+        self._tick = self._current_tick()
+
+    def _current_tick(self) -> int:
+        assert self._clock is not None, "TimingWheelEngine must be attached to a Timer"
+        # The epsilon keeps floating point error from holding back a tick that is due
+        return math.floor(self._clock() / self.resolution + 1e-9)
+
+    def _insert(self, task: "TimerTask") -> None:
+        tick = math.ceil(task._deadline / self.resolution - 1e-9)
+        delta = tick - self._tick
+        if delta <= 0:
+            slot = _READY_SLOT
+            count_index = _WHEEL_LEVELS + 1
+        else:
+            # The lowest wheel with a span that reaches the task's tick
+            level = (delta.bit_length() - 1) // _WHEEL_BITS
+            if level < _WHEEL_LEVELS:
+                index = (tick >> (_WHEEL_BITS * level)) & _WHEEL_MASK
+                slot = level * _WHEEL_SIZE + index
+                count_index = level
+            else:
+                slot = _OVERFLOW_SLOT
+                count_index = _WHEEL_LEVELS
+        self._slots[slot][task] = None
+        self._counts[count_index] += 1
+        task._handle = slot
+
+    def _count_index(self, slot: int) -> int:
+        if slot >= _OVERFLOW_SLOT:
+            return slot - _OVERFLOW_SLOT + _WHEEL_LEVELS
+        return slot >> _WHEEL_BITS
+
+    def push(self, task: "TimerTask") -> None:
+        if self._size == 0:
+            # Nothing to cascade, so catch up to the present instead of stepping there later
+            self._tick = max(self._tick, self._current_tick())
+        self._insert(task)
+        self._size += 1
+
+    def remove(self, task: "TimerTask") -> None:
+        slot = task._handle
+        if slot is None:
+            return
+        del self._slots[slot][task]
+        self._counts[self._count_index(slot)] -= 1
+        task._handle = None
+        self._size -= 1
+
+    def _take(self, slot: int) -> list["TimerTask"]:
+        tasks = list(self._slots[slot])
+        self._slots[slot].clear()
+        self._counts[self._count_index(slot)] -= len(tasks)
+        return tasks
+
+    def _cascade(self, level: int) -> None:
+        """Move the tasks in the current slot of a wheel down into the wheels below it."""
+        if level == _WHEEL_LEVELS:
+            tasks = self._take(_OVERFLOW_SLOT)
+        else:
+            index = (self._tick >> (_WHEEL_BITS * level)) & _WHEEL_MASK
+            if index == 0:
+                self._cascade(level + 1)
+            tasks = self._take(level * _WHEEL_SIZE + index)
+        for task in tasks:
+            self._insert(task)
+
+    def next_deadline(self) -> typing.Optional[float]:
+        if self._size == 0:
+            return None
+        if self._counts[_WHEEL_LEVELS + 1]:
+            return self._tick * self.resolution
+        next_tick: typing.Optional[int] = None
+        if self._counts[0]:
+            for offset in range(1, _WHEEL_SIZE):
+                if self._slots[(self._tick + offset) & _WHEEL_MASK]:
+                    next_tick = self._tick + offset
+                    break
+        # Tasks in the upper wheels can only become due after their slot cascades down
+        for level in range(1, _WHEEL_LEVELS):
+            if not self._counts[level]:
+                continue
+            shift = _WHEEL_BITS * level
+            for offset in range(1, _WHEEL_SIZE + 1):
+                slot_tick = ((self._tick >> shift) + offset) << shift
+                if next_tick is not None and slot_tick >= next_tick:
+                    break
+                index = ((self._tick >> shift) + offset) & _WHEEL_MASK
+                if self._slots[level * _WHEEL_SIZE + index]:
+                    next_tick = slot_tick
+                    break
+        if self._counts[_WHEEL_LEVELS]:
+            # Overflowed tasks are moved into the wheels when the top wheel wraps around
+            top_shift = _WHEEL_BITS * _WHEEL_LEVELS
+            boundary = ((self._tick >> top_shift) + 1) << top_shift
+            next_tick = boundary if next_tick is None else min(next_tick, boundary)
+        assert next_tick is not None
+        return next_tick * self.resolution
+
+    def pop_due(self, now: float) -> list["TimerTask"]:
+        target = math.floor(now / self.resolution + 1e-9)
+        due = self._take(_READY_SLOT)
+        while self._tick < target:
+            # Skip ahead to the next time a slot changes in the lowest wheel with any tasks
+            # in it, nothing can happen in the empty wheels below it.
+            level = 0
+            while level < _WHEEL_LEVELS and not self._counts[level]:
+                level += 1
+            shift = _WHEEL_BITS * level
+            next_tick = ((self._tick >> shift) + 1) << shift
+            if next_tick > target:
+                self._tick = target
+                break
+            self._tick = next_tick
+            index = self._tick & _WHEEL_MASK
+            if index == 0:
+                self._cascade(1)
+            if self._slots[index]:
+                due.extend(self._take(index))
+            if self._counts[_WHEEL_LEVELS + 1]:
+                due.extend(self._take(_READY_SLOT))
+        for task in due:
+            task._handle = None
+        self._size -= len(due)
+        due.sort(key=operator.attrgetter("_deadline"))
+        return due
+
+    def clear(self) -> list["TimerTask"]:
+        tasks = self.tasks()
+        for slot in self._slots:
+            slot.clear()
+        for task in tasks:
+            task._handle = None
+        self._counts = [0] * (_WHEEL_LEVELS + 2)
+        self._size = 0
+        return tasks
+
+    def tasks(self) -> list["TimerTask"]:
+        tasks = [task for slot in self._slots for task in slot]
+        tasks.sort(key=operator.attrgetter("_deadline"))
+        return tasks
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,128 @@
+import typing
+from datetime import datetime
+
+from atsume.metrics import Histogram
+
+if typing.TYPE_CHECKING:
+    from .timer import Timer
+
+
+class CallbackMetrics:
+    """Counts and run times for one timer callback."""
+
+    __slots__ = ("runs", "errors", "timeouts", "duration")
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.duration = Histogram()
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "duration": self.duration.snapshot(),
+        }
+
+
+class TimerMetrics:
+    """
+    Metrics about a :py:class:`atsume.extensions.timer.Timer`, for seeing when it is falling
+    behind. It's available as a type dependency once the timer extension is loaded.
+
+    .. code-block:: python
+
+        @tanjun.as_message_command("timer_stats")
+        async def timer_stats(ctx: atsume.Context, metrics: alluka.Injected[TimerMetrics]) -> None:
+            await ctx.respond(f"{metrics.pending} tasks pending, p99 lateness {metrics.lateness.quantile(0.99)}s")
+
+    Lateness is how many seconds after its deadline a task started running, and duration is
+    how many seconds its callback took.
+    """
+
+    def __init__(self, timer: "Timer") -> None:
+        self._timer = timer
+        self.runs = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.lateness = Histogram()
+        self.duration = Histogram()
+        self.callbacks: dict[str, CallbackMetrics] = {}
+        """A breakdown of the metrics for each callback, by the callback's qualified name."""
+
+    @property
+    def pending(self) -> int:
+        """The number of tasks waiting for their deadline."""
+        return len(self._timer._engine)
+
+    @property
+    def queued(self) -> int:
+        """The number of due tasks waiting for a worker to run them."""
+        return self._timer._queue.qsize()
+
+    @property
+    def late_starts(self) -> int:
+        """The number of tasks that started later than the Timer's `late_start_threshold`."""
+        return self._timer.late_starts
+
+    @property
+    def earliest_deadline(self) -> typing.Optional[datetime]:
+        """
+        When the earliest pending task is due. With the timing wheel engine this may be up to
+        a wheel slot earlier than the task's actual deadline.
+        """
+        deadline = self._timer._engine.next_deadline()
+        if deadline is None:
+            return None
+        return self._timer._from_deadline(deadline)
+
+    def _record_start(self, lateness: float) -> None:
+        self.lateness.observe(lateness)
+
+    def _record_run(
+        self,
+        callback: typing.Callable[..., typing.Any],
+        duration: float,
+        error: bool = False,
+        timed_out: bool = False,
+    ) -> None:
+        name = _callback_name(callback)
+        stats = self.callbacks.get(name)
+        if stats is None:
+            stats = self.callbacks[name] = CallbackMetrics()
+        self.runs += 1
+        stats.runs += 1
+        self.duration.observe(duration)
+        stats.duration.observe(duration)
+        if error:
+            self.errors += 1
+            stats.errors += 1
+        if timed_out:
+            self.timeouts += 1
+            stats.timeouts += 1
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        """All of the metrics as a plain dictionary, for exporting."""
+        return {
+            "pending": self.pending,
+            "queued": self.queued,
+            "earliest_deadline": self.earliest_deadline,
+            "runs": self.runs,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "late_starts": self.late_starts,
+            "lateness": self.lateness.snapshot(),
+            "duration": self.duration.snapshot(),
+            "callbacks": {
+                name: stats.snapshot() for name, stats in self.callbacks.items()
+            },
+        }
+
+
+def _callback_name(callback: typing.Callable[..., typing.Any]) -> str:
+    qualname = getattr(callback, "__qualname__", None)
+    if qualname is None:
+        return repr(callback)
+    return f"{getattr(callback, '__module__', '')}.{qualname}"
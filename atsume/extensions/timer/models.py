@@ -0,0 +1,20 @@
+# Ormar fields are typed as the value they hold, which mypy can't follow
+# mypy: disable-error-code="assignment"
+from datetime import datetime
+
+import ormar
+
+from atsume.db import Model
+
+
+class ScheduledTask(Model):
+    """A persistent timer task. The callback is stored as the import path of an async function."""
+
+    id: int = ormar.Integer(primary_key=True)
+    # Indexed so tasks can be loaded one window of time at a time
+    due: datetime = ormar.DateTime(timezone=True, index=True)
+    callback: str = ormar.String(max_length=255)
+    args: list[object] = ormar.JSON(default=list)
+    kwargs: dict[str, object] = ormar.JSON(default=dict)
+    # Seconds between each run for repeating tasks
+    repeat: float | None = ormar.Float(nullable=True)
@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import typing
+from datetime import datetime, timedelta, timezone
+
+from atsume.extensions.loader import load_module_func, ModulePathNotFound
+from .timer import TimerTask, CallableArgs, CallableKwargs
+
+if typing.TYPE_CHECKING:
+    from .timer import Timer
+    from .models import ScheduledTask
+
+logger = logging.getLogger(__name__)
+
+TimerCallback = typing.Callable[..., typing.Awaitable[None]]
+
+
+def callback_to_path(callback: typing.Union[str, TimerCallback]) -> str:
+    """
+    Get the import path to store for a callback. Only module level functions can be
+    stored, since the callback has to be importable again after a restart.
+    """
+    if isinstance(callback, str):
+        return callback
+    qualname = getattr(callback, "__qualname__", "")
+    module = getattr(callback, "__module__", None)
+    if not module or not qualname or "." in qualname:
+        raise ValueError(
+            f"Persistent timer callback {callback} must be a module level function."
+        )
+    return f"{module}.{qualname}"
+
+
+class PersistentTimerTask(TimerTask):
+    """
+    A TimerTask backed by a row in the database. The row is removed once the task has run
+    or is cancelled, and repeating tasks have the row updated with their next run time.
+    """
+
+    __slots__ = ("store", "pk", "callback_path")
+
+    def __init__(
+        self,
+        store: "TimerStore",
+        pk: int,
+        callback_path: str,
+        time: datetime,
+        callback: TimerCallback,
+        args: typing.Optional[list[CallableArgs]] = None,
+        kwargs: typing.Optional[dict[str, CallableKwargs]] = None,
+        repeat: typing.Optional[timedelta] = None,
+    ) -> None:
+        super().__init__(
+            store.timer, time, callback, args=args, kwargs=kwargs, repeat=repeat
+        )
+        self.store = store
+        self.pk = pk
+        self.callback_path = callback_path
+
+    async def callback(self) -> None:
+        await super().callback()
+        if self._cancelled:
+            return
+        if self.repeat:
+            await self.store._update_due(self)
+        else:
+            await self.store._delete(self)
+
+    def cancel(self) -> None:
+        # Tasks that already ran or were cancelled before are left alone
+        if self._cancel():
+            self.store._spawn(self.store._delete(self))
+
+    def __repr__(self) -> str:
+        return f"PersistentTimerTask({self.pk}, {self.time}, {self.callback_path})"
+
+
+class _RefillTask(TimerTask):
+    """The repeating task that loads the next window of persistent tasks."""
+
+    __slots__ = ()
+
+    @property
+    def _job_timeout(self) -> typing.Optional[float]:
+        # Cutting a load off would leave its window unloaded until the next refill
+        return None
+
+
+class TimerStore:
+    """
+    Stores persistent timer tasks with the `ScheduledTask` model. Only the tasks due within
+    the next `window` are held in the Timer's memory. The next window is loaded in bulk with
+    a range query on the indexed due time, halfway through the current one.
+    """
+
+    def __init__(self, timer: "Timer", window: timedelta) -> None:
+        self.timer = timer
+        self.window = window
+        # Tasks due before this time are in memory, the rest are only in the database
+        self._loaded_until: typing.Optional[datetime] = None
+        # The end of the window being loaded, while its query runs
+        self._loading_until: typing.Optional[datetime] = None
+        self._loaded: dict[int, PersistentTimerTask] = {}
+        self._refill_task: typing.Optional[TimerTask] = None
+        self._background_tasks: set[asyncio.Task[typing.Any]] = set()
+
+    async def start(self) -> None:
+        await self._load_window()
+        self._refill_task = _RefillTask(
+            self.timer,
+            datetime.now(timezone.utc) + self.window / 2,
+            self._load_window,
+            repeat=self.window / 2,
+        )
+        self.timer._readd_task(self._refill_task)
+
+    async def close(self) -> None:
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._loaded.clear()
+
+    async def _load_window(self) -> None:
+        """Load the tasks due before the end of the next window that aren't in memory yet."""
+        from .models import ScheduledTask
+
+        lower_bound = self._loaded_until
+        horizon = datetime.now(timezone.utc) + self.window
+        # Tasks scheduled while the query runs go straight into memory instead of falling
+        # between two windows. The horizon itself only moves once the window is loaded, so
+        # a failed load is retried by the next refill.
+        self._loading_until = horizon
+        query = ScheduledTask.objects.filter(due__lt=horizon)
+        if lower_bound is not None:
+            query = query.filter(due__gte=lower_bound)
+        try:
+            rows = await query.order_by("due").all()
+        finally:
+            self._loading_until = None
+        tasks: list[TimerTask] = []
+        for row in rows:
+            if row.id in self._loaded:
+                continue
+            task = self._task_from_row(row)
+            if task:
+                self._loaded[task.pk] = task
+                tasks.append(task)
+        self.timer._readd_tasks(tasks)
+        self._loaded_until = horizon
+        logger.debug(f"Loaded {len(rows)} persistent timer tasks until {horizon}")
+
+    def _task_from_row(
+        self, row: "ScheduledTask"
+    ) -> typing.Optional[PersistentTimerTask]:
+        try:
+            callback = load_module_func(row.callback, TimerCallback)  # type: ignore
+        except ModulePathNotFound:
+            logger.error(
+                f"Unable to load the callback {row.callback} for persistent timer task {row.id}."
+            )
+            return None
+        return PersistentTimerTask(
+            self,
+            row.id,
+            row.callback,
+            _as_aware(row.due),
+            callback,
+            args=row.args,
+            kwargs=row.kwargs,
+            repeat=timedelta(seconds=row.repeat) if row.repeat else None,
+        )
+
+    def _in_memory(self, time: datetime) -> bool:
+        """Whether a task due at this time belongs in memory rather than only the database."""
+        return any(
+            until is not None and time < until
+            for until in (self._loaded_until, self._loading_until)
+        )
+
+    def _add(self, task: PersistentTimerTask) -> PersistentTimerTask:
+        """Put a task in memory, or get the one already there if its row was loaded."""
+        loaded = self._loaded.get(task.pk)
+        if loaded is not None:
+            return loaded
+        self._loaded[task.pk] = task
+        self.timer._readd_task(task)
+        return task
+
+    async def schedule(
+        self,
+        time: datetime,
+        callback: typing.Union[str, TimerCallback],
+        args: typing.Optional[list[CallableArgs]] = None,
+        kwargs: typing.Optional[dict[str, CallableKwargs]] = None,
+        repeat: typing.Optional[timedelta] = None,
+    ) -> PersistentTimerTask:
+        from .models import ScheduledTask
+
+        callback_path = callback_to_path(callback)
+        if isinstance(callback, str):
+            callback = load_module_func(callback, TimerCallback)  # type: ignore
+        if time.tzinfo is None:
+            time = time.astimezone(self.timer.timezone)
+        row = await ScheduledTask.objects.create(
+            due=time.astimezone(timezone.utc),
+            callback=callback_path,
+            args=args if args else [],
+            kwargs=kwargs if kwargs else {},
+            repeat=repeat.total_seconds() if repeat else None,
+        )
+        task = PersistentTimerTask(
+            self,
+            row.id,
+            callback_path,
+            time,
+            callback,
+            args=args,
+            kwargs=kwargs,
+            repeat=repeat,
+        )
+        # Tasks beyond the loaded window will be picked up when their window is loaded.
+        # A window loading while the row was created may have picked it up already.
+        if self._in_memory(time):
+            task = self._add(task)
+        return task
+
+    async def _update_due(self, task: PersistentTimerTask) -> None:
+        from .models import ScheduledTask
+
+        await ScheduledTask.objects.filter(id=task.pk).update(
+            due=task.time.astimezone(timezone.utc)
+        )
+
+    async def _delete(self, task: PersistentTimerTask) -> None:
+        from .models import ScheduledTask
+
+        self._loaded.pop(task.pk, None)
+        await ScheduledTask.objects.filter(id=task.pk).delete()
+
+    def _delete_many(self, tasks: list[TimerTask]) -> None:
+        """Delete the rows of any persistent tasks in a batch of cancelled tasks."""
+        from .models import ScheduledTask
+
+        pks = [task.pk for task in tasks if isinstance(task, PersistentTimerTask)]
+        if not pks:
+            return
+        for pk in pks:
+            self._loaded.pop(pk, None)
+        self._spawn(ScheduledTask.objects.filter(id__in=pks).delete())
+
+    def _spawn(
+        self, coro: typing.Coroutine[typing.Any, typing.Any, typing.Any]
+    ) -> None:
+        """Run a database write in the background, keeping a reference until it's done."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+
+def _as_aware(time: datetime) -> datetime:
+    # Some databases (like SQLite) don't store the timezone, everything is stored as UTC
+    if time.tzinfo is None:
+        return time.replace(tzinfo=timezone.utc)
+    return time
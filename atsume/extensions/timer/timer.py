@@ -0,0 +1,529 @@
+import asyncio
+import enum
+import math
+import time as time_module
+import types
+import typing
+from datetime import datetime, timedelta
+
+import alluka
+import tanjun
+import logging
+
+from atsume.component.manager import manager as component_manager
+from atsume.settings import settings
+from .engine import AbstractTimerEngine, HeapEngine, import_engine_class
+from .metrics import TimerMetrics
+
+if typing.TYPE_CHECKING:
+    from .store import TimerStore, PersistentTimerTask
+
+logger = logging.getLogger(__name__)
+
+CallableArgs = typing.TypeVar("CallableArgs")
+CallableKwargs = typing.TypeVar("CallableKwargs")
+
+
+_NO_KWARGS: typing.Mapping[str, typing.Any] = types.MappingProxyType({})
+
+
+class CatchUpPolicy(str, enum.Enum):
+    """
+    What a repeating task should do when it falls behind and misses runs, such as when the
+    event loop was blocked or the Timer was busy.
+    """
+
+    SKIP = "skip"
+    """Drop the missed runs and wait for the next run on the task's schedule."""
+    COALESCE = "coalesce"
+    """Run once right away for all the missed runs, then continue the schedule from then."""
+    FIRE_ALL = "fire_all"
+    """Run once for every missed run, back to back."""
+
+
+class TimerTaskSpec(typing.NamedTuple):
+    """The arguments for scheduling a task, for use with :py:meth:`Timer.schedule_many`."""
+
+    time: datetime
+    callback: typing.Callable[..., typing.Awaitable[None]]
+    args: typing.Optional[list[typing.Any]] = None
+    kwargs: typing.Optional[dict[str, typing.Any]] = None
+    repeat: typing.Optional[timedelta] = None
+    catch_up: typing.Optional[CatchUpPolicy] = None
+
+
+class PersistenceNotEnabled(Exception):
+    def __init__(self) -> None:
+        super().__init__(
+            'Persistent timer tasks require "atsume.extensions.timer" in your COMPONENTS.'
+        )
+
+
+class TimerTask:
+    """
+    A handle to a task scheduled on the :py:class:`Timer`. It can be used to check whether the
+    task has run yet, or to cancel it.
+
+    Each task also keeps track of how it has been running. `run_count` is the number of
+    times it has started, `last_lateness` and `max_lateness` are how many seconds after its
+    scheduled time it started (most recently and at worst), and `missed_runs` counts the runs
+    a repeating task skipped or coalesced after falling behind.
+    """
+
+    # Slotted since a Timer may be holding onto a very large number of these
+    __slots__ = (
+        "timer",
+        "time",
+        "_callback",
+        "repeat",
+        "_cancelled",
+        "_run",
+        "args",
+        "kwargs",
+        "catch_up",
+        "run_count",
+        "missed_runs",
+        "last_lateness",
+        "max_lateness",
+        "_deadline",
+        "_handle",
+    )
+
+    def __init__(
+        self,
+        timer: "Timer",
+        time: datetime,
+        callback: typing.Callable[..., typing.Awaitable[None]],
+        args: typing.Optional[list[CallableArgs]] = None,
+        kwargs: typing.Optional[dict[str, CallableKwargs]] = None,
+        repeat: typing.Optional[timedelta] = None,
+        catch_up: typing.Optional[CatchUpPolicy] = None,
+    ) -> None:
+        self.timer = timer
+        self.time = time
+        self._callback = callback
+        self.repeat = repeat
+        self._cancelled = False
+        self._run = False
+        # Tasks without arguments share the same empty containers
+        self.args: typing.Sequence[CallableArgs] = args if args else ()
+        self.kwargs: typing.Mapping[str, CallableKwargs] = (
+            kwargs if kwargs else _NO_KWARGS
+        )
+        self.catch_up = catch_up
+        self.run_count = 0
+        self.missed_runs = 0
+        self.last_lateness: typing.Optional[float] = None
+        self.max_lateness = 0.0
+        # Used by the Timer's engine to order and find this task, on the Timer's clock
+        self._deadline = timer._to_deadline(time)
+        self._handle: typing.Any = None
+
+    async def callback(self) -> None:
+        if self._cancelled:
+            logger.warning(
+                f"Callback was attempted on a cancelled task {self._callback}!"
+            )
+            return
+
+        if not self.repeat:
+            self._run = True  # Done in case the running task wants to know if it should cancel it
+        error = timed_out = False
+        start = time_module.perf_counter()
+        job_timeout = self._job_timeout
+        try:
+            if job_timeout is None:
+                await self._callback(*self.args, **self.kwargs)
+            else:
+                await asyncio.wait_for(
+                    self._callback(*self.args, **self.kwargs), job_timeout
+                )
+        except asyncio.TimeoutError:
+            timed_out = True
+            logger.warning(
+                f"Timer task {self._callback} timed out after {job_timeout} seconds."
+            )
+        except asyncio.CancelledError:
+            if self.timer._cancel_requested():
+                raise
+            # Like awaiting something that was cancelled, which shouldn't stop the Timer
+            error = True
+            logger.exception(f"Timer task {self._callback} was cancelled.")
+        except Exception:
+            error = True
+            logger.exception(f"Timer task {self._callback} raised an exception.")
+        self.timer.metrics._record_run(
+            self._callback,
+            time_module.perf_counter() - start,
+            error=error,
+            timed_out=timed_out,
+        )
+
+        if self.repeat and not self._cancelled:
+            # Readd instead of recreate so API doesn't lose handler to the task
+            self.timer._reschedule_repeating(self)
+
+    @property
+    def _job_timeout(self) -> typing.Optional[float]:
+        """Seconds this task may run for, or None for no limit."""
+        return self.timer.job_timeout
+
+    def _record_start(self, lateness: float) -> None:
+        self.run_count += 1
+        self.last_lateness = lateness
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+    @property
+    def has_run(self) -> bool:
+        return self._run
+
+    def cancel(self) -> None:
+        self._cancel()
+
+    def _cancel(self, unregister: bool = True) -> bool:
+        """Cancel the task, returning whether it wasn't already cancelled or run."""
+        if self._cancelled:
+            logger.warning(f"Callback was cancelled twice {self._callback}!")
+            return False
+        if self._run:
+            logger.warning(f"Cancelling task that was already run {self._callback}!")
+            return False
+        self._cancelled = True
+        if unregister:
+            self.timer.cancel(self)
+        return True
+
+    def __repr__(self) -> str:
+        return f"TimerTask({self.time}, {self._callback})"
+
+    def __bool__(self) -> bool:
+        # This is so you can do if timer_obj and if it's true, cancel it
+        return not self.has_run
+
+
+class Timer:
+    """
+    Runs async functions at a given time. Pending tasks are kept in an engine (a heap
+    by default), and a single wake-up task sleeps until the earliest deadline.
+
+    Deadlines are kept on the monotonic clock, so changes to the system clock don't make
+    tasks run early, late, or twice. Repeating tasks stay on their original schedule no
+    matter how long each run takes, and `catch_up` decides what they do after falling behind.
+
+    Due tasks are handed to a pool of `max_concurrent_jobs` workers. With one worker
+    (the default) tasks run one after another, with more a slow task no longer holds
+    up the other tasks that became due at the same time.
+
+    :param engine: The engine to store pending tasks in.
+    :param max_concurrent_jobs: The maximum number of tasks to run at the same time.
+    :param job_timeout: Seconds a task may run for before it is cancelled, or None for no limit.
+    :param late_start_threshold: Log a warning for tasks that start this many seconds late.
+    :param catch_up: The default catch up policy for repeating tasks.
+    """
+
+    def __init__(
+        self,
+        engine: typing.Optional[AbstractTimerEngine] = None,
+        max_concurrent_jobs: int = 1,
+        job_timeout: typing.Optional[float] = None,
+        late_start_threshold: float = 1.0,
+        catch_up: CatchUpPolicy = CatchUpPolicy.COALESCE,
+    ) -> None:
+        if max_concurrent_jobs < 1:
+            raise ValueError(
+                "Timer needs to be able to run at least one job at a time."
+            )
+        self._engine = engine if engine is not None else HeapEngine()
+        self._engine.attach(self)
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.job_timeout = job_timeout
+        self.late_start_threshold = late_start_threshold
+        self.catch_up = catch_up
+        self.late_starts = 0
+        """The number of tasks that started later than the `late_start_threshold`."""
+        self.metrics = TimerMetrics(self)
+        """Metrics about the tasks this Timer has run and is waiting to run."""
+        self._queue: asyncio.Queue[TimerTask] = asyncio.Queue()
+        self._workers: list[asyncio.Task[None]] = []
+        self._current_timer: typing.Optional[asyncio.Task[None]] = None
+        # The deadline the current timer task is waiting for
+        self._next_wakeup: typing.Optional[float] = None
+        self._store: typing.Optional["TimerStore"] = None
+        self.timezone = datetime(2020, 1, 1, 1).astimezone().tzinfo
+        # The difference between the wall clock and the monotonic clock
+        self._clock_offset = 0.0
+        self._clock_offset_taken = -math.inf
+        self._has_started = False  # Wait until the bot has started to send off tasks
+        self._closing = False
+
+    @property
+    def tasks(self) -> list[TimerTask]:
+        """A snapshot of the pending tasks, ordered by when they will run."""
+        return self._engine.tasks()
+
+    def _now(self) -> float:
+        return time_module.monotonic()
+
+    def _to_deadline(self, time: datetime) -> float:
+        """Convert a wall clock time to a deadline on the monotonic clock."""
+        now = self._now()
+        # Reuse the offset between the clocks for a little while, so tasks scheduled for
+        # the same time get the same deadline and run in the order they were scheduled.
+        if now - self._clock_offset_taken > 1.0:
+            self._clock_offset = datetime.now(self.timezone).timestamp() - now
+            self._clock_offset_taken = now
+        if time.tzinfo is None:
+            time = time.astimezone(self.timezone)
+        return time.timestamp() - self._clock_offset
+
+    def _from_deadline(self, deadline: float) -> datetime:
+        """Convert a deadline on the monotonic clock back to a wall clock time."""
+        return datetime.fromtimestamp(deadline + self._clock_offset, self.timezone)
+
+    def _reschedule_repeating(self, task: TimerTask) -> None:
+        """Readd a repeating task for its next run, following its catch up policy."""
+        assert task.repeat is not None
+        period = task.repeat.total_seconds()
+        now = self._now()
+        next_deadline = task._deadline + period
+        policy = task.catch_up if task.catch_up else self.catch_up
+        if next_deadline <= now and policy != CatchUpPolicy.FIRE_ALL:
+            missed = math.floor((now - next_deadline) / period) + 1
+            if policy == CatchUpPolicy.SKIP:
+                task.missed_runs += missed
+                next_deadline += missed * period
+            else:
+                # The run right now stands in for all the missed ones
+                task.missed_runs += missed - 1
+                next_deadline = now
+        task.time += timedelta(seconds=next_deadline - task._deadline)
+        task._deadline = next_deadline
+        self._readd_task(task)
+
+    def _schedule_wakeup(self) -> None:
+        """
+        Make sure the timer task is waiting for the earliest deadline. The timer task is only
+        replaced if the earliest deadline moved earlier, waking up for a task that has since
+        been cancelled is harmless.
+        """
+        if not self._has_started:
+            return
+        next_deadline = self._engine.next_deadline()
+        if next_deadline is None:
+            return
+        if (
+            self._current_timer
+            and self._next_wakeup is not None
+            and self._next_wakeup <= next_deadline
+        ):
+            return
+        if self._current_timer:
+            self._current_timer.cancel()
+        self._next_wakeup = next_deadline
+        self._current_timer = asyncio.create_task(self._timer_job(next_deadline))
+
+    async def _timer_job(self, deadline: float) -> None:
+        """Wait until the next task and queue up everything that is due"""
+        wait_time_secs = deadline - self._now()
+        if wait_time_secs > 0:
+            await asyncio.sleep(wait_time_secs)
+        self._current_timer = None
+        self._next_wakeup = None
+        for job in self._engine.pop_due(self._now()):
+            self._queue.put_nowait(job)
+        self._schedule_wakeup()
+
+    async def _worker(self) -> None:
+        """Run queued tasks until the Timer is closed"""
+        while True:
+            job = await self._queue.get()
+            lateness = self._now() - job._deadline
+            job._record_start(lateness)
+            self.metrics._record_start(lateness)
+            if lateness > self.late_start_threshold:
+                self.late_starts += 1
+                logger.warning(
+                    f"Timer task {job} started {lateness:.2f} seconds late, "
+                    f"{self._queue.qsize()} tasks are waiting to run."
+                )
+            try:
+                await job.callback()
+            except asyncio.CancelledError:
+                if self._cancel_requested():
+                    raise
+                logger.exception(f"Timer task {job} was cancelled while running.")
+            except Exception:
+                logger.exception(f"Timer task {job} failed to run.")
+            finally:
+                self._queue.task_done()
+
+    def _cancel_requested(self) -> bool:
+        """
+        Whether the running worker is being cancelled, rather than a task raising a
+        CancelledError that came from something it awaited.
+        """
+        task = asyncio.current_task()
+        cancelling = getattr(task, "cancelling", None)
+        if cancelling is not None:
+            return typing.cast(int, cancelling()) > 0
+        # Python 3.10 can't tell the two apart, so only closing stops the workers
+        return self._closing
+
+    def schedule_task(
+        self,
+        time: datetime,
+        callback: typing.Callable[..., typing.Awaitable[None]],
+        args: typing.Optional[list[CallableArgs]] = None,
+        kwargs: typing.Optional[dict[str, CallableKwargs]] = None,
+        repeat: typing.Optional[timedelta] = None,
+        catch_up: typing.Optional[CatchUpPolicy] = None,
+    ) -> TimerTask:
+        if time.tzinfo is None:
+            time = time.astimezone(self.timezone)
+
+        if kwargs and args:
+            callback(*args, **kwargs)
+
+        task = TimerTask(
+            self,
+            time,
+            callback,
+            repeat=repeat,
+            args=args,
+            kwargs=kwargs,
+            catch_up=catch_up,
+        )
+        self._engine.push(task)
+        self._schedule_wakeup()
+        return task
+
+    def schedule_many(
+        self,
+        specs: typing.Iterable[typing.Union[TimerTaskSpec, tuple[typing.Any, ...]]],
+    ) -> list[TimerTask]:
+        """
+        Schedule a batch of tasks at once. The tasks are added to the engine together and
+        the timer task is rescheduled at most once, which is much cheaper than calling
+        :py:meth:`schedule_task` in a loop.
+
+        :param specs: A :py:class:`TimerTaskSpec` (or a tuple of its fields) for each task.
+        :return: The tasks, in the same order as the specs.
+        """
+        tasks = []
+        for spec in specs:
+            if not isinstance(spec, TimerTaskSpec):
+                spec = TimerTaskSpec(*spec)
+            tasks.append(
+                TimerTask(
+                    self,
+                    spec.time,
+                    spec.callback,
+                    repeat=spec.repeat,
+                    args=spec.args,
+                    kwargs=spec.kwargs,
+                    catch_up=spec.catch_up,
+                )
+            )
+        self._readd_tasks(tasks)
+        return tasks
+
+    async def schedule_persistent_task(
+        self,
+        time: datetime,
+        callback: typing.Union[str, typing.Callable[..., typing.Awaitable[None]]],
+        args: typing.Optional[list[CallableArgs]] = None,
+        kwargs: typing.Optional[dict[str, CallableKwargs]] = None,
+        repeat: typing.Optional[timedelta] = None,
+    ) -> "PersistentTimerTask":
+        """
+        Schedule a task that is stored in the database and survives restarts. The callback
+        must be a module level async function (or the import path to one), and the args and
+        kwargs must be JSON serializable.
+        """
+        if not self._store:
+            raise PersistenceNotEnabled()
+        return await self._store.schedule(
+            time, callback, args=args, kwargs=kwargs, repeat=repeat
+        )
+
+    def _readd_task(self, task: TimerTask) -> None:
+        self._engine.push(task)
+        self._schedule_wakeup()
+
+    def _readd_tasks(self, tasks: list[TimerTask]) -> None:
+        self._engine.push_many(tasks)
+        self._schedule_wakeup()
+
+    def cancel(self, task: TimerTask) -> None:
+        # The timer task is left alone, if it wakes up for this task it will find nothing
+        # to run and go back to sleep until the next deadline.
+        self._engine.remove(task)
+
+    def cancel_many(self, tasks: typing.Iterable[TimerTask]) -> None:
+        """
+        Cancel a batch of tasks at once. Persistent tasks have their rows deleted with a
+        single query.
+        """
+        cancelled = []
+        for task in tasks:
+            if task._cancel(unregister=False):
+                self._engine.remove(task)
+                cancelled.append(task)
+        if self._store:
+            self._store._delete_many(cancelled)
+
+    def _start(self) -> None:
+        if self._has_started:
+            logger.warning("Timer was started again!")
+            return
+        self._has_started = True
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrent_jobs)
+        ]
+        self._schedule_wakeup()
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._current_timer:
+            self._current_timer.cancel()
+            self._current_timer = None
+            self._next_wakeup = None
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        for task in self._engine.clear():
+            task._cancel(unregister=False)
+        while not self._queue.empty():
+            self._queue.get_nowait()._cancel(unregister=False)
+        if self._store:
+            await self._store.close()
+
+
+def hook_extension(c: tanjun.Client) -> None:
+    engine_class = import_engine_class(settings.TIMER_ENGINE_CLASS)
+    timer = Timer(
+        engine=engine_class(),
+        max_concurrent_jobs=settings.TIMER_MAX_CONCURRENT_JOBS,
+        job_timeout=settings.TIMER_JOB_TIMEOUT,
+        late_start_threshold=settings.TIMER_LATE_START_THRESHOLD,
+        catch_up=CatchUpPolicy(settings.TIMER_CATCH_UP_POLICY),
+    )
+    c.set_type_dependency(Timer, timer)
+    c.set_type_dependency(TimerMetrics, timer.metrics)
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.STARTED)
+    async def on_started(timer: alluka.Injected[Timer]) -> None:
+        timer._start()
+        # Persistent tasks are only available if the timer component is loaded
+        if component_manager.get_config_from_models_path(
+            "atsume.extensions.timer.models"
+        ):
+            from .store import TimerStore
+
+            timer._store = TimerStore(timer, settings.TIMER_PERSISTENT_WINDOW)
+            await timer._store.start()
+
+    @c.with_client_callback(tanjun.ClientCallbackNames.CLOSING)
+    async def on_closing(timer: alluka.Injected[Timer]) -> None:
+        await timer.close()
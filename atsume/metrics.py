@@ -0,0 +1,201 @@
+"""
+Lightweight building blocks for the metrics Atsume collects about itself. Everything here is
+fixed-size and updated with plain attribute writes, so recording a value is cheap enough to
+do on every event.
+
+"""
+
+import bisect
+import typing
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+"""Default histogram buckets, in seconds."""
+
+
+class Histogram:
+    """
+    A histogram with fixed bucket boundaries. Each bucket counts the values less than or equal
+    to its boundary (and greater than the previous one), with a final bucket for everything
+    larger than the last boundary.
+
+    :param buckets: The upper boundary of each bucket.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: typing.Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile (between 0 and 1) of the recorded values. The result is the upper
+        boundary of the bucket the quantile falls in, or the largest recorded value if it falls
+        past the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for boundary, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return boundary
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        """The histogram's current state as a plain dictionary."""
+        return {
+            "buckets": dict(zip(self.buckets + (float("inf"),), self.counts)),
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+        }
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"Histogram(count={self.count}, mean={self.mean:.4f}, max={self.max:.4f})"
+        )
+
+
+Labels = typing.Mapping[str, str]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape_label(value)}"' for key, value in labels.items()]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusWriter:
+    """Builds a page of metrics in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lines: list[str] = []
+
+    def _header(self, name: str, kind: str, description: str) -> None:
+        self._lines.append(f"# HELP {name} {description}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def counter(
+        self,
+        name: str,
+        description: str,
+        samples: typing.Iterable[tuple[Labels, float]],
+    ) -> None:
+        """Write a counter with a value for each set of labels."""
+        self._header(name, "counter", description)
+        for labels, value in samples:
+            self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        samples: typing.Iterable[tuple[Labels, float]],
+    ) -> None:
+        """Write a gauge with a value for each set of labels."""
+        self._header(name, "gauge", description)
+        for labels, value in samples:
+            self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        samples: typing.Iterable[tuple[Labels, Histogram]],
+    ) -> None:
+        """Write a :py:class:`Histogram` for each set of labels."""
+        self._header(name, "histogram", description)
+        for labels, histogram in samples:
+            cumulative = 0
+            for boundary, count in zip(
+                histogram.buckets + (float("inf"),), histogram.counts
+            ):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    labels, f'le="{_format_value(boundary)}"'
+                )
+                self._lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            formatted = _format_labels(labels)
+            self._lines.append(f"{name}_sum{formatted} {_format_value(histogram.sum)}")
+            self._lines.append(f"{name}_count{formatted} {histogram.count}")
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+Collector = typing.Callable[[PrometheusWriter], None]
+
+_collectors: list[Collector] = []
+
+
+def add_collector(collector: Collector) -> None:
+    """
+    Add a function that writes metrics to the Prometheus page served by the metrics
+    server extension.
+    """
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def remove_collector(collector: Collector) -> None:
+    """Remove a function added with :py:func:`add_collector`."""
+    if collector in _collectors:
+        _collectors.remove(collector)
+
+
+def render_prometheus() -> str:
+    """Run every collector and render their metrics in the Prometheus text format."""
+    writer = PrometheusWriter()
+    for collector in _collectors:
+        collector(writer)
+    return writer.render()
@@ -40,6 +40,9 @@ class SettingsPlugin(Plugin):
             return None
 
         property_name = fullname[len("atsume.settings.Settings.") :]
+        # Only uppercase names are settings, the rest are the Settings object's own members
+        if not property_name.isupper():
+            return None
 
         def func(ctx: AttributeContext) -> mypy.types.Type:
             api = ctx.api
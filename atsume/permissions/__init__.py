@@ -2,7 +2,8 @@
 Atsume can limit components to run only in the guilds (or DM channel) you specify.
 You can load the default `SettingsPermissions` class, which lets you configure permissions
 from your local.py or settings.py. You can also subclass `AbstractComponentPermissions`
-and write your own permissions handler.
+(or `AbstractAsyncComponentPermissions` if checks need to await something) and write your
+own permissions handler, and wrap it in `CachedPermissions` to cache its results.
 
 """
 
@@ -13,19 +14,47 @@ import typing
 import tanjun
 
 from .settings_permissions import SettingsPermissions
-from .base import AbstractComponentPermissions
+from .base import (
+    AbstractComponentPermissions,
+    AbstractAsyncComponentPermissions,
+    ComponentPermissions,
+    add_change_listener,
+    remove_change_listener,
+    notify_permissions_changed,
+)
+from .cached_permissions import CachedPermissions
+from .database.permissions import (
+    DatabasePermissions,
+    GuildComponentIndex,
+    guild_components,
+)
+from .index import CompiledPermissions, PermissionIndex, permission_index
 
 __all__ = [
     "SettingsPermissions",
     "AbstractComponentPermissions",
+    "AbstractAsyncComponentPermissions",
+    "CachedPermissions",
+    "DatabasePermissions",
+    "GuildComponentIndex",
+    "guild_components",
+    "ComponentPermissions",
+    "add_change_listener",
+    "remove_change_listener",
+    "notify_permissions_changed",
+    "CompiledPermissions",
+    "PermissionIndex",
+    "permission_index",
     "import_permission_class",
     "permission_check",
+    "check_guild",
+    "check_dm",
 ]
 
 
 def import_permission_class(
     module_path: str,
-) -> typing.Type[AbstractComponentPermissions]:
+) -> typing.Type[ComponentPermissions]:
     """
     Import the permissions class from a given module path. Used to load the user's configured permissions class
     from their settings.
@@ -35,23 +64,53 @@ def import_permission_class(
     """
     parts = module_path.split(".")
     module = importlib.import_module(".".join(parts[:-1]))
-    permissions: typing.Type[AbstractComponentPermissions] = getattr(module, parts[-1])
-    if issubclass(permissions, AbstractComponentPermissions):
+    permissions: typing.Type[ComponentPermissions] = getattr(module, parts[-1])
+    if issubclass(
+        permissions, (AbstractComponentPermissions, AbstractAsyncComponentPermissions)
+    ):
         return permissions
     raise ValueError(
         f"Permissions class {module_path} does not implement {AbstractComponentPermissions.__name__}"
     )
 
 
+async def check_guild(permissions: ComponentPermissions, guild_id: int) -> bool:
+    """Check either kind of permissions object for a guild."""
+    if isinstance(permissions, AbstractAsyncComponentPermissions):
+        return await permissions.allow_in_guild(guild_id)
+    return permissions.allow_in_guild(guild_id)
+
+
+async def check_dm(permissions: ComponentPermissions) -> bool:
+    """Check either kind of permissions object for DMs."""
+    if isinstance(permissions, AbstractAsyncComponentPermissions):
+        return await permissions.allow_in_dm()
+    return permissions.allow_in_dm()
+
+
 def permission_check(
-    permissions: AbstractComponentPermissions,
+    permissions: ComponentPermissions,
 ) -> typing.Any:
     """
-    A function that takes an :py:class:`AbstractComponentPermissions` object and returns a Tanjun check that uses it.
+    A function that takes an :py:class:`AbstractComponentPermissions` or
+    :py:class:`AbstractAsyncComponentPermissions` object and returns a Tanjun check that uses it.
 
     :param permissions: The permissions object to use
     :returns: An async callable that can be used as a Tanjun check.
     """
+    if isinstance(permissions, AbstractAsyncComponentPermissions):
+        async_permissions = permissions
+
+        async def async_check(
+            ctx: tanjun.abc.Context, *args: typing.Any, **kwargs: typing.Any
+        ) -> bool:
+            if ctx.guild_id:
+                return await async_permissions.allow_in_guild(ctx.guild_id)
+            else:
+                return await async_permissions.allow_in_dm()
+
+        return async_check
+
     async def check(
         ctx: tanjun.abc.Context, *args: typing.Any, **kwargs: typing.Any
     ) -> bool:
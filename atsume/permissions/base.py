@@ -1,4 +1,5 @@
 import abc
+import typing
 
 
 class AbstractComponentPermissions(abc.ABC):
@@ -21,3 +22,62 @@ class AbstractComponentPermissions(abc.ABC):
     def allow_in_dm(self) -> bool:
         """Should this Component be allowed to run in DMs?"""
         ...
+
+
+class AbstractAsyncComponentPermissions(abc.ABC):
+    """
+    Asynchronous version of :py:class:`AbstractComponentPermissions`, for permissions that
+    have to be looked up somewhere else, such as a database or web API. Wrap it with
+    :py:class:`atsume.permissions.CachedPermissions` to avoid a lookup on every check.
+    """
+
+    @abc.abstractmethod
+    def __init__(self, component_path: str):
+        ...
+
+    @abc.abstractmethod
+    async def allow_in_guild(self, guild_id: int) -> bool:
+        """Should this Component be allowed to run in the given guild ID?"""
+        ...
+
+    @abc.abstractmethod
+    async def allow_in_dm(self) -> bool:
+        """Should this Component be allowed to run in DMs?"""
+        ...
+
+
+ComponentPermissions = typing.Union[
+    AbstractComponentPermissions, AbstractAsyncComponentPermissions
+]
+"""Either kind of permissions object."""
+
+
+PermissionsChangeListener = typing.Callable[[typing.Optional[int]], None]
+
+_change_listeners: list[PermissionsChangeListener] = []
+
+
+def add_change_listener(listener: PermissionsChangeListener) -> None:
+    """
+    Register a function to call whenever permissions change. It's called with the ID of the
+    guild whose permissions changed, or None if they could have changed anywhere.
+    """
+    _change_listeners.append(listener)
+
+
+def remove_change_listener(listener: PermissionsChangeListener) -> None:
+    try:
+        _change_listeners.remove(listener)
+    except ValueError:
+        pass
+
+
+def notify_permissions_changed(guild_id: typing.Optional[int] = None) -> None:
+    """
+    Let everything that depends on permissions know that they have changed. Permissions
+    classes that can change while the bot is running should call this after they do.
+
+    :param guild_id: The guild whose permissions changed, or None for every guild.
+    """
+    for listener in list(_change_listeners):
+        listener(guild_id)
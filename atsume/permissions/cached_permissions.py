@@ -0,0 +1,173 @@
+import asyncio
+import collections
+import functools
+import time
+import typing
+import weakref
+
+from atsume.settings import settings
+from .base import (
+    AbstractAsyncComponentPermissions,
+    AbstractComponentPermissions,
+    ComponentPermissions,
+    notify_permissions_changed,
+)
+
+# The cache key used for the DM permission, guilds are keyed by their ID
+_DM: typing.Final = -1
+
+
+class CachedPermissions(AbstractAsyncComponentPermissions):
+    """
+    Caches the results of another permissions class. Allowed results are kept for `ttl`
+    seconds and denied results for `negative_ttl` seconds. When several checks miss the cache
+    for the same guild at once, only one of them asks the backend and the rest wait for its
+    answer.
+
+    Set `COMPONENT_PERMISSIONS_CLASS` to `"atsume.permissions.CachedPermissions"` and
+    `COMPONENT_PERMISSIONS_CACHE_BACKEND` to the permissions class to cache.
+
+    Call :py:meth:`invalidate` after changing a guild's permissions in the backend, or
+    :py:meth:`invalidate_all` to do it for every component.
+
+    :param component_path: The module path of the component.
+    :param backend: The permissions object to cache. Defaults to an instance of
+        `COMPONENT_PERMISSIONS_CACHE_BACKEND`.
+    :param ttl: Seconds to cache an allowed result. Defaults to `COMPONENT_PERMISSIONS_CACHE_TTL`.
+    :param negative_ttl: Seconds to cache a denied result. Defaults to
+        `COMPONENT_PERMISSIONS_CACHE_NEGATIVE_TTL`.
+    :param max_size: The most results to cache, the least recently used is dropped to make
+        room. Defaults to `COMPONENT_PERMISSIONS_CACHE_SIZE`.
+    """
+
+    _instances: "weakref.WeakSet[CachedPermissions]" = weakref.WeakSet()
+
+    def __init__(
+        self,
+        component_path: str,
+        backend: typing.Optional[ComponentPermissions] = None,
+        ttl: typing.Optional[float] = None,
+        negative_ttl: typing.Optional[float] = None,
+        max_size: typing.Optional[int] = None,
+    ) -> None:
+        self.component_path = component_path
+        if backend is None:
+            from . import import_permission_class
+
+            if not settings.COMPONENT_PERMISSIONS_CACHE_BACKEND:
+                raise ValueError(
+                    "CachedPermissions requires COMPONENT_PERMISSIONS_CACHE_BACKEND to be set."
+                )
+            backend = import_permission_class(
+                settings.COMPONENT_PERMISSIONS_CACHE_BACKEND
+            )(component_path)
+        self.backend = backend
+        self._backend_is_async = isinstance(backend, AbstractAsyncComponentPermissions)
+        self.ttl = ttl if ttl is not None else settings.COMPONENT_PERMISSIONS_CACHE_TTL
+        self.negative_ttl = (
+            negative_ttl
+            if negative_ttl is not None
+            else settings.COMPONENT_PERMISSIONS_CACHE_NEGATIVE_TTL
+        )
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else settings.COMPONENT_PERMISSIONS_CACHE_SIZE
+        )
+        # Key to (result, expiry time), least recently used first
+        self._cache: collections.OrderedDict[
+            int, tuple[bool, float]
+        ] = collections.OrderedDict()
+        self._pending: dict[int, asyncio.Future[bool]] = {}
+        self.hits = 0
+        self.misses = 0
+        CachedPermissions._instances.add(self)
+
+    async def allow_in_guild(self, guild_id: int) -> bool:
+        return await self._get(guild_id)
+
+    async def allow_in_dm(self) -> bool:
+        return await self._get(_DM)
+
+    def peek_guild(self, guild_id: int) -> typing.Optional[bool]:
+        """The cached result for a guild, or None if it isn't cached."""
+        entry = self._cache.get(guild_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    async def _get(self, key: int) -> bool:
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] >= time.monotonic():
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._lookup(key))
+            self._pending[key] = pending
+            pending.add_done_callback(functools.partial(self._finish_lookup, key))
+        # Shielded so one cancelled check doesn't cancel the lookup the others are waiting on
+        return await asyncio.shield(pending)
+
+    async def _lookup(self, key: int) -> bool:
+        if self._backend_is_async:
+            backend = typing.cast(AbstractAsyncComponentPermissions, self.backend)
+            if key == _DM:
+                return await backend.allow_in_dm()
+            return await backend.allow_in_guild(key)
+        sync_backend = typing.cast(AbstractComponentPermissions, self.backend)
+        if key == _DM:
+            return sync_backend.allow_in_dm()
+        return sync_backend.allow_in_guild(key)
+
+    def _finish_lookup(self, key: int, future: "asyncio.Future[bool]") -> None:
+        # A lookup that was invalidated while it ran is still returned, but not cached
+        if self._pending.get(key) is not future:
+            return
+        del self._pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self._store(key, future.result())
+
+    def _store(self, key: int, result: bool) -> None:
+        self._cache.pop(key, None)
+        if len(self._cache) >= self.max_size:
+            self._cache.popitem(last=False)
+        ttl = self.ttl if result else self.negative_ttl
+        self._cache[key] = (result, time.monotonic() + ttl)
+
+    def invalidate(self, guild_id: typing.Optional[int] = None) -> None:
+        """
+        Forget the cached result for a guild, or for DMs if no guild is given. A lookup for
+        it that is already running won't be cached.
+        """
+        key = guild_id if guild_id is not None else _DM
+        self._cache.pop(key, None)
+        self._pending.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every cached result."""
+        self._cache.clear()
+        self._pending.clear()
+
+    @classmethod
+    def invalidate_all(cls, guild_id: typing.Optional[int] = None) -> None:
+        """
+        Forget the cached result for a guild (or DMs if no guild is given) for every
+        component, and let anything depending on the permissions know they changed.
+        """
+        for instance in list(cls._instances):
+            instance.invalidate(guild_id)
+        # Listeners only take a guild, so DMs changing is reported as everything changing
+        notify_permissions_changed(guild_id)
+
+    @classmethod
+    def clear_all(cls) -> None:
+        """
+        Forget every cached result for every component, and let anything depending on the
+        permissions know they changed.
+        """
+        for instance in list(cls._instances):
+            instance.clear()
+        notify_permissions_changed()
@@ -0,0 +1,5 @@
+"""
+Stores the components enabled in each guild in the database. Add `atsume.permissions.database`
+to your `COMPONENTS` and set `COMPONENT_PERMISSIONS_CLASS` to
+`"atsume.permissions.DatabasePermissions"` to use it.
+"""
@@ -0,0 +1,11 @@
+from atsume.component import ComponentConfig
+
+
+class PermissionsConfig(ComponentConfig):
+    """
+    Add `atsume.permissions.database` to your `COMPONENTS` to store component permissions
+    in the database.
+    """
+
+    name = "atsume_permissions"
+    verbose_name = "Permissions"
@@ -0,0 +1,14 @@
+from atsume.component.decorators import on_open, on_close
+from .permissions import guild_components
+
+
+@on_open
+async def load_guild_components() -> None:
+    # Components are opened before any commands or events come in, so the index is
+    # ready before the first permissions check.
+    await guild_components.load()
+
+
+@on_close
+async def unload_guild_components() -> None:
+    guild_components.clear()
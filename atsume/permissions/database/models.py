@@ -0,0 +1,18 @@
+# Ormar fields are typed as the value they hold, which mypy can't follow
+# mypy: disable-error-code="assignment"
+import ormar
+
+from atsume.db import Model
+
+
+class GuildComponent(Model):
+    """A component that is enabled in a guild."""
+
+    ormar_config = ormar.OrmarConfig(
+        constraints=[ormar.UniqueColumns("guild_id", "component")]
+    )
+
+    id: int = ormar.Integer(primary_key=True)
+    guild_id: int = ormar.BigInteger(index=True)
+    # The module path of the component, like in COMPONENT_GUILD_PERMISSIONS
+    component: str = ormar.String(max_length=255)
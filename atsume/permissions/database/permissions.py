@@ -0,0 +1,181 @@
+import logging
+import typing
+
+import sqlalchemy
+
+from ..base import AbstractComponentPermissions, notify_permissions_changed
+from ..index import permission_index
+
+logger = logging.getLogger(__name__)
+
+
+def _is_integrity_error(error: BaseException) -> bool:
+    """
+    Whether an error is a constraint violation. Each database driver raises its own
+    exception class for these, so they're recognised by name.
+    """
+    return any(
+        cls.__name__ in ("IntegrityError", "IntegrityConstraintViolationError")
+        for cls in type(error).__mro__
+    )
+
+
+class GuildComponentIndex:
+    """
+    An in-memory copy of the components enabled in each guild, as stored by the
+    `GuildComponent` model. Every component is given a bit, and each guild maps to an int
+    with the bits of its enabled components set, so a check is a dictionary lookup and a
+    bitwise and.
+
+    The index is loaded in bulk when the `atsume.permissions.database` component opens, and
+    kept up to date as components are enabled or disabled through it. Changes made to the
+    table directly aren't seen until :py:meth:`load` is called again.
+    """
+
+    def __init__(self) -> None:
+        self._bits: dict[str, int] = {}
+        self._guilds: dict[int, int] = {}
+        self.loaded = False
+
+    def bit(self, component_path: str) -> int:
+        """The bit for a component, assigning a new one if it doesn't have one yet."""
+        bit = self._bits.get(component_path)
+        if bit is None:
+            bit = self._bits[component_path] = 1 << len(self._bits)
+        return bit
+
+    def allow(self, guild_id: int, bit: int) -> bool:
+        return bool(self._guilds.get(guild_id, 0) & bit)
+
+    def components_in_guild(self, guild_id: int) -> list[str]:
+        """The module paths of the components enabled in a guild."""
+        bits = self._guilds.get(guild_id, 0)
+        return [path for path, bit in self._bits.items() if bits & bit]
+
+    def guilds_with_component(self, component_path: str) -> list[int]:
+        """The IDs of the guilds a component is enabled in."""
+        bit = self.bit(component_path)
+        return [guild_id for guild_id, bits in self._guilds.items() if bits & bit]
+
+    async def load(self) -> None:
+        """Load every enabled component from the database, replacing the current index."""
+        from .models import GuildComponent
+
+        table = GuildComponent.ormar_config.table
+        # Skip building a model for each row, there could be a lot of them
+        rows = await GuildComponent.ormar_config.database.fetch_all(
+            sqlalchemy.select(table.c.guild_id, table.c.component)  # type: ignore[arg-type]
+        )
+        guilds: dict[int, int] = {}
+        for guild_id, component in rows:
+            guilds[guild_id] = guilds.get(guild_id, 0) | self.bit(component)
+        self._guilds = guilds
+        self.loaded = True
+        notify_permissions_changed()
+        logger.debug(f"Loaded {len(rows)} enabled components in {len(guilds)} guilds")
+
+    def clear(self) -> None:
+        self._guilds = {}
+        self.loaded = False
+
+    async def enable(self, guild_id: int, component_path: str) -> None:
+        """Enable a component in a guild."""
+        from .models import GuildComponent
+
+        bit = self.bit(component_path)
+        if self.allow(guild_id, bit):
+            return
+        try:
+            async with GuildComponent.ormar_config.database.transaction():
+                await GuildComponent.objects.create(
+                    guild_id=guild_id, component=component_path
+                )
+        except Exception as e:
+            # Enabled concurrently, the unique constraint kept it to one row
+            if not _is_integrity_error(e):
+                raise
+        self._guilds[guild_id] = self._guilds.get(guild_id, 0) | bit
+        notify_permissions_changed(guild_id)
+
+    async def disable(self, guild_id: int, component_path: str) -> None:
+        """Disable a component in a guild."""
+        from .models import GuildComponent
+
+        bit = self.bit(component_path)
+        await GuildComponent.objects.filter(
+            guild_id=guild_id, component=component_path
+        ).delete()
+        self._set_bits(guild_id, self._guilds.get(guild_id, 0) & ~bit)
+        notify_permissions_changed(guild_id)
+
+    async def set_components(
+        self, guild_id: int, component_paths: typing.Iterable[str]
+    ) -> None:
+        """Replace the components enabled in a guild."""
+        from .models import GuildComponent
+
+        component_paths = set(component_paths)
+        current = set(self.components_in_guild(guild_id))
+        removed = current - component_paths
+        added = component_paths - current
+        # Both writes or neither, the index is only changed once they're committed
+        async with GuildComponent.ormar_config.database.transaction():
+            if removed:
+                await GuildComponent.objects.filter(
+                    guild_id=guild_id, component__in=list(removed)
+                ).delete()
+            if added:
+                await GuildComponent.objects.bulk_create(
+                    [
+                        GuildComponent(guild_id=guild_id, component=path)
+                        for path in added
+                    ]
+                )
+        bits = 0
+        for path in component_paths:
+            bits |= self.bit(path)
+        self._set_bits(guild_id, bits)
+        notify_permissions_changed(guild_id)
+
+    def _set_bits(self, guild_id: int, bits: int) -> None:
+        if bits:
+            self._guilds[guild_id] = bits
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def __len__(self) -> int:
+        """The number of guilds with any components enabled."""
+        return len(self._guilds)
+
+
+guild_components = GuildComponentIndex()
+
+
+class DatabasePermissions(AbstractComponentPermissions):
+    """
+    Permissions implementation that stores the components enabled in each guild in the
+    database. Add `atsume.permissions.database` to your `COMPONENTS` and set
+    `COMPONENT_PERMISSIONS_CLASS` to `"atsume.permissions.DatabasePermissions"` to use it.
+
+    Enable and disable components with `guild_components`:
+
+    .. code-block:: python
+
+        from atsume.permissions import guild_components
+
+        await guild_components.enable(ctx.guild_id, "my_component")
+
+    `COMPONENT_ALL_GUILDS_PERMISSIONS` and `COMPONENT_DM_PERMISSIONS` from the settings still apply.
+    """
+
+    def __init__(self, component_path: str):
+        self.component_path = component_path
+        self._bit = guild_components.bit(component_path)
+
+    def allow_in_dm(self) -> bool:
+        return permission_index.compiled.allow_in_dm(self.component_path)
+
+    def allow_in_guild(self, guild_id: int) -> bool:
+        return guild_components.allow(
+            guild_id, self._bit
+        ) or permission_index.compiled.allow_in_guild(self.component_path, guild_id)
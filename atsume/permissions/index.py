@@ -0,0 +1,113 @@
+import typing
+
+from atsume.settings import settings
+from .base import notify_permissions_changed
+
+_EMPTY_COMPONENTS: frozenset[str] = frozenset()
+_EMPTY_GUILDS: frozenset[int] = frozenset()
+
+
+class CompiledPermissions(typing.NamedTuple):
+    """An immutable snapshot of the component permissions, compiled for fast lookups."""
+
+    all_guilds: frozenset[str]
+    """Components allowed in every guild (and DMs)."""
+    dm: frozenset[str]
+    """Components allowed in DMs."""
+    guild_components: typing.Mapping[int, frozenset[str]]
+    """The components allowed in each guild, not including `all_guilds`."""
+    component_guilds: typing.Mapping[str, frozenset[int]]
+    """The guilds each component is allowed in, not including `all_guilds`."""
+
+    def allow_in_guild(self, component_path: str, guild_id: int) -> bool:
+        return (
+            component_path in self.all_guilds
+            or guild_id in self.component_guilds.get(component_path, _EMPTY_GUILDS)
+        )
+
+    def allow_in_dm(self, component_path: str) -> bool:
+        return component_path in self.dm or component_path in self.all_guilds
+
+    def components_in_guild(self, guild_id: int) -> frozenset[str]:
+        """Every component allowed in the given guild."""
+        return self.all_guilds | self.guild_components.get(guild_id, _EMPTY_COMPONENTS)
+
+
+def compile_permissions(
+    all_guilds: typing.Iterable[str],
+    dm: typing.Iterable[str],
+    guilds: typing.Mapping[int, typing.Iterable[str]],
+) -> CompiledPermissions:
+    guild_components = {
+        guild_id: frozenset(components) for guild_id, components in guilds.items()
+    }
+    component_guilds: dict[str, set[int]] = {}
+    for guild_id, components in guild_components.items():
+        for component in components:
+            component_guilds.setdefault(component, set()).add(guild_id)
+    return CompiledPermissions(
+        all_guilds=frozenset(all_guilds),
+        dm=frozenset(dm),
+        guild_components=guild_components,
+        component_guilds={
+            component: frozenset(guild_ids)
+            for component, guild_ids in component_guilds.items()
+        },
+    )
+
+
+class PermissionIndex:
+    """
+    Holds the compiled component permissions from the `COMPONENT_ALL_GUILDS_PERMISSIONS`,
+    `COMPONENT_DM_PERMISSIONS`, and `COMPONENT_GUILD_PERMISSIONS` settings. The settings are
+    compiled the first time they're needed, and :py:meth:`rebuild` compiles them again.
+    Checks read whichever snapshot is current, and a rebuild swaps in the new snapshot
+    all at once, so a check never sees permissions that are halfway updated.
+    """
+
+    def __init__(self) -> None:
+        self._compiled: typing.Optional[CompiledPermissions] = None
+        # Whether the current permissions came from the settings, instead of being given
+        # to rebuild()
+        self._from_settings = True
+        settings.on_reload(self._on_settings_reload)
+
+    def _on_settings_reload(self) -> None:
+        if self._compiled is not None and self._from_settings:
+            self.rebuild()
+
+    @property
+    def compiled(self) -> CompiledPermissions:
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self.rebuild()
+        return compiled
+
+    def rebuild(
+        self,
+        all_guilds: typing.Optional[typing.Iterable[str]] = None,
+        dm: typing.Optional[typing.Iterable[str]] = None,
+        guilds: typing.Optional[typing.Mapping[int, typing.Iterable[str]]] = None,
+    ) -> CompiledPermissions:
+        """
+        Compile the permissions again. Any of the permissions that aren't given are read from
+        the settings.
+        """
+        compiled = compile_permissions(
+            (
+                all_guilds
+                if all_guilds is not None
+                else settings.COMPONENT_ALL_GUILDS_PERMISSIONS
+            ),
+            dm if dm is not None else settings.COMPONENT_DM_PERMISSIONS,
+            guilds if guilds is not None else settings.COMPONENT_GUILD_PERMISSIONS,
+        )
+        self._from_settings = all_guilds is None and dm is None and guilds is None
+        previous = self._compiled
+        self._compiled = compiled
+        if previous is not None:
+            notify_permissions_changed()
+        return compiled
+
+
+permission_index = PermissionIndex()
@@ -1,36 +1,19 @@
-import logging
-
-from atsume.settings import settings
 from .base import AbstractComponentPermissions
-
-logger = logging.getLogger(__name__)
+from .index import permission_index
 
 
 class SettingsPermissions(AbstractComponentPermissions):
     """
     Permissions implementation that can be configured through Atsume's settings.
+    The settings are compiled into the shared :py:data:`atsume.permissions.index.permission_index`,
+    which is rebuilt when the settings are reloaded with `settings.reload()`.
     """
 
     def __init__(self, component_path: str):
         self.component_path = component_path
 
     def allow_in_dm(self) -> bool:
-        result = (
-            self.component_path in settings.COMPONENT_DM_PERMISSIONS
-            or self.component_path in settings.COMPONENT_ALL_GUILDS_PERMISSIONS
-        )
-        logger.info(
-            f"{'Allowing' if result else 'Denying'} {self.component_path} in DM"
-        )
-        return result
+        return permission_index.compiled.allow_in_dm(self.component_path)
 
     def allow_in_guild(self, guild_id: int) -> bool:
-        result = (
-            self.component_path
-            in settings.COMPONENT_GUILD_PERMISSIONS.get(guild_id, [])
-            or self.component_path in settings.COMPONENT_ALL_GUILDS_PERMISSIONS
-        )
-        logger.info(
-            f"{'Allowing' if result else 'Denying'} {self.component_path} in Guild {guild_id}"
-        )
-        return result
+        return permission_index.compiled.allow_in_guild(self.component_path, guild_id)
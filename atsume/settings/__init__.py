@@ -14,20 +14,102 @@ from atsume.settings import default_settings as _DEFAULT
 from atsume.settings import type_hints
 
 
+def _setting_names(module: typing.Optional[types.ModuleType]) -> typing.Iterator[str]:
+    if module is None:
+        return
+    for name in vars(module):
+        # Like Django, only uppercase names are settings
+        if name.isupper():
+            yield name
+
+
+class SettingsSnapshot:
+    """
+    An immutable copy of the resolved settings. Each setting is a plain attribute, so reading
+    one costs the same as reading any other attribute.
+    """
+
+    def __init__(self, values: typing.Mapping[str, typing.Any]) -> None:
+        self.__dict__.update(values)
+
+    def __setattr__(self, key: str, value: typing.Any) -> None:
+        raise AttributeError("Settings snapshots can't be modified.")
+
+    def __delattr__(self, item: str) -> None:
+        raise AttributeError("Settings snapshots can't be modified.")
+
+    def __getattr__(self, item: str) -> typing.Any:
+        # Only called for settings that don't exist
+        raise AttributeError(f"'Settings' object has no attribute {item!r}")
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.__dict__
+
+    def as_dict(self) -> dict[str, typing.Any]:
+        return dict(self.__dict__)
+
+    def __repr__(self) -> str:
+        return f"SettingsSnapshot({len(self.__dict__)} settings)"
+
+
 class Settings:
     _SETTINGS: typing.Optional[types.ModuleType] = None
     _LOCAL: typing.Optional[types.ModuleType] = None
 
+    def __init__(self) -> None:
+        # Until the project is initialized, only the defaults are available
+        self._snapshot = SettingsSnapshot({})
+        self._reload_listeners: list[typing.Callable[[], None]] = []
+        self._apply(self._resolve())
+
     def _initialize(self, bot_module: str) -> None:
         self._SETTINGS = importlib.import_module(f"{bot_module}.settings")
         self._LOCAL = importlib.import_module(f"{bot_module}.local")
+        self._apply(self._resolve())
+
+    def _resolve(self) -> SettingsSnapshot:
+        """Merge the defaults, settings, and local settings, with the later ones winning."""
+        values = {}
+        for module in (_DEFAULT, self._SETTINGS, self._LOCAL):
+            for name in _setting_names(module):
+                values[name] = getattr(module, name)
+        return SettingsSnapshot(values)
+
+    def _apply(self, snapshot: SettingsSnapshot) -> None:
+        # Copy the settings onto this object so they are found by normal attribute
+        # lookup, without going through __getattr__.
+        for name in self._snapshot.as_dict():
+            self.__dict__.pop(name, None)
+        self.__dict__.update(snapshot.as_dict())
+        self._snapshot = snapshot
+
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        """The current settings as an immutable :py:class:`SettingsSnapshot`."""
+        return self._snapshot
+
+    def reload(self) -> SettingsSnapshot:
+        """
+        Re-import the project's settings and local modules and resolve the settings again.
+        Code that holds onto an older :py:attr:`snapshot` keeps seeing the old settings.
+
+        :return: The new snapshot.
+        """
+        if self._SETTINGS is not None:
+            self._SETTINGS = importlib.reload(self._SETTINGS)
+        if self._LOCAL is not None:
+            self._LOCAL = importlib.reload(self._LOCAL)
+        self._apply(self._resolve())
+        for listener in list(self._reload_listeners):
+            listener()
+        return self._snapshot
+
+    def on_reload(self, listener: typing.Callable[[], None]) -> None:
+        """Register a function to call after the settings are reloaded."""
+        self._reload_listeners.append(listener)
 
-    def __getattribute__(self, item: str) -> typing.Any:
-        try:
-            result = super().__getattribute__(item)
-            return result
-        except AttributeError:
-            pass
+    def __getattr__(self, item: str) -> typing.Any:
+        # Only called for attributes that aren't resolved settings
         if hasattr(self._LOCAL, item):
             return getattr(self._LOCAL, item)
         if hasattr(self._SETTINGS, item):
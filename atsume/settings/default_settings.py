@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 import hikari
 from atsume.settings.type_hints import *
 
@@ -13,6 +15,14 @@ COMPONENT_DM_PERMISSIONS = []
 
 COMPONENT_GUILD_PERMISSIONS = {}
 
+COMPONENT_PERMISSIONS_CACHE_BACKEND = None
+
+COMPONENT_PERMISSIONS_CACHE_TTL = 300.0
+
+COMPONENT_PERMISSIONS_CACHE_NEGATIVE_TTL = 60.0
+
+COMPONENT_PERMISSIONS_CACHE_SIZE = 10000
+
 EXTENSIONS = []
 
 HIKARI_LOGGING = False
@@ -23,8 +33,54 @@ MESSAGE_PREFIX = None
 
 DATABASE_URL = "sqlite:///db.sqlite"
 
+DATABASE_REPLICA_URLS = []
+
+DATABASES = {}
+
+DATABASE_POOL_MIN_SIZE = None
+
+DATABASE_POOL_MAX_SIZE = None
+
+DATABASE_POOL_ACQUIRE_TIMEOUT = None
+
+DATABASE_POOL_MAX_LIFETIME = None
+
+DATABASE_POOL_MAX_IDLE = None
+
 DEBUG = False
 
 GLOBAL_COMMANDS = False
 
 DISABLE_UVLOOP = False
+
+TIMER_PERSISTENT_WINDOW = timedelta(minutes=10)
+
+TIMER_MAX_CONCURRENT_JOBS = 1
+
+TIMER_JOB_TIMEOUT = None
+
+TIMER_LATE_START_THRESHOLD = 1.0
+
+TIMER_ENGINE_CLASS = "atsume.extensions.timer.engine.HeapEngine"
+
+TIMER_WHEEL_RESOLUTION = 0.01
+
+TIMER_CATCH_UP_POLICY = "coalesce"
+
+EXECUTOR_THREAD_WORKERS = None
+
+EXECUTOR_PROCESS_WORKERS = None
+
+EXECUTOR_SHUTDOWN_TIMEOUT = 30.0
+
+LOOP_MONITOR_INTERVAL = 0.5
+
+LOOP_MONITOR_THRESHOLD = 0.1
+
+LOOP_MONITOR_SAMPLE_STACKS = False
+
+COMPONENT_METRICS = True
+
+METRICS_HOST = "127.0.0.1"
+
+METRICS_PORT = 9464
@@ -26,6 +26,7 @@ Example
 
 
 import typing
+from datetime import timedelta
 
 from hikari import Intents
 
@@ -50,7 +51,8 @@ COMPONENTS: list[str]
 COMPONENT_PERMISSIONS_CLASS: typing.Optional[str]
 """
 An optional module path to a Permissions class 
-(must implement :py:class:`atsume.permissions.AbstractComponentPermissions`).
+(must implement :py:class:`atsume.permissions.AbstractComponentPermissions` or
+:py:class:`atsume.permissions.AbstractAsyncComponentPermissions`).
 """
 
 COMPONENT_ALL_GUILDS_PERMISSIONS: list[str]
@@ -71,6 +73,30 @@ For use with :py:class:`atsume.permissions.SettingsPermissions`, a dictionary ma
 to a list of allowed component module paths.
 """
 
+COMPONENT_PERMISSIONS_CACHE_BACKEND: typing.Optional[str]
+"""
+For use with :py:class:`atsume.permissions.CachedPermissions`, the module path to the
+Permissions class whose results are cached.
+"""
+
+COMPONENT_PERMISSIONS_CACHE_TTL: float
+"""
+For use with :py:class:`atsume.permissions.CachedPermissions`, how many seconds to cache
+a permission that was allowed. (default: 300.0)
+"""
+
+COMPONENT_PERMISSIONS_CACHE_NEGATIVE_TTL: float
+"""
+For use with :py:class:`atsume.permissions.CachedPermissions`, how many seconds to cache
+a permission that was denied. (default: 60.0)
+"""
+
+COMPONENT_PERMISSIONS_CACHE_SIZE: int
+"""
+For use with :py:class:`atsume.permissions.CachedPermissions`, the most results to cache
+per component. (default: 10000)
+"""
+
 HIKARI_LOGGING: bool
 """Enable more verbose logging. (default: False)"""
 
@@ -83,8 +109,106 @@ MESSAGE_PREFIX: typing.Optional[str]
 DATABASE_URL: str
 """A database URL for Ormar to use to connect to the database."""
 
+DATABASE_REPLICA_URLS: list[str]
+"""
+URLs of read replicas of the database. Reads from models are spread across them, while writes
+and transactions go to `DATABASE_URL`. (default: [], everything goes to `DATABASE_URL`)
+"""
+
+DATABASES: dict[str, typing.Union[str, dict[str, typing.Any]]]
+"""
+Extra databases that components can store their models in, by alias. Each is either a URL, or a
+dictionary of the `DATABASE_` settings without the prefix (like `URL`, `REPLICA_URLS` and
+`POOL_MAX_SIZE`), with missing pool settings taken from the `DATABASE_` settings. A `"default"`
+entry overrides the `DATABASE_` settings of the default database. (default: {})
+"""
+
+DATABASE_POOL_MIN_SIZE: typing.Optional[int]
+"""The number of connections the database pool keeps open. (default: None, the driver's default)"""
+
+DATABASE_POOL_MAX_SIZE: typing.Optional[int]
+"""The most connections the database pool opens at once. (default: None, the driver's default)"""
+
+DATABASE_POOL_ACQUIRE_TIMEOUT: typing.Optional[float]
+"""
+Seconds to wait for a free database connection before raising `asyncio.TimeoutError`.
+(default: None, wait forever)
+"""
+
+DATABASE_POOL_MAX_LIFETIME: typing.Optional[float]
+"""Seconds between replacing all of the database pool's connections. (default: None, never)"""
+
+DATABASE_POOL_MAX_IDLE: typing.Optional[float]
+"""Seconds a database connection can sit unused before it's closed. (default: None, the driver's default)"""
+
 EXTENSIONS: list[str]
 """A list of extension module paths to load."""
 
 DISABLE_UVLOOP: bool
 """Prevent running with uvloop even if installed. (default: False)"""
+
+TIMER_PERSISTENT_WINDOW: timedelta
+"""
+How far ahead persistent timer tasks are loaded from the database into memory. (default: 10 minutes)
+"""
+
+TIMER_MAX_CONCURRENT_JOBS: int
+"""
+The maximum number of timer tasks that can run at the same time. (default: 1, tasks run one after another)
+"""
+
+TIMER_JOB_TIMEOUT: typing.Optional[float]
+"""Seconds a timer task may run for before it is cancelled. (default: None, no limit)"""
+
+TIMER_LATE_START_THRESHOLD: float
+"""Log a warning when a timer task starts more than this many seconds late. (default: 1.0)"""
+
+TIMER_ENGINE_CLASS: str
+"""
+A module path to the engine the timer stores pending tasks in
+(must implement :py:class:`atsume.extensions.timer.AbstractTimerEngine`).
+Use `"atsume.extensions.timer.engine.TimingWheelEngine"` for large numbers of short timers.
+(default: `"atsume.extensions.timer.engine.HeapEngine"`)
+"""
+
+TIMER_WHEEL_RESOLUTION: float
+"""The length of a tick in seconds for the timing wheel timer engine. (default: 0.01)"""
+
+TIMER_CATCH_UP_POLICY: str
+"""
+What repeating timer tasks do after missing runs, one of `"skip"`, `"coalesce"` or `"fire_all"`.
+See :py:class:`atsume.extensions.timer.CatchUpPolicy`. (default: `"coalesce"`)
+"""
+
+EXECUTOR_THREAD_WORKERS: typing.Optional[int]
+"""The number of threads in the executor extension's thread pool. (default: None, Python's default)"""
+
+EXECUTOR_PROCESS_WORKERS: typing.Optional[int]
+"""The number of processes in the executor extension's process pool. (default: None, the number of CPUs)"""
+
+EXECUTOR_SHUTDOWN_TIMEOUT: typing.Optional[float]
+"""
+Seconds to wait for the executor extension's pools to finish their work when the bot closes
+before queued work is cancelled. (default: 30.0)
+"""
+
+LOOP_MONITOR_INTERVAL: float
+"""Seconds between the loop monitor extension's event loop lag measurements. (default: 0.5)"""
+
+LOOP_MONITOR_THRESHOLD: float
+"""Report event loop stalls longer than this many seconds. (default: 0.1)"""
+
+LOOP_MONITOR_SAMPLE_STACKS: bool
+"""Include the full stack of the blocking code in loop monitor reports. (default: False)"""
+
+COMPONENT_METRICS: bool
+"""
+Record how many times each command, listener, schedule, and open and close callback runs, how
+many times it fails, and how long it takes. (default: True)
+"""
+
+METRICS_HOST: str
+"""The address the metrics server extension listens on. (default: `"127.0.0.1"`)"""
+
+METRICS_PORT: int
+"""The port the metrics server extension listens on. (default: 9464)"""
@@ -0,0 +1,116 @@
+"""
+Compares the overhead of dispatching an event to a listener through the old per-call checks
+and through the invocation plan built when the listener is loaded.
+
+    python benchmarks/callback_dispatch.py
+"""
+
+import asyncio
+import time
+import typing
+
+import hikari
+
+import atsume
+from atsume.component.context import Context
+from atsume.component.decorators import AtsumeEventListener
+from atsume.permissions import AbstractComponentPermissions, check_guild, check_dm
+
+
+class BenchmarkEvent(hikari.Event):
+    app: typing.Any = None
+
+    def __init__(self, guild_id: typing.Optional[int]) -> None:
+        self.guild_id = guild_id
+
+
+class BenchmarkPermissions(AbstractComponentPermissions):
+    def __init__(self) -> None:
+        pass
+
+    def allow_in_guild(self, guild_id: int) -> bool:
+        return True
+
+    def allow_in_dm(self) -> bool:
+        return True
+
+
+class LegacyListener:
+    """How a listener was called before invocation plans."""
+
+    def __init__(
+        self,
+        callback: typing.Callable[..., typing.Coroutine[typing.Any, typing.Any, None]],
+        component_parameter_name: typing.Optional[str],
+        permissions: typing.Optional[AbstractComponentPermissions],
+    ) -> None:
+        self.callback = callback
+        self._component: typing.Any = None
+        self._component_parameter_name = component_parameter_name
+        self.permissions = permissions
+
+    async def has_permission(self, hikari_obj: typing.Any) -> bool:
+        if self.permissions:
+            if hasattr(hikari_obj, "guild_id"):
+                if hikari_obj.guild_id:
+                    if not await check_guild(self.permissions, hikari_obj.guild_id):
+                        return False
+            elif hasattr(hikari_obj, "channel_id"):
+                if not await check_dm(self.permissions):
+                    return False
+        return True
+
+    async def __call__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        assert len(args) > 0
+        first = args[0]
+        assert isinstance(first, hikari.Event) or isinstance(first, Context)
+        if not await self.has_permission(first):
+            return
+        if self._component_parameter_name:
+            kwargs[self._component_parameter_name] = self._component
+        await self.callback(*args, **kwargs)
+
+
+async def plain_listener(event: BenchmarkEvent) -> None:
+    pass
+
+
+async def component_listener(
+    event: BenchmarkEvent, component: atsume.Component
+) -> None:
+    pass
+
+
+async def measure(listener: typing.Callable[..., typing.Awaitable[None]]) -> float:
+    number = 200_000
+    event = BenchmarkEvent(1234)
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            await listener(event)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e9
+
+
+async def main() -> None:
+    for name, callback, component_parameter in (
+        ("plain", plain_listener, None),
+        ("with component", component_listener, "component"),
+    ):
+        for permissions in (None, BenchmarkPermissions()):
+            legacy = LegacyListener(callback, component_parameter, permissions)
+            planned = AtsumeEventListener(callback)
+            planned.permissions = permissions
+            planned.build_plan()
+            label = f"{name}, {'with' if permissions else 'no'} permissions"
+            before = await measure(legacy)
+            after = await measure(planned)
+            print(
+                f"{label:>35}: {before:6.1f} ns -> {after:6.1f} ns per event "
+                f"({before / after:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Compares the cost of reading a setting through the old dynamic lookup, the settings object,
+and a settings snapshot.
+
+    python benchmarks/settings_access.py
+"""
+
+import timeit
+import typing
+
+from atsume.settings import default_settings, settings
+
+
+class DynamicSettings:
+    """How settings were looked up before they were resolved ahead of time."""
+
+    _SETTINGS = None
+    _LOCAL = None
+
+    def __getattribute__(self, item: str) -> typing.Any:
+        try:
+            return super().__getattribute__(item)
+        except AttributeError:
+            pass
+        if hasattr(self._LOCAL, item):
+            return getattr(self._LOCAL, item)
+        if hasattr(self._SETTINGS, item):
+            return getattr(self._SETTINGS, item)
+        return getattr(default_settings, item)
+
+
+def main() -> None:
+    number = 1_000_000
+    snapshot = settings.snapshot
+    candidates = {
+        "dynamic lookup": DynamicSettings(),
+        "settings": settings,
+        "settings.snapshot": snapshot,
+    }
+    baseline = None
+    for name, obj in candidates.items():
+        seconds = min(
+            timeit.repeat(
+                "obj.COMPONENT_ALL_GUILDS_PERMISSIONS",
+                globals={"obj": obj},
+                number=number,
+                repeat=5,
+            )
+        )
+        per_read = seconds / number * 1e9
+        if baseline is None:
+            baseline = per_read
+        print(f"{name:>20}: {per_read:6.1f} ns per read ({baseline / per_read:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,9 @@ def mypy(session):
         session.install("uvloop", "black")
     session.install("mypy", "sqlalchemy-stubs", ".")
     session.run("mypy", "--strict", "-p", "atsume")
+
+
+@session
+def tests(session):
+    session.install("pytest", ".")
+    session.run("pytest", "tests")
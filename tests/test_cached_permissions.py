@@ -0,0 +1,149 @@
+import asyncio
+import types
+import typing
+
+import pytest
+
+from atsume.permissions import (
+    AbstractAsyncComponentPermissions,
+    CachedPermissions,
+    add_change_listener,
+    remove_change_listener,
+)
+
+
+class Backend(AbstractAsyncComponentPermissions):
+    """Allows even guilds, counting the lookups and optionally holding them until released."""
+
+    def __init__(self, component_path: str = "test") -> None:
+        self.lookups: list[int] = []
+        self.release: typing.Optional[asyncio.Event] = None
+
+    async def allow_in_guild(self, guild_id: int) -> bool:
+        self.lookups.append(guild_id)
+        if self.release is not None:
+            await self.release.wait()
+        return guild_id % 2 == 0
+
+    async def allow_in_dm(self) -> bool:
+        return True
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    # Only for the cache, the event loop keeps the real clock
+    monkeypatch.setattr(
+        "atsume.permissions.cached_permissions.time",
+        types.SimpleNamespace(monotonic=clock.monotonic),
+    )
+    return clock
+
+
+def cached(backend: Backend, max_size: int = 10) -> CachedPermissions:
+    return CachedPermissions(
+        "test", backend=backend, ttl=60, negative_ttl=5, max_size=max_size
+    )
+
+
+def run(coroutine: typing.Awaitable[None]) -> None:
+    asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_results_expire_after_their_ttl(clock: Clock) -> None:
+    async def main() -> None:
+        backend = Backend()
+        permissions = cached(backend)
+        assert await permissions.allow_in_guild(2)
+        assert not await permissions.allow_in_guild(3)
+        clock.now += 10
+        # The denied result expired, the allowed one didn't
+        assert await permissions.allow_in_guild(2)
+        assert not await permissions.allow_in_guild(3)
+        assert backend.lookups == [2, 3, 3]
+        clock.now += 60
+        assert permissions.peek_guild(2) is None
+        assert await permissions.allow_in_guild(2)
+        assert backend.lookups == [2, 3, 3, 2]
+        assert (permissions.hits, permissions.misses) == (1, 4)
+
+    run(main())
+
+
+def test_least_recently_used_result_is_dropped(clock: Clock) -> None:
+    async def main() -> None:
+        backend = Backend()
+        permissions = cached(backend, max_size=2)
+        await permissions.allow_in_guild(2)
+        await permissions.allow_in_guild(4)
+        # Using 2 again makes 4 the least recently used
+        await permissions.allow_in_guild(2)
+        await permissions.allow_in_guild(6)
+        assert permissions.peek_guild(2) is True
+        assert permissions.peek_guild(4) is None
+        assert permissions.peek_guild(6) is True
+
+    run(main())
+
+
+def test_concurrent_misses_share_one_lookup(clock: Clock) -> None:
+    async def main() -> None:
+        backend = Backend()
+        backend.release = asyncio.Event()
+        permissions = cached(backend)
+        checks = [
+            asyncio.ensure_future(permissions.allow_in_guild(2)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        # One cancelled check doesn't cancel the lookup the others wait on
+        checks[0].cancel()
+        backend.release.set()
+        results = await asyncio.gather(*checks[1:])
+        assert results == [True] * 4
+        assert backend.lookups == [2]
+        assert permissions.peek_guild(2) is True
+
+    run(main())
+
+
+def test_invalidated_lookup_is_not_cached(clock: Clock) -> None:
+    async def main() -> None:
+        backend = Backend()
+        backend.release = asyncio.Event()
+        permissions = cached(backend)
+        check = asyncio.ensure_future(permissions.allow_in_guild(2))
+        await asyncio.sleep(0)
+        permissions.invalidate(2)
+        backend.release.set()
+        assert await check
+        assert permissions.peek_guild(2) is None
+
+    run(main())
+
+
+def test_invalidate_all_notifies_listeners(clock: Clock) -> None:
+    async def main() -> None:
+        backend = Backend()
+        permissions = cached(backend)
+        await permissions.allow_in_guild(2)
+        await permissions.allow_in_dm()
+        changes: list[typing.Optional[int]] = []
+        add_change_listener(changes.append)
+        try:
+            CachedPermissions.invalidate_all(2)
+            CachedPermissions.invalidate_all()
+            CachedPermissions.clear_all()
+        finally:
+            remove_change_listener(changes.append)
+        assert changes == [2, None, None]
+        assert permissions.peek_guild(2) is None and not permissions._cache
+
+    run(main())
@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+import sys
+import types
+import typing
+from pathlib import Path
+
+import ormar
+import pytest
+import sqlalchemy
+
+from atsume.db.routing import ReplicatedDatabase
+from atsume.permissions.database.permissions import GuildComponentIndex
+
+
+@pytest.fixture
+def model(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> typing.Any:
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    metadata = sqlalchemy.MetaData()
+
+    # Same table as the component's model, without needing the component loaded
+    class GuildComponent(ormar.Model):
+        ormar_config = ormar.OrmarConfig(
+            database=ReplicatedDatabase(url),
+            metadata=metadata,
+            tablename="guild_components",
+            constraints=[ormar.UniqueColumns("guild_id", "component")],
+        )
+
+        id: int = ormar.Integer(primary_key=True)
+        guild_id: int = ormar.BigInteger(index=True)
+        component: str = ormar.String(max_length=255)
+
+    metadata.create_all(sqlalchemy.create_engine(url))
+    monkeypatch.setitem(
+        sys.modules,
+        "atsume.permissions.database.models",
+        types.SimpleNamespace(GuildComponent=GuildComponent),
+    )
+    return GuildComponent
+
+
+def run(model: typing.Any, coroutine: typing.Awaitable[None]) -> None:
+    async def main() -> None:
+        database = model.ormar_config.database
+        await database.connect()
+        try:
+            await coroutine
+        finally:
+            await database.disconnect()
+
+    asyncio.run(asyncio.wait_for(main(), 30))
+
+
+async def stored(model: typing.Any) -> list[tuple[int, str]]:
+    return sorted((row.guild_id, row.component) for row in await model.objects.all())
+
+
+def test_enabling_a_stored_component_is_not_an_error(model: typing.Any) -> None:
+    async def main() -> None:
+        index = GuildComponentIndex()
+        # Enabled by another process since the index was loaded
+        await model.objects.create(guild_id=1, component="a")
+        await index.enable(1, "a")
+        assert index.components_in_guild(1) == ["a"]
+        assert await stored(model) == [(1, "a")]
+
+    run(model, main())
+
+
+def test_failed_set_components_changes_nothing(model: typing.Any) -> None:
+    async def main() -> None:
+        index = GuildComponentIndex()
+        await index.set_components(1, ["a", "b"])
+        # Enabled by another process since the index was loaded
+        await model.objects.create(guild_id=1, component="c")
+        with pytest.raises(sqlite3.IntegrityError):
+            await index.set_components(1, ["c"])
+        # The deletes were rolled back with the insert that failed
+        assert await stored(model) == [(1, "a"), (1, "b"), (1, "c")]
+        assert sorted(index.components_in_guild(1)) == ["a", "b"]
+        await index.load()
+        await index.set_components(1, ["c"])
+        assert await stored(model) == [(1, "c")]
+        assert index.components_in_guild(1) == ["c"]
+
+    run(model, main())
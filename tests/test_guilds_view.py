@@ -0,0 +1,142 @@
+import asyncio
+import types
+import typing
+from unittest import mock
+
+import hikari
+
+from atsume.component.guilds import GuildsView
+from atsume.permissions import AbstractAsyncComponentPermissions
+
+
+class Allowed:
+    """Synchronous permissions allowing a set of guilds."""
+
+    def __init__(self, guilds: set[int]) -> None:
+        self.guilds = guilds
+
+    def allow_in_guild(self, guild_id: int) -> bool:
+        return guild_id in self.guilds
+
+    def allow_in_dm(self) -> bool:
+        return True
+
+
+class AsyncAllowed(AbstractAsyncComponentPermissions):
+    """Asynchronous permissions allowing a set of guilds once released."""
+
+    def __init__(self, guilds: set[int]) -> None:
+        self.guilds = guilds
+        self.release = asyncio.Event()
+
+    async def allow_in_guild(self, guild_id: int) -> bool:
+        await self.release.wait()
+        return guild_id in self.guilds
+
+    async def allow_in_dm(self) -> bool:
+        return True
+
+
+def make_view(
+    guilds: typing.Optional[list[int]], permissions: typing.Any = None
+) -> tuple[GuildsView, types.SimpleNamespace]:
+    cache = None
+    if guilds is not None:
+        cache = types.SimpleNamespace(
+            get_guilds_view=lambda: {hikari.Snowflake(g): None for g in guilds}
+        )
+    component = types.SimpleNamespace(
+        client=types.SimpleNamespace(cache=cache), permissions=permissions
+    )
+    return GuildsView(typing.cast(typing.Any, component)), component
+
+
+def event(event_type: type[hikari.Event], guild_id: int) -> typing.Any:
+    guild_event = mock.Mock(spec=event_type)
+    guild_event.guild_id = hikari.Snowflake(guild_id)
+    return guild_event
+
+
+def run(coroutine: typing.Awaitable[None]) -> None:
+    asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_view_is_built_from_the_cache_when_first_used() -> None:
+    async def main() -> None:
+        guilds = [1, 2, 3]
+        view, _ = make_view(guilds, Allowed({1, 3, 4}))
+        # Events before the view is used don't build or change it
+        await view._on_guild_visibility(event(hikari.GuildJoinEvent, 4))
+        view._on_permissions_changed(None)
+        assert not view._built and not view._known
+        guilds.append(4)
+        assert sorted(view) == [1, 3, 4]
+        assert 2 not in view and len(view) == 3
+
+    run(main())
+
+
+def test_view_follows_guild_events() -> None:
+    async def main() -> None:
+        view, _ = make_view([1], Allowed({1, 2}))
+        assert list(view) == [1]
+        await view._on_guild_visibility(event(hikari.GuildJoinEvent, 2))
+        await view._on_guild_visibility(event(hikari.GuildAvailableEvent, 3))
+        assert sorted(view) == [1, 2]
+        await view._on_guild_visibility(event(hikari.GuildLeaveEvent, 1))
+        assert sorted(view) == [2]
+
+    run(main())
+
+
+def test_view_follows_permission_changes() -> None:
+    async def main() -> None:
+        permissions = Allowed({1})
+        view, _ = make_view([1, 2, 3], permissions)
+        assert list(view) == [1]
+        permissions.guilds = {1, 2, 3}
+        view._on_permissions_changed(2)
+        assert sorted(view) == [1, 2]
+        permissions.guilds = {3}
+        view._on_permissions_changed(None)
+        assert list(view) == [3]
+
+    run(main())
+
+
+def test_async_permissions_are_checked_in_the_background() -> None:
+    async def main() -> None:
+        permissions = AsyncAllowed({1, 2})
+        view, _ = make_view([1, 2, 3], permissions)
+        assert len(view) == 0
+        # The bot leaves a guild while it's being checked
+        await view._on_guild_visibility(event(hikari.GuildLeaveEvent, 2))
+        permissions.release.set()
+        await asyncio.gather(*view._background_tasks)
+        assert list(view) == [1]
+
+    run(main())
+
+
+def test_view_without_a_cache_follows_events_after_first_use() -> None:
+    async def main() -> None:
+        view, _ = make_view(None)
+        await view._on_guild_visibility(event(hikari.GuildJoinEvent, 1))
+        assert len(view) == 0
+        await view._on_guild_visibility(event(hikari.GuildJoinEvent, 2))
+        assert list(view) == [2]
+
+    run(main())
+
+
+def test_reset_view_is_rebuilt() -> None:
+    async def main() -> None:
+        guilds = [1]
+        view, component = make_view(guilds)
+        assert list(view) == [1]
+        view._reset()
+        guilds.append(2)
+        component.permissions = Allowed({2})
+        assert list(view) == [2]
+
+    run(main())
@@ -0,0 +1,72 @@
+import asyncio
+import typing
+
+import pytest
+
+from atsume.component.listener_queue import ListenerQueue, OverflowPolicy
+
+
+def run(coroutine: typing.Awaitable[None]) -> None:
+    asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_busy_key_does_not_hold_up_other_keys() -> None:
+    async def main() -> None:
+        queue = ListenerQueue("test", max_size=100, workers=4)
+        handled: list[tuple[str, int]] = []
+        release = asyncio.Event()
+
+        async def hot(number: int) -> None:
+            handled.append(("hot", number))
+            await release.wait()
+
+        async def other(number: int) -> None:
+            handled.append(("other", number))
+
+        # More events for one key than there are workers
+        for number in range(8):
+            await queue.put(lambda number=number: hot(number), "hot")
+        for number in range(8):
+            await queue.put(lambda number=number: other(number), number)
+        await asyncio.sleep(0.05)
+        assert handled.count(("hot", 0)) == 1
+        assert sorted(n for kind, n in handled if kind == "other") == list(range(8))
+        # The hot key is handled one at a time, in order
+        assert [n for kind, n in handled if kind == "hot"] == [0]
+        release.set()
+        await queue.join()
+        assert [n for kind, n in handled if kind == "hot"] == list(range(8))
+        assert queue.metrics.depth == 0 and not queue._keys
+        await queue.close()
+
+    run(main())
+
+
+@pytest.mark.parametrize(
+    ("overflow", "expected"),
+    [
+        (OverflowPolicy.DROP_OLDEST, [7, 8, 9]),
+        (OverflowPolicy.DROP_NEWEST, [0, 1, 2]),
+        (OverflowPolicy.BLOCK, list(range(10))),
+    ],
+)
+def test_overflow_counts_events_waiting_on_their_key(
+    overflow: OverflowPolicy, expected: list[int]
+) -> None:
+    async def main() -> None:
+        queue = ListenerQueue("test", max_size=3, overflow=overflow)
+        handled: list[int] = []
+
+        async def record(number: int) -> None:
+            handled.append(number)
+            await asyncio.sleep(0)
+
+        for number in range(10):
+            await queue.put(lambda number=number: record(number), "key")
+            assert queue.metrics.depth <= 3
+        await queue.join()
+        assert handled == expected
+        assert queue.metrics.dropped == 10 - len(expected)
+        await queue.close()
+
+    run(main())
@@ -0,0 +1,178 @@
+import asyncio
+import types
+import typing
+from pathlib import Path
+
+import ormar
+import pytest
+import sqlalchemy
+from ormar.queryset import QuerySet
+
+from atsume.db.cache import CachedQuerySet, ModelCache, model_invalidated, model_written
+from atsume.db.routing import ReplicatedDatabase
+
+
+def make_user(path: Path, cache: ModelCache) -> typing.Any:
+    url = f"sqlite:///{path}"
+    database = ReplicatedDatabase(url)
+    metadata = sqlalchemy.MetaData()
+
+    class User(ormar.Model):
+        ormar_config = ormar.OrmarConfig(
+            database=database,
+            metadata=metadata,
+            tablename="users",
+            queryset_class=CachedQuerySet,
+        )
+
+        id: int = ormar.Integer(primary_key=True, autoincrement=False)
+        name: str = ormar.String(max_length=20)
+
+    # Set up the way Atsume's model metaclass would
+    setattr(User, "atsume_config", types.SimpleNamespace(cache=cache))
+    metadata.create_all(sqlalchemy.create_engine(url))
+    return User
+
+
+def run(coroutine: typing.Awaitable[None]) -> None:
+    asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_rows_are_dropped_least_recently_used_first() -> None:
+    cache = ModelCache(max_size=2)
+    cache.put(1, {"id": 1})
+    cache.put(2, {"id": 2})
+    assert cache.get(1) == {"id": 1}
+    cache.put(3, {"id": 3})
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.metrics.evictions == 1
+    assert (cache.metrics.hits, cache.metrics.misses) == (3, 1)
+
+
+def test_rows_expire_after_their_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(
+        "atsume.db.cache.time", types.SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    cache = ModelCache(ttl=10)
+    cache.put(1, {"id": 1})
+    clock.now += 5
+    assert cache.get(1) is not None
+    clock.now += 10
+    assert cache.get(1) is None
+    assert cache.metrics.expirations == 1 and len(cache) == 0
+
+
+def test_rows_read_before_a_write_are_not_stored() -> None:
+    cache = ModelCache()
+    epoch = cache.epoch
+    cache.invalidate(1)
+    cache.put(1, {"id": 1, "name": "old"}, epoch)
+    assert cache.get(1) is None
+    cache.put(1, {"id": 1, "name": "new"}, cache.epoch)
+    assert cache.get(1) == {"id": 1, "name": "new"}
+
+
+def test_lookups_by_primary_key_use_the_cache(tmp_path: Path) -> None:
+    cache = ModelCache()
+    User = make_user(tmp_path / "db.sqlite", cache)
+    database = User.ormar_config.database
+
+    async def main() -> None:
+        await database.connect()
+        await User.objects.create(id=1, name="a")
+        assert (await User.objects.get(pk=1)).name == "a"
+        assert (await User.objects.get(id=1)).name == "a"
+        assert (cache.metrics.hits, cache.metrics.misses) == (1, 1)
+        # Other lookups go to the database
+        assert (await User.objects.filter(name="a").get()).id == 1
+        assert cache.metrics.hits + cache.metrics.misses == 2
+        # Changing a cached instance doesn't change the cache until it's saved
+        user = await User.objects.get(pk=1)
+        user.name = "b"
+        assert (await User.objects.get(pk=1)).name == "a"
+        await user.update()
+        model_written(user)
+        assert (await User.objects.get(pk=1)).name == "b"
+        await user.delete()
+        model_invalidated(user)
+        assert await User.objects.get_or_none(pk=1) is None
+        await database.disconnect()
+
+    run(main())
+
+
+def test_queryset_writes_clear_the_cache(tmp_path: Path) -> None:
+    cache = ModelCache()
+    User = make_user(tmp_path / "db.sqlite", cache)
+    database = User.ormar_config.database
+
+    async def main() -> None:
+        await database.connect()
+        await User.objects.create(id=1, name="a")
+        await User.objects.get(pk=1)
+        assert len(cache) == 1
+        await User.objects.filter(id=1).update(name="b")
+        assert len(cache) == 0
+        assert (await User.objects.get(pk=1)).name == "b"
+        await User.objects.delete(each=True)
+        assert len(cache) == 0
+        await database.disconnect()
+
+    run(main())
+
+
+def test_transactions_skip_the_cache(tmp_path: Path) -> None:
+    cache = ModelCache()
+    User = make_user(tmp_path / "db.sqlite", cache)
+    database = User.ormar_config.database
+
+    async def main() -> None:
+        await database.connect()
+        await User.objects.create(id=1, name="a")
+        async with database.transaction(force_rollback=True):
+            await User.objects.filter(id=1).update(name="uncommitted")
+            assert (await User.objects.get(pk=1)).name == "uncommitted"
+        assert len(cache) == 0
+        assert (await User.objects.get(pk=1)).name == "a"
+        await database.disconnect()
+
+    run(main())
+
+
+def test_lookup_racing_a_write_is_not_stored(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = ModelCache()
+    User = make_user(tmp_path / "db.sqlite", cache)
+    database = User.ormar_config.database
+    original_get = QuerySet.get
+
+    async def main() -> None:
+        await database.connect()
+        await User.objects.create(id=1, name="a")
+        reading = asyncio.Event()
+        written = asyncio.Event()
+
+        async def slow_get(
+            self: typing.Any, *args: typing.Any, **kwargs: typing.Any
+        ) -> typing.Any:
+            result = await original_get(self, *args, **kwargs)
+            reading.set()
+            await written.wait()
+            return result
+
+        monkeypatch.setattr(QuerySet, "get", slow_get)
+        lookup = asyncio.ensure_future(User.objects.get(pk=1))
+        await reading.wait()
+        # The row changes after the lookup read it, but before it was stored
+        await User.objects.filter(id=1).update(name="b")
+        written.set()
+        assert (await lookup).name == "a"
+        assert cache.get(1) is None
+        monkeypatch.undo()
+        assert (await User.objects.get(pk=1)).name == "b"
+        await database.disconnect()
+
+    run(main())
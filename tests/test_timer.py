@@ -0,0 +1,63 @@
+import asyncio
+import typing
+from datetime import datetime, timedelta
+
+from atsume.extensions.timer.timer import Timer
+
+
+def run(coroutine: typing.Awaitable[None]) -> None:
+    asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_callback_raising_cancelled_error_keeps_the_worker() -> None:
+    async def main() -> None:
+        timer = Timer()
+        timer._start()
+        ran: list[str] = []
+
+        async def cancelled() -> None:
+            ran.append("cancelled")
+            future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            future.cancel()
+            await future
+
+        async def after() -> None:
+            ran.append("after")
+
+        now = datetime.now()
+        timer.schedule_task(now, cancelled, repeat=timedelta(milliseconds=20))
+        timer.schedule_task(now + timedelta(milliseconds=10), after)
+        await asyncio.sleep(0.2)
+        assert "after" in ran
+        # The repeating task is still on its schedule
+        assert ran.count("cancelled") > 1
+        assert timer.metrics.errors == ran.count("cancelled")
+        workers = list(timer._workers)
+        assert len(workers) == 1 and not workers[0].done()
+        await timer.close()
+        await asyncio.gather(*workers, return_exceptions=True)
+        assert workers[0].cancelled()
+
+    run(main())
+
+
+def test_closing_cancels_a_running_task() -> None:
+    async def main() -> None:
+        timer = Timer()
+        timer._start()
+        started = asyncio.Event()
+        finished: list[bool] = []
+
+        async def slow() -> None:
+            started.set()
+            await asyncio.sleep(10)
+            finished.append(True)
+
+        timer.schedule_task(datetime.now(), slow)
+        await started.wait()
+        workers = list(timer._workers)
+        await timer.close()
+        await asyncio.gather(*workers, return_exceptions=True)
+        assert workers[0].cancelled() and not finished
+
+    run(main())
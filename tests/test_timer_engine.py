@@ -0,0 +1,100 @@
+import random
+import typing
+
+import pytest
+
+from atsume.extensions.timer.engine import (
+    AbstractTimerEngine,
+    HeapEngine,
+    TimingWheelEngine,
+)
+
+
+class Clock:
+    """Stands in for the Timer, which the engines only use for its clock."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def _now(self) -> float:
+        return self.now
+
+
+class Task:
+    """Stands in for a TimerTask, the engines only use its deadline and handle."""
+
+    __slots__ = ("name", "_deadline", "_handle")
+
+    def __init__(self, name: int, deadline: float) -> None:
+        self.name = name
+        self._deadline = deadline
+        self._handle: typing.Any = None
+
+
+def attach(engine: AbstractTimerEngine, clock: Clock) -> AbstractTimerEngine:
+    engine.attach(typing.cast(typing.Any, clock))
+    return engine
+
+
+def names(tasks: typing.Iterable[typing.Any]) -> list[int]:
+    return sorted(task.name for task in tasks)
+
+
+def test_overflowed_task_due_before_the_top_wheel() -> None:
+    clock = Clock(2**31)
+    wheel = typing.cast(TimingWheelEngine, attach(TimingWheelEngine(1), clock))
+    early = Task(0, 2**32 + 2**31 + 10)
+    wheel.push(typing.cast(typing.Any, early))
+    clock.now = 2**32 - 5
+    assert wheel.pop_due(clock.now) == []
+    wheel.push(typing.cast(typing.Any, Task(1, 2**33 - 6)))
+    next_deadline = wheel.next_deadline()
+    assert next_deadline is not None and next_deadline <= early._deadline
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_wheel_matches_heap(seed: int) -> None:
+    rng = random.Random(seed)
+    clock = Clock(rng.randrange(2**33))
+    # A resolution of 1 with whole number deadlines means both engines should run
+    # exactly the same tasks at the same time
+    wheel = attach(TimingWheelEngine(1), clock)
+    heap = attach(HeapEngine(), clock)
+    pending: dict[int, tuple[Task, Task]] = {}
+    for name in range(300):
+        action = rng.random()
+        if action < 0.5:
+            span = rng.choice((2**8, 2**20, 2**34))
+            deadline = int(clock.now) + rng.randrange(-2, span)
+            pair = (Task(name, deadline), Task(name, deadline))
+            wheel.push(typing.cast(typing.Any, pair[0]))
+            heap.push(typing.cast(typing.Any, pair[1]))
+            pending[name] = pair
+        elif action < 0.6 and pending:
+            removed = pending.pop(rng.choice(list(pending)))
+            wheel.remove(typing.cast(typing.Any, removed[0]))
+            heap.remove(typing.cast(typing.Any, removed[1]))
+        else:
+            earliest = heap.next_deadline()
+            wakeup = wheel.next_deadline()
+            assert (wakeup is None) == (earliest is None)
+            if wakeup is None or earliest is None:
+                continue
+            # Tasks pushed after their deadline are due right away
+            assert wakeup <= max(earliest, clock.now)
+            # Wake up when the Timer would, or late like after the event loop was blocked
+            if rng.random() < 0.8:
+                clock.now = max(clock.now, wakeup)
+            else:
+                clock.now += rng.randrange(2 ** rng.randrange(34))
+            due = wheel.pop_due(clock.now)
+            assert names(due) == names(heap.pop_due(clock.now))
+            assert [task._deadline for task in due] == sorted(
+                task._deadline for task in due
+            )
+            for task in due:
+                del pending[task.name]
+        assert len(wheel) == len(heap) == len(pending)
+    assert names(wheel.tasks()) == names(heap.tasks()) == sorted(pending)
+    assert names(wheel.clear()) == sorted(pending)
+    assert len(wheel) == 0 and wheel.next_deadline() is None
@@ -0,0 +1,100 @@
+import asyncio
+import types
+import typing
+from pathlib import Path
+
+import ormar
+import pytest
+import sqlalchemy
+
+from atsume.db.routing import ReplicatedDatabase
+from atsume.db.write_behind import WriteBehind
+
+
+def make_counter(path: Path) -> typing.Any:
+    url = f"sqlite:///{path}"
+    database = ReplicatedDatabase(url)
+    metadata = sqlalchemy.MetaData()
+
+    class Counter(ormar.Model):
+        ormar_config = ormar.OrmarConfig(
+            database=database, metadata=metadata, tablename="counters"
+        )
+
+        id: int = ormar.Integer(primary_key=True, autoincrement=False)
+        count: int = ormar.Integer(default=0)
+        name: str = ormar.String(max_length=20, default="", nullable=False)
+
+    # WriteBehind only needs the cache from the Atsume config
+    setattr(Counter, "atsume_config", types.SimpleNamespace(cache=None))
+    metadata.create_all(sqlalchemy.create_engine(url))
+    return Counter
+
+
+def run(coroutine: typing.Awaitable[None]) -> None:
+    asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_periodic_flush_while_caller_holds_a_transaction(tmp_path: Path) -> None:
+    Counter = make_counter(tmp_path / "db.sqlite")
+    database = Counter.ormar_config.database
+
+    async def main() -> None:
+        await database.connect()
+        buffer = WriteBehind(Counter, flush_interval=0.001)
+        for _ in range(100):
+            # The flush task is started while this task has a connection open
+            async with database.transaction():
+                await buffer.increment(1, count=1)
+                for _ in range(3):
+                    await database.execute("SELECT 1")
+        await buffer.close()
+        assert (await Counter.objects.get(pk=1)).count == 100
+        assert buffer.metrics.errors == 0
+        await database.disconnect()
+
+    run(main())
+
+
+def test_flush_inside_a_transaction_uses_its_own_connection(tmp_path: Path) -> None:
+    Counter = make_counter(tmp_path / "db.sqlite")
+    database = Counter.ormar_config.database
+
+    async def main() -> None:
+        await database.connect()
+        buffer = WriteBehind(Counter)
+        transaction = await database.transaction()
+        await buffer.increment(1, count=2)
+        await buffer.flush()
+        # The caller's rollback doesn't undo the flush
+        await transaction.rollback()
+        await buffer.close()
+        assert (await Counter.objects.get(pk=1)).count == 2
+        await database.disconnect()
+
+    run(main())
+
+
+def test_failed_flush_keeps_rolled_back_changes(tmp_path: Path) -> None:
+    Counter = make_counter(tmp_path / "db.sqlite")
+    database = Counter.ormar_config.database
+
+    async def main() -> None:
+        await database.connect()
+        await Counter.objects.create(id=1, count=10)
+        await Counter.objects.create(id=2)
+        buffer = WriteBehind(Counter, upsert=False)
+        await buffer.increment(1, count=2)
+        await buffer.set(2, name=None)
+        with pytest.raises(Exception):
+            await buffer.flush()
+        pending = buffer.pending(1)
+        assert pending is not None and pending.increments == {"count": 2}
+        assert buffer.metrics.dropped == 0
+        # Fix the bad change and write the rest
+        await buffer.set(2, name="")
+        await buffer.close()
+        assert (await Counter.objects.get(pk=1)).count == 12
+        await database.disconnect()
+
+    run(main())